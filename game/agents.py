@@ -1,51 +1,241 @@
-from agno.agent import Agent, RunResponse
-from agno.models.openrouter import OpenRouter
-from agno.models.openai import OpenAIChat
+from dataclasses import dataclass, field
 from dotenv import load_dotenv
+from typing import TYPE_CHECKING, Callable, Optional
 import os
 
 load_dotenv()
 
-from game.status import game_state
-from tools.actions import add_food, add_knowledge, kill_agent, do_nothing, reproduce, steal_food
-from prompts.agents_instructions import instructions
-
-
-def create_agent(agent_id: int) -> Agent:
-    """Create a single agent with the given ID"""
-    return Agent(
-        name=f"Agent {agent_id}",
-        instructions=instructions(),
-        model=OpenAIChat(id="gpt-4o-mini", api_key=os.getenv("OPENAI_API_KEY")),
-        session_state={"game_state": game_state},
-        tools=[add_food, add_knowledge, kill_agent, do_nothing, reproduce, steal_food],
-        add_state_in_messages=True,
-        show_tool_calls=False,
-        markdown=False,
-        store_events=True,
-        add_history_to_messages=True,
-        debug_mode=False,
-    )
-
-
-def get_next_agent_id() -> int:
-    """Get the next available agent ID by finding the highest existing ID"""
-    if not game_state.models:
-        return 1
-    
-    existing_ids = []
-    for agent in game_state.models:
-        if agent.name.startswith("Agent "):
-            try:
-                agent_num = int(agent.name.split(" ")[1])
-                existing_ids.append(agent_num)
-            except (IndexError, ValueError):
-                continue
-    
-    return max(existing_ids) + 1 if existing_ids else 1
-
-
-def generate_agents(num_agents: int) -> list[Agent]:
-    """Generate a list of agents with sequential IDs starting from the next available ID"""
-    start_id = get_next_agent_id()
-    return [create_agent(start_id + i) for i in range(num_agents)]
\ No newline at end of file
+from game.status import GameState, AgentState
+from tools.actions import ACTIONS, defer_action
+from prompts.agents_instructions import batch_instructions, instructions
+
+# agno, openai and httpx are only imported once an agent or a model is built (game/clients.py)
+if TYPE_CHECKING:
+    from agno.agent import Agent, RunResponse
+    from agno.models.openai import OpenAIChat
+    from agno.models.openrouter import OpenRouter
+
+
+@dataclass
+class ModelBackend:
+    """
+    Where the agents' model is served: a provider registered in PROVIDERS ("openai", "openrouter",
+    "stub"), the model id, an OpenAI-compatible base URL overriding the provider's and the API key
+    (read from the provider's environment variable when None). `stub` holds the settings of the
+    local stub server (game/stub_server.py) the "stub" provider starts when no base URL is given;
+    the server belongs to the backend and is shut down by close().
+    """
+    provider: str = "openai"
+    model_id: str = "gpt-4o-mini"
+    base_url: Optional[str] = None
+    api_key: Optional[str] = None
+    stub: dict = field(default_factory=dict)
+    stub_server: Optional[object] = field(default=None, repr=False, compare=False)  # Started by the "stub" provider
+
+    def model(self):
+        if self.provider not in PROVIDERS:
+            raise ValueError(f"Unknown model provider {self.provider!r}, expected one of {', '.join(PROVIDERS)}")
+        return PROVIDERS[self.provider](self)
+
+    def close(self):
+        """Shut down the stub server the backend started, if any"""
+        if self.stub_server is not None:
+            self.stub_server.close()
+            self.stub_server = None
+
+
+# Model providers: name -> function(backend) -> agno model; add yours with @provider("name")
+PROVIDERS: dict[str, Callable[[ModelBackend], object]] = {}
+
+
+def provider(name: str):
+    def register(factory):
+        PROVIDERS[name] = factory
+        return factory
+    return register
+
+
+def _client_params() -> dict:
+    from game.clients import shared_http_clients
+
+    http_client, async_http_client = shared_http_clients()
+    # Retries are the scheduler's (game/scheduler.py), which sees every 429
+    return {"max_retries": 0, "http_client": http_client, "async_http_client": async_http_client}
+
+
+@provider("openai")
+def openai_model(backend: ModelBackend) -> "OpenAIChat":
+    from game.clients import SharedClientOpenAIChat
+
+    return SharedClientOpenAIChat(id=backend.model_id, api_key=backend.api_key or os.getenv("OPENAI_API_KEY"),
+                                  base_url=backend.base_url, **_client_params())
+
+
+@provider("openrouter")
+def openrouter_model(backend: ModelBackend) -> "OpenRouter":
+    from agno.models.openrouter import OpenRouter
+    from game.clients import SharedClientOpenRouter
+
+    return SharedClientOpenRouter(id=backend.model_id, api_key=backend.api_key or os.getenv("OPENROUTER_API_KEY"),
+                                  base_url=backend.base_url or OpenRouter.base_url, **_client_params())
+
+
+@provider("stub")
+def stub_model(backend: ModelBackend) -> "OpenAIChat":
+    """
+    OpenAI model talking to a local stub server, started on a free port on the backend's first model
+    unless base_url is set
+    """
+    from game.clients import SharedClientOpenAIChat
+
+    base_url = backend.base_url
+    if base_url is None:
+        if backend.stub_server is None:
+            from game import stub_server
+
+            backend.stub_server = stub_server.start(**backend.stub)
+        base_url = backend.stub_server.base_url
+    return SharedClientOpenAIChat(id=backend.model_id, api_key=backend.api_key or "stub", base_url=base_url,
+                                  **_client_params())
+
+
+class AgentRecord:
+    """
+    Lightweight colony member (name, id and state). The LLM-backed agno Agent behind it
+    is only built by the pool the first time the member needs to act.
+    """
+    __slots__ = ("agent_id", "name", "pool", "memory", "_agent")
+
+    def __init__(self, agent_id: int, pool: "AgentPool"):
+        self.agent_id = agent_id
+        self.name = f"Agent {agent_id}"
+        self.pool = pool
+        self.memory = None  # Conversation memory restored from a checkpoint, until the agent is built
+        self._agent = None
+
+    def __repr__(self) -> str:
+        return f"AgentRecord({self.name!r})"
+
+    @property
+    def state(self) -> AgentState:
+        return self.pool.game_state.get_agent_state(self.name)
+
+    @property
+    def session_state(self) -> dict:
+        """The session state the tools read, so a record can run a tool call without building its agent"""
+        return self.pool.session_state
+
+    @property
+    def agent(self) -> "Agent":
+        """The LLM-backed agent, built on first use"""
+        if self._agent is None:
+            self._agent = self.pool.build(self)
+        return self._agent
+
+    def run(self, message: str) -> "RunResponse":
+        response = self.agent.run(message)
+        self.pool.trim_history(self._agent)
+        return response
+
+    async def arun(self, message: str) -> "RunResponse":
+        response = await self.agent.arun(message)
+        self.pool.trim_history(self._agent)
+        return response
+
+
+# Tools processed once (JSON schema and argument validator), every agent gets copies of them
+_tools = None
+
+
+def processed_tools() -> list:
+    global _tools
+    if _tools is None:
+        from agno.tools import tool
+
+        _tools = []
+        for action in ACTIONS.values():
+            function = tool(action)
+            function.process_entrypoint()
+            _tools.append(function)
+    return _tools
+
+
+class AgentPool:
+    """
+    Builds the agents of one game, sharing one model config, the rendered instructions and the
+    process-wide HTTP clients. Each agent gets the game's state through its session_state.
+    """
+
+    def __init__(self, game_state: GameState, model_id: str = "gpt-4o-mini", model_factory=None, history_window: int = 2,
+                 backend: Optional[ModelBackend] = None):
+        self.game_state = game_state
+        self.backend = backend or ModelBackend(model_id=model_id)
+        self.model_id = self.backend.model_id
+        self.history_window = history_window  # Runs kept in each agent's conversation history
+        self.model_factory = model_factory or self.default_model
+        self.instructions = instructions()
+        self.session_state = {"game_state": game_state, "agent_pool": self}
+        self._coordinators = []  # Agents answering batched decision prompts, one per group
+
+    def default_model(self):
+        """Model of the pool's backend, using the shared HTTP clients"""
+        return self.backend.model()
+
+    def create(self, agent_id: int) -> AgentRecord:
+        return AgentRecord(agent_id, self)
+
+    def generate(self, num_agents: int) -> list[AgentRecord]:
+        """Generate agents with sequential IDs taken from the game's ID counter"""
+        return [self.create(agent_id) for agent_id in self.game_state.allocate_agent_ids(num_agents)]
+
+    def coordinator(self, index: int) -> "Agent":
+        """Agent deciding for a whole group of colony members in one request (batched turns)"""
+        from agno.agent import Agent
+
+        while len(self._coordinators) <= index:
+            self._coordinators.append(Agent(
+                name=f"Colony coordinator {len(self._coordinators) + 1}",
+                instructions=batch_instructions(),
+                model=self.model_factory(),
+                markdown=False,
+                debug_mode=False,
+            ))
+        return self._coordinators[index]
+
+    def close(self):
+        """Release what the pool's backend started (its stub server)"""
+        self.backend.close()
+
+    def trim_history(self, agent: "Agent"):
+        """Drop the runs older than the history window, so the agent's memory stays bounded"""
+        runs = getattr(agent.memory, "runs", None)
+        if isinstance(runs, dict):
+            for session_runs in runs.values():
+                del session_runs[:-self.history_window]
+
+    def build(self, record: AgentRecord) -> "Agent":
+        """Build the LLM-backed agent of a record, with the memory it had when the game was checkpointed"""
+        from agno.agent import Agent
+
+        restored = {}
+        if record.memory is not None:
+            from game.checkpoint import restored_memory
+
+            restored = restored_memory(record.memory)
+            record.memory = None
+        return Agent(
+            name=record.name,
+            instructions=self.instructions,
+            model=self.model_factory(),
+            session_state=dict(self.session_state),
+            tools=[function.model_copy() for function in processed_tools()],  # Own copies, so tool calls see the right agent
+            tool_hooks=[defer_action],
+            add_state_in_messages=True,
+            show_tool_calls=False,
+            markdown=False,
+            store_events=True,
+            add_history_to_messages=True,
+            num_history_runs=self.history_window,
+            debug_mode=False,
+            **restored,
+        )
@@ -0,0 +1,97 @@
+from pydantic import BaseModel, Field, PrivateAttr
+from typing import Optional
+
+
+class Chance(BaseModel):
+    """Cumulative chance shifted by the knowledge bonus: base + slope * bonus, clamped to [floor, ceiling]"""
+    base: float
+    slope: float = 0.0
+    floor: Optional[float] = None
+    ceiling: Optional[float] = None
+
+    def at(self, bonus: int) -> float:
+        value = self.base + self.slope * bonus
+        if self.floor is not None:
+            value = max(self.floor, value)
+        if self.ceiling is not None:
+            value = min(self.ceiling, value)
+        return value
+
+
+class OutcomeTable(BaseModel):
+    """
+    Random outcome of an action: the first chance above the random draw gives its amount;
+    above all of them the outcome is top_amount + min(bonus // top_bonus_divisor, top_bonus_cap).
+    """
+    chances: list[Chance]
+    amounts: list[int]
+    top_amount: int
+    top_bonus_divisor: int = 1
+    top_bonus_cap: int = 0
+    _thresholds: dict = PrivateAttr(default_factory=dict)  # Cache by knowledge bonus
+
+    def thresholds(self, bonus: int) -> tuple[list[float], int]:
+        """Cumulative chances and top outcome for a knowledge bonus"""
+        cached = self._thresholds.get(bonus)
+        if cached is None:
+            top = self.top_amount + min(bonus // self.top_bonus_divisor, self.top_bonus_cap)
+            cached = self._thresholds[bonus] = ([chance.at(bonus) for chance in self.chances], top)
+        return cached
+
+    def draw(self, bonus: int, rand: float) -> int:
+        chances, top = self.thresholds(bonus)
+        for chance, amount in zip(chances, self.amounts):
+            if rand < chance:
+                return amount
+        return top
+
+
+# Food gathered by add_food
+HARVEST = OutcomeTable(
+    chances=[
+        Chance(base=0.1, slope=-0.005, floor=0.08),
+        Chance(base=0.3, slope=-0.02, floor=0.2),
+        Chance(base=0.6, slope=0.02, ceiling=0.7),
+        Chance(base=0.9, slope=0.01, ceiling=0.85),
+    ],
+    amounts=[0, 1, 2, 3],
+    top_amount=3, top_bonus_divisor=3, top_bonus_cap=1,
+)
+
+# Food taken by steal_food - smarter thieves steal more efficiently
+THEFT = OutcomeTable(
+    chances=[
+        Chance(base=0.15, slope=-0.01, floor=0.05),
+        Chance(base=0.4, slope=-0.03, floor=0.25),
+        Chance(base=0.6, slope=0.025, ceiling=0.75),
+        Chance(base=0.85, slope=0.015, ceiling=0.9),
+    ],
+    amounts=[1, 2, 3, 4],
+    top_amount=5, top_bonus_divisor=2, top_bonus_cap=2,
+)
+
+# Agents born from reproduce, max 4 even with very high knowledge
+OFFSPRING = OutcomeTable(
+    chances=[
+        Chance(base=0.6, slope=-0.03, floor=0.45),
+        Chance(base=0.9, slope=-0.02, ceiling=0.8),
+    ],
+    amounts=[1, 2],
+    top_amount=3, top_bonus_divisor=5, top_bonus_cap=1,
+)
+
+
+class Balance(BaseModel):
+    """Tunable constants of the colony rules; the defaults are the rules of the original game"""
+    knowledge_bonus_step: int = Field(default=10)  # Every N knowledge improves the action outcomes
+    harvest: OutcomeTable = Field(default_factory=lambda: HARVEST.model_copy(deep=True))
+    theft: OutcomeTable = Field(default_factory=lambda: THEFT.model_copy(deep=True))
+    offspring: OutcomeTable = Field(default_factory=lambda: OFFSPRING.model_copy(deep=True))
+    food_consumption: int = Field(default=1)  # Food eaten per agent every turn
+    # (food per agent, share kept): food left after eating decays once it exceeds the threshold
+    food_decay_tiers: list[tuple[int, float]] = Field(default=[(6, 0.5), (5, 0.6), (4, 0.7), (3, 0.8), (2, 0.9)])
+    knowledge_decay: float = Field(default=0.1)  # Share of knowledge lost every turn
+    natural_death_divisor: int = Field(default=8)  # Up to population / N natural deaths per turn
+
+
+DEFAULT_BALANCE = Balance()
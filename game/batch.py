@@ -0,0 +1,289 @@
+"""
+Vectorized batch simulator: N independent colonies held as NumPy arrays and advanced together.
+It follows the rules of game/rules.py (same probability tables, decay tiers and death rules) for
+colonies whose agents pick actions with fixed probabilities, like headless.weighted_policy (named
+weight sets are in headless.WEIGHTS).
+Each turn loops over agent slots, and every slot is processed for all colonies at once.
+"""
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from game import rules
+from game.balance import Balance, DEFAULT_BALANCE, OutcomeTable
+
+ACTION_NAMES = list(rules.ACTIONS)
+ADD_FOOD, ADD_KNOWLEDGE, KILL_AGENT, DO_NOTHING, REPRODUCE, STEAL_FOOD = (ACTION_NAMES.index(name) for name in (
+    "add_food", "add_knowledge", "kill_agent", "do_nothing", "reproduce", "steal_food"))
+
+
+def action_probabilities(weights: dict[str, float]) -> np.ndarray:
+    """Turn {action name: relative weight} into a probability vector in ACTION_NAMES order"""
+    probs = np.array([weights.get(name, 0.0) for name in ACTION_NAMES], dtype=float)
+    return probs / probs.sum()
+
+
+def _draw(table: OutcomeTable, bonus: np.ndarray, rand: np.ndarray) -> np.ndarray:
+    """Vectorized OutcomeTable.draw"""
+    conditions = []
+    for chance in table.chances:
+        threshold = chance.base + chance.slope * bonus
+        if chance.floor is not None:
+            threshold = np.maximum(chance.floor, threshold)
+        if chance.ceiling is not None:
+            threshold = np.minimum(chance.ceiling, threshold)
+        conditions.append(rand < threshold)
+    top = table.top_amount + np.minimum(bonus // table.top_bonus_divisor, table.top_bonus_cap)
+    return np.select(conditions, table.amounts, top)
+
+
+def _pick_ranked(mask: np.ndarray, counts: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """For each row, pick `counts[row]` random True cells of `mask` (without replacement)"""
+    keys = rng.random(mask.shape)
+    keys[~mask] = np.inf
+    # Keys up to each row's counts-th smallest one
+    threshold = np.sort(keys, axis=1)[np.arange(len(mask)), np.maximum(counts, 1) - 1]
+    return mask & (keys <= threshold[:, None]) & (counts > 0)[:, None]
+
+
+@dataclass
+class BatchResult:
+    turns_played: np.ndarray
+    population: np.ndarray
+    food: np.ndarray
+    knowledge: np.ndarray
+    history: Optional[np.ndarray] = None  # (turns + 1, 3, n_colonies): population, food, knowledge after each turn's actions
+
+    @property
+    def survived(self) -> np.ndarray:
+        return self.population > 1
+
+
+class BatchSimulator:
+    """
+    Colonies are rows. Per colony: food, knowledge, population; per agent slot: alive and starvation
+    immunity flags plus action counts. Slots keep the order agents joined the colony, like Population.
+    """
+
+    def __init__(self, n_colonies: int, action_probs, n_agents: int = 10, food: int = 10,
+                 seed: Optional[int] = None, capacity: Optional[int] = None, balance: Balance = DEFAULT_BALANCE):
+        self.rng = np.random.default_rng(seed)
+        self.balance = balance
+        self.n_colonies = n_colonies
+        capacity = max(capacity or 2 * n_agents, n_agents + 4)
+
+        # Action probabilities, one vector for all colonies or one row per colony
+        probs = np.broadcast_to(np.asarray(action_probs, dtype=float), (n_colonies, len(ACTION_NAMES)))
+        self.cum_probs = np.cumsum(probs / probs.sum(axis=1, keepdims=True), axis=1)
+
+        self.food = np.full(n_colonies, food, dtype=np.int64)
+        self.knowledge = np.zeros(n_colonies, dtype=np.int64)
+        self.population = np.full(n_colonies, n_agents, dtype=np.int64)
+        self.size = np.full(n_colonies, n_agents, dtype=np.int64)  # First never used slot
+        self.turns_played = np.zeros(n_colonies, dtype=np.int64)
+        self.turn_stats = np.stack([self.population, self.food, self.knowledge])
+
+        self.alive = np.zeros((n_colonies, capacity), dtype=bool)
+        self.alive[:, :n_agents] = True
+        self.immune = np.zeros((n_colonies, capacity), dtype=bool)
+        self.action_counts = np.zeros((n_colonies, capacity, len(ACTION_NAMES)), dtype=np.int16)  # At most one action per turn
+
+    @property
+    def capacity(self) -> int:
+        return self.alive.shape[1]
+
+    def _grow(self, needed: int):
+        """Make room for at least `needed` slots per colony"""
+        extra = max(needed, self.capacity * 3 // 2) - self.capacity
+        self.alive = np.pad(self.alive, ((0, 0), (0, extra)))
+        self.immune = np.pad(self.immune, ((0, 0), (0, extra)))
+        self.action_counts = np.pad(self.action_counts, ((0, 0), (0, extra), (0, 0)))
+        self._acting = np.pad(self._acting, ((0, 0), (0, extra)))
+
+    # -- Actions, applied to the colonies in `rows` whose agent in `slot` picked them --
+
+    def _add_food(self, rows, slot):
+        self.action_counts[rows, slot, ADD_FOOD] += 1
+        bonus = self.knowledge[rows] // self.balance.knowledge_bonus_step
+        gained = _draw(self.balance.harvest, bonus, self.rng.random(len(rows)))
+        self.food[rows] += gained
+
+    def _add_knowledge(self, rows, slot):
+        self.action_counts[rows, slot, ADD_KNOWLEDGE] += 1
+        self.knowledge[rows] += 1
+
+    def _kill_agent(self, rows, slot):
+        # Random target among the other living agents of the colony
+        keys = self.rng.random((len(rows), self.capacity))
+        invalid = ~self.alive[rows]
+        invalid[:, slot] = True
+        keys[invalid] = -1.0
+        targets = keys.argmax(axis=1)
+        found = keys[np.arange(len(rows)), targets] >= 0
+
+        # Without a target the agent does nothing, like headless policies do
+        self.action_counts[rows[~found], slot, DO_NOTHING] += 1
+        rows, targets = rows[found], targets[found]
+        self.action_counts[rows, slot, KILL_AGENT] += 1
+        self.alive[rows, targets] = False
+        self.population[rows] -= 1
+
+    def _do_nothing(self, rows, slot):
+        self.action_counts[rows, slot, DO_NOTHING] += 1
+
+    def _reproduce(self, rows, slot):
+        self.action_counts[rows, slot, REPRODUCE] += 1
+        bonus = self.knowledge[rows] // self.balance.knowledge_bonus_step
+        children = _draw(self.balance.offspring, bonus, self.rng.random(len(rows)))
+
+        needed = int((self.size[rows] + children).max())
+        if needed > self.capacity:
+            self._grow(needed)
+        # Newborns take the next unused slots and don't act before next turn (_acting stays False)
+        for offset in range(int(children.max())):
+            born = rows[children > offset]
+            self.alive[born, self.size[born] + offset] = True
+        self.size[rows] += children
+        self.population[rows] += children
+
+    def _steal_food(self, rows, slot):
+        # Nothing to steal: the action is wasted and not recorded
+        rows = rows[self.food[rows] > 0]
+        self.action_counts[rows, slot, STEAL_FOOD] += 1
+        self.immune[rows, slot] = True
+        bonus = self.knowledge[rows] // self.balance.knowledge_bonus_step
+        stolen = _draw(self.balance.theft, bonus, self.rng.random(len(rows)))
+        self.food[rows] -= np.minimum(stolen, self.food[rows])
+
+    # -- Turn --
+
+    def step(self):
+        """Advance every colony that still has more than one agent by one turn"""
+        active = self.population > 1
+        self.turns_played[active] += 1
+
+        # Agents alive at the start of the turn act in slot order
+        self._acting = self.alive & active[:, None]
+        appliers = (self._add_food, self._add_knowledge, self._kill_agent, self._do_nothing, self._reproduce, self._steal_food)
+        for slot in range(int(self.size[active].max(initial=0))):
+            rows = np.flatnonzero(self._acting[:, slot] & self.alive[:, slot] & (self.population > 1))
+            if not len(rows):
+                continue
+            draws = self.rng.random(len(rows))
+            actions = np.minimum((draws[:, None] >= self.cum_probs[rows]).sum(axis=1), len(ACTION_NAMES) - 1)
+            for action, apply in enumerate(appliers):
+                selected = rows[actions == action]
+                if len(selected):
+                    apply(selected, slot)
+
+        # Stats as they stand before the end-of-turn phase, like the game loop records them
+        self.turn_stats = np.stack([self.population, self.food, self.knowledge])
+        self._end_turn(np.flatnonzero(active))
+
+    def _end_turn(self, rows):
+        """Natural deaths, resources decay and starvation (see GameState.end_turn)"""
+        if not len(rows):
+            return
+        rng = self.rng
+
+        # Natural deaths: 0 to population / 8 random agents, never the whole colony
+        population = self.population[rows]
+        num_to_die = (rng.random(len(rows)) * (population // self.balance.natural_death_divisor + 1)).astype(np.int64)
+        dies = (num_to_die > 0) & (num_to_die < population)
+        dying = rows[dies]
+        if len(dying):
+            width = int(self.size[dying].max())
+            dead = _pick_ranked(self.alive[dying, :width], num_to_die[dies], rng)
+            self.alive[dying, :width] &= ~dead
+            self.population[dying] -= dead.sum(axis=1)
+
+        # Resources decay
+        balance = self.balance
+        population = self.population[rows]
+        food = np.maximum(self.food[rows] - population * balance.food_consumption, 0)
+        tiers = balance.food_decay_tiers
+        if tiers:
+            factor = np.select([food >= population * food_per_agent for food_per_agent, _ in tiers], [kept for _, kept in tiers], 1.0)
+            food = (food * factor).astype(np.int64)
+        self.food[rows] = food
+        knowledge = self.knowledge[rows]
+        self.knowledge[rows] = np.maximum(knowledge - (knowledge * balance.knowledge_decay).astype(np.int64), 0)
+
+        # Starvation: 1 to half of the vulnerable agents die, then immunity resets
+        starving = rows[self.food[rows] <= 0]
+        if len(starving):
+            width = int(self.size[starving].max())
+            vulnerable = self.alive[starving, :width] & ~self.immune[starving, :width]
+            n_vulnerable = vulnerable.sum(axis=1)
+            has_vulnerable = n_vulnerable > 0
+            starving_rows, vulnerable, n_vulnerable = starving[has_vulnerable], vulnerable[has_vulnerable], n_vulnerable[has_vulnerable]
+            if len(starving_rows):
+                num_to_die = rng.integers(1, np.maximum(1, n_vulnerable // 2) + 1)
+                dead = _pick_ranked(vulnerable, np.minimum(num_to_die, n_vulnerable), rng)
+                self.alive[starving_rows, :width] &= ~dead
+                self.population[starving_rows] -= dead.sum(axis=1)
+            self.immune[starving] = False
+
+        self._compact(rows)
+
+    def _compact(self, rows):
+        """Move the living agents of `rows` to the first slots, keeping their order"""
+        rows = rows[self.size[rows] > self.population[rows]]  # Only colonies with gaps
+        if not len(rows):
+            return
+        width = int(self.size[rows].max())
+        alive = self.alive[rows, :width]
+        compacted = np.arange(width) < self.population[rows][:, None]
+        # Boolean extraction walks rows in order, so agents keep their relative order
+        for array in (self.immune, self.action_counts):
+            values = np.zeros_like(array[rows, :width])
+            values[compacted] = array[rows, :width][alive]
+            array[rows, :width] = values
+        self.alive[rows, :width] = compacted
+        self.size[rows] = self.population[rows]
+
+    def run(self, turns: int = 100, record_history: bool = True) -> BatchResult:
+        """Play up to `turns` turns; colonies stop once at most one agent is left"""
+        history = None
+        if record_history:
+            history = np.zeros((turns + 1, 3, self.n_colonies), dtype=np.int64)
+            history[0] = self.population, self.food, self.knowledge
+        for turn in range(1, turns + 1):
+            if not (self.population > 1).any():
+                if record_history:
+                    history[turn:] = history[turn - 1]
+                break
+            self.step()
+            if record_history:
+                history[turn] = self.turn_stats
+        return BatchResult(self.turns_played.copy(), self.population.copy(), self.food.copy(), self.knowledge.copy(), history)
+
+
+def run_batch(n_colonies: int, weights: dict[str, float], turns: int = 100, n_agents: int = 10, food: int = 10,
+              seed: Optional[int] = None, record_history: bool = False, balance: Balance = DEFAULT_BALANCE) -> BatchResult:
+    """Play `n_colonies` games whose agents pick actions with the given relative weights"""
+    simulator = BatchSimulator(n_colonies, action_probabilities(weights), n_agents=n_agents, food=food, seed=seed, balance=balance)
+    return simulator.run(turns, record_history=record_history)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from game.headless import WEIGHTS
+
+    parser = argparse.ArgumentParser(description="Run colonies in batch with the vectorized simulator")
+    parser.add_argument("--colonies", type=int, default=10_000)
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--agents", type=int, default=10)
+    parser.add_argument("--food", type=int, default=10)
+    parser.add_argument("--weights", choices=WEIGHTS, default="random")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = run_batch(args.colonies, WEIGHTS[args.weights], args.turns, args.agents, args.food, args.seed)
+    elapsed = time.perf_counter() - start
+    print(f"{args.colonies} colonies in {elapsed:.2f}s ({args.colonies / elapsed:.0f} colonies/s)")
+    print(f"Survived {args.turns} turns: {result.survived.mean():.1%}, mean turns played: {result.turns_played.mean():.1f}")
@@ -0,0 +1,312 @@
+"""
+Benchmarks of the simulation hot paths across population sizes, with FakeModel in place of the LLM.
+
+    python -m game.bench run [--sizes 10 100 1000 10000] [--only choices ...] [--out runs/bench.json]
+    python -m game.bench compare BASELINE [CURRENT] [--threshold 0.25]
+
+`run` prints the time per operation for each population size and its scaling exponent (the slope of
+log time against log population: 0 is constant, 1 linear), and saves the results as a JSON baseline.
+`compare` times the current tree (or reads CURRENT) against a baseline and exits with status 1 when an
+operation got slower than the threshold allows.
+"""
+import contextlib
+import gc
+import io
+import json
+import math
+import platform
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from game import rules
+from game.status import ACTIONS, Immunity, Population
+
+VERSION = 1
+SIZES = (10, 100, 1000, 10_000)
+
+# name -> function(population) -> (setup, run, ops): run(setup()) performs `ops` operations
+BENCHMARKS: dict[str, Callable[[int], tuple[Callable, Callable, int]]] = {}
+
+
+def benchmark(name: str):
+    def register(function):
+        BENCHMARKS[name] = function
+        return function
+    return register
+
+
+def _simulation(population: int, food: int = 1000, actions: int = 5):
+    """A game of `population` agents behind FakeModel, each with a few actions recorded"""
+    from game.fake_model import FakeModel
+    from game.simulation import Simulation
+
+    simulation = Simulation(n_agents=population, food=food, seed=0, model_factory=lambda: FakeModel(latency=0.0))
+    state = simulation.state
+    rng = random.Random(0)
+    for name in state.models.names():
+        for _ in range(actions):
+            state.record_action(name, rng.choice(ACTIONS))
+    state.starvation_immune.clear()
+    return simulation
+
+
+@benchmark("resources_decay")
+def _resources_decay(population: int):
+    state = _simulation(population, actions=0).state
+    return lambda: state, lambda state: [state.resources_decay() for _ in range(1000)], 1000
+
+
+@benchmark("starving")
+def _starving(population: int):
+    state = _simulation(population, actions=0).state
+    agents = state.models.snapshot()
+
+    def setup():
+        state.models = Population(agents)
+        state.food = 0
+        state.starvation_immune = Immunity(agent.name for agent in agents[::3])
+        return state
+
+    return setup, lambda state: state.starving(), 1
+
+
+@benchmark("natural_death")
+def _natural_death(population: int):
+    state = _simulation(population, actions=0).state
+    agents = state.models.snapshot()
+
+    def setup():
+        state.models = Population(agents)
+        return state
+
+    return setup, lambda state: state.natural_death(), 1
+
+
+@benchmark("end_turn")
+def _end_turn(population: int):
+    """The whole end-of-turn phase in a famine, a third of the colony immune"""
+    state = _simulation(population, actions=0).state
+    agents = state.models.snapshot()
+
+    def setup():
+        state.models = Population(agents)
+        state.food, state.knowledge = 0, 100
+        state.starvation_immune = Immunity(agent.name for agent in agents[::3])
+        return state
+
+    return setup, lambda state: state.end_turn(), 1
+
+
+@benchmark("kill_agent")
+def _kill_agent(population: int):
+    state = _simulation(population, actions=0).state
+    agents = state.models.snapshot()
+    killer = agents[0].name
+    targets = [agent.name for agent in random.Random(0).sample(agents[1:], min(100, population - 1))]
+
+    def setup():
+        state.models = Population(agents)
+        return state
+
+    def run(state):
+        for target in targets:
+            rules.kill_agent(state, killer, agent_name=target)
+
+    return setup, run, len(targets)
+
+
+@benchmark("record_action")
+def _record_action(population: int):
+    """One turn of actions: every agent records one and gets its title updated"""
+    state = _simulation(population, actions=0).state
+    rng = random.Random(0)
+    turn = [(name, rng.choice(ACTIONS)) for name in state.models.names()]
+
+    def run(state):
+        for name, action in turn:
+            state.record_action(name, action)
+
+    return lambda: state, run, len(turn)
+
+
+@benchmark("choices")
+def _choices(population: int):
+    from prompts.agents_instructions import choices
+
+    simulation = _simulation(population)
+    state = simulation.state
+    simulation.start_turn()
+    simulation.record()
+    simulation.end_turn()
+    agents = state.models.names()[:200]
+    return lambda: state, lambda state: [choices(agent_name=name, game_state=state) for name in agents], len(agents)
+
+
+@benchmark("generate_agents")
+def _generate_agents(population: int):
+    """Agent records for the whole colony (their agno Agent is built on first use)"""
+    pool = _simulation(10, actions=0).pool
+    return lambda: pool, lambda pool: pool.generate(population), population
+
+
+@benchmark("build_agent")
+def _build_agent(population: int):
+    """agno Agent of a colony member, built on its first decision"""
+    pool = _simulation(10, actions=0).pool
+    return lambda: pool.generate(20), lambda records: [record.agent for record in records], 20
+
+
+@benchmark("record_stats")
+def _record_stats(population: int):
+    """StatsRecorder.record, for `population` turns"""
+    from game.plots import StatsRecorder
+
+    rows = [(turn, population, turn % 97, turn % 31) for turn in range(1, population + 1)]
+
+    def run(recorder):
+        for row in rows:
+            recorder.record(*row)
+
+    return lambda: StatsRecorder(save_dir=tempfile.mkdtemp()), run, len(rows)
+
+
+@benchmark("save_game_stats")
+def _save_game_stats(population: int):
+    """Rendering the chart of a `population` turns game"""
+    from game.plots import StatsRecorder
+
+    directory = tempfile.mkdtemp()
+
+    def setup():
+        recorder = StatsRecorder(save_dir=directory, dpi=50)
+        for turn in range(1, population + 1):
+            recorder.record(turn, population, turn % 97, turn % 31)
+        return recorder
+
+    def run(recorder):
+        with contextlib.redirect_stdout(io.StringIO()):  # It reports every file it saves
+            recorder.render(final=True)
+
+    return setup, run, 1
+
+
+def measure(name: str, population: int, min_time: float = 0.2, max_repeats: int = 50) -> dict:
+    """Repeat a benchmark until `min_time` seconds are spent (at least 3 times), times per operation in seconds"""
+    setup, run, ops = BENCHMARKS[name](population)
+    times = []
+    spent = 0.0
+    while len(times) < 3 or (spent < min_time and len(times) < max_repeats):
+        context = setup()
+        gc.disable()  # Like timeit: collections triggered by earlier allocations are noise
+        try:
+            started = time.perf_counter()
+            run(context)
+            elapsed = time.perf_counter() - started
+        finally:
+            gc.enable()
+        times.append(elapsed / ops)
+        spent += elapsed
+    return {"best": min(times), "median": statistics.median(times), "ops": ops, "repeats": len(times)}
+
+
+def scaling(results: dict[str, dict]) -> Optional[float]:
+    """Slope of log(best time) over log(population) between the smallest and the largest size"""
+    sizes = sorted(results, key=int)
+    if len(sizes) < 2:
+        return None
+    first, last = sizes[0], sizes[-1]
+    return math.log(results[last]["best"] / results[first]["best"]) / math.log(int(last) / int(first))
+
+
+def run_suite(sizes=SIZES, names=None, progress: Callable[[str], None] = lambda line: None) -> dict:
+    results = {}
+    for name in names or BENCHMARKS:
+        results[name] = {}
+        for population in sizes:
+            results[name][str(population)] = measure(name, population)
+            progress(f"{name} @ {population}: {results[name][str(population)]['best'] * 1e6:.2f}µs/op")
+    return {
+        "version": VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "processor": platform.machine()},
+        "sizes": list(sizes),
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict) -> list[tuple[str, str, float, float, float]]:
+    """(benchmark, size, baseline, current, ratio) of the operations measured in both runs"""
+    rows = []
+    for name, sizes in baseline["results"].items():
+        for size, measured in sizes.items():
+            now = current["results"].get(name, {}).get(size)
+            if now is not None:
+                rows.append((name, size, measured["best"], now["best"], now["best"] / measured["best"]))
+    return rows
+
+
+def load(path) -> dict:
+    data = json.loads(Path(path).read_text())
+    if data.get("version") != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} benchmark file")
+    return data
+
+
+def _format(seconds: float) -> str:
+    return f"{seconds * 1e6:,.2f}µs" if seconds < 1e-3 else f"{seconds * 1e3:,.2f}ms"
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    from rich.console import Console
+    from rich.table import Table
+
+    parser = argparse.ArgumentParser(description="Benchmark the simulation hot paths")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="time the benchmarks and save them as a baseline")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    run_parser.add_argument("--only", nargs="+", choices=BENCHMARKS, help="benchmarks to run (all by default)")
+    run_parser.add_argument("--out", default="runs/bench.json")
+    compare_parser = commands.add_parser("compare", help="compare against a baseline, status 1 on regressions")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current", nargs="?", help="results to compare (default: time the current tree)")
+    compare_parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown, 0.25 for 25%%")
+    args = parser.parse_args()
+
+    console = Console()
+    progress = lambda line: console.print(line, style="dim")
+
+    if args.command == "run":
+        data = run_suite(args.sizes, args.only, progress)
+        table = Table("Benchmark", *map(str, args.sizes), "Scaling", title="Time per operation")
+        for name, results in data["results"].items():
+            exponent = scaling(results)
+            table.add_row(name, *(_format(results[str(size)]["best"]) for size in args.sizes),
+                          f"n^{exponent:.2f}" if exponent is not None else "")
+        console.print(table)
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(json.dumps(data, indent=1))
+        console.print(f"Saved to {args.out}")
+    else:
+        baseline = load(args.baseline)
+        if args.current:
+            current = load(args.current)
+        else:
+            current = run_suite([int(size) for size in baseline["sizes"]], list(baseline["results"]), progress)
+        table = Table("Benchmark", "Size", "Baseline", "Current", "Change", title=f"Against {args.baseline}")
+        regressions = 0
+        for name, size, before, after, ratio in compare(baseline, current):
+            style = "red" if ratio > 1 + args.threshold else "green" if ratio < 1 / (1 + args.threshold) else None
+            regressions += ratio > 1 + args.threshold
+            table.add_row(name, size, _format(before), _format(after), f"{ratio - 1:+.0%}", style=style)
+        console.print(table)
+        if baseline["machine"] != current["machine"]:
+            console.print(f"Measured on another machine: {baseline['machine']}", style="yellow")
+        console.print(f"{regressions} regression(s) over {args.threshold:.0%}", style="bold red" if regressions else "bold green")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,183 @@
+"""
+Checkpoints of a running game, to resume it after a crash or an interruption without replaying it.
+
+A checkpoint is taken between two turns and holds everything the next turns depend on: settings,
+resources, population, agent states, the RNG state, the chronicle, the recorded history and the
+conversation memory of the agents that were built. It is zlib-compressed JSON, written to a
+temporary file then moved over the previous checkpoint, so a crash mid-write leaves the last one intact.
+On resume, agents are rebuilt lazily as usual; a restored memory is handed to the agent when it is built.
+"""
+import json
+import os
+import weakref
+import zlib
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from game.agents import AgentRecord
+from game.status import AgentState, Immunity, Population
+
+if TYPE_CHECKING:
+    from agno.run.response import RunResponse
+
+VERSION = 1
+
+
+# Serialized runs by simulation and run id: a finished run never changes, so it is only serialized once
+_saved_runs = weakref.WeakKeyDictionary()
+
+
+def _run(run: "RunResponse") -> dict:
+    """What the agent's history is rebuilt from: the run's own messages, without the system prompt"""
+    messages = [message.to_dict() for message in run.messages or ()
+                if message.role != "system" and not message.from_history]
+    return {"run_id": run.run_id, "agent_id": run.agent_id, "session_id": run.session_id,
+            "status": run.status.value, "content": run.content, "messages": messages}
+
+
+def _memory(record: AgentRecord, saved_runs: dict) -> Optional[dict]:
+    """Ids and runs of a built agent's conversation memory"""
+    agent = record._agent
+    if agent is None:
+        return record.memory  # Restored but not rebuilt yet
+    runs = getattr(agent.memory, "runs", None)
+    if not isinstance(runs, dict) or not runs.get(agent.session_id):
+        return None
+    for run in runs[agent.session_id]:
+        if run.run_id not in saved_runs:
+            saved_runs[run.run_id] = _run(run)
+    return {"agent_id": agent.agent_id, "session_id": agent.session_id,
+            "runs": [saved_runs[run.run_id] for run in runs[agent.session_id]]}
+
+
+def snapshot(simulation) -> dict:
+    """Everything needed to continue a game from the current turn"""
+    state = simulation.state
+    chronicle = state.chronicle
+    version, internal, gauss = simulation.rng.getstate()
+    saved_runs = _saved_runs.setdefault(simulation, {})
+    memories = {record.name: memory for record in state.models if (memory := _memory(record, saved_runs))}
+    # Forget the runs dropped from the history windows since the last checkpoint
+    kept = {run["run_id"] for memory in memories.values() for run in memory["runs"]}
+    for run_id in saved_runs.keys() - kept:
+        del saved_runs[run_id]
+    return {
+        "version": VERSION,
+        "settings": {**simulation.settings(), "history_window": simulation.pool.history_window},
+        "turn": simulation.turn,
+        "food": state.food,
+        "knowledge": state.knowledge,
+        "next_agent_id": state.next_agent_id,
+        "starvation_immune": sorted(state.starvation_immune),
+        "agents": [record.agent_id for record in state.models],
+        "agent_states": {
+            name: [agent_state.title, dict(agent_state.action_counts), list(agent_state.recent_actions)]
+            for name, agent_state in state.agent_states.items()
+        },
+        "memories": memories,
+        "rng": [version, list(internal), gauss],
+        "history": simulation.history,
+        "chronicle": {"turn": chronicle.turn, "trend": list(chronicle.trend), "events": list(chronicle.events)},
+    }
+
+
+def save(simulation, path) -> int:
+    """Atomically write a checkpoint of the simulation, returns its size in bytes"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = zlib.compress(json.dumps(snapshot(simulation), separators=(",", ":")).encode(), 1)
+    temporary = path.with_name(path.name + ".tmp")
+    with open(temporary, "wb") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+    return len(data)
+
+
+def load(path) -> dict:
+    data = json.loads(zlib.decompress(Path(path).read_bytes()))
+    if data.get("version") != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} checkpoint")
+    return data
+
+
+def resume(path, model_factory=None, stats=None, replay_path=None, decision_cache=None, trace_path=None, scheduler=None,
+           events=None, backend=None):
+    """
+    Rebuild the Simulation saved in a checkpoint, ready to play its next turn. A replay log at
+    `replay_path` is cut back to the checkpoint's turn and continued; the trace is appended to.
+    The agents' model is served by `backend` (game.agents.ModelBackend) when given.
+    """
+    from game.balance import Balance
+    from game.replay import ReplayLog, TapedRandom, truncate_log
+    from game.simulation import Simulation
+    from game.trace import Tracer
+
+    data = load(path)
+    settings = data["settings"]
+    simulation = Simulation(
+        n_agents=0, food=settings["food"], seed=settings["seed"], balance=Balance(**settings["balance"]),
+        model_id=settings["model_id"], model_factory=model_factory, stats=stats, decision_cache=decision_cache,
+        history_window=settings["history_window"], scheduler=scheduler, events=events,
+        backend=backend, knowledge=settings.get("knowledge", 0),
+    )
+    simulation.n_agents = settings["n_agents"]
+    simulation.turn = data["turn"]
+    simulation.history = [tuple(row) for row in data["history"]]
+    if stats is not None:
+        stats.backfill(simulation.history)
+
+    state = simulation.state
+    state.food = data["food"]
+    state.knowledge = data["knowledge"]
+    state.next_agent_id = data["next_agent_id"]
+    state.starvation_immune = Immunity(data["starvation_immune"])
+    for name, (title, action_counts, recent_actions) in data["agent_states"].items():
+        agent_state = state.agent_states[name] = AgentState.from_counts(action_counts, recent_actions)
+        agent_state.title = title
+    records = [simulation.pool.create(agent_id) for agent_id in data["agents"]]
+    for record in records:
+        record.memory = data["memories"].get(record.name)
+    state.models = Population(records)
+
+    chronicle = state.chronicle
+    chronicle.turn = data["chronicle"]["turn"]
+    chronicle.trend.extend(tuple(point) for point in data["chronicle"]["trend"])
+    chronicle.events.extend(data["chronicle"]["events"])
+
+    if replay_path is not None:
+        truncate_log(replay_path, simulation.turn)
+        simulation.rng = state.rng = TapedRandom()
+        state.replay_log = ReplayLog(replay_path, simulation.settings(), append=True)
+    version, internal, gauss = data["rng"]
+    simulation.rng.setstate((version, tuple(internal), gauss))
+    if trace_path is not None:
+        state.tracer = Tracer(trace_path, append=True)
+    if events is not None:
+        events.turn = simulation.turn
+    return simulation
+
+
+def restored_memory(saved: dict) -> dict:
+    """Agent arguments giving a rebuilt agent the ids and conversation memory it had"""
+    from agno.memory.v2.memory import Memory
+    from agno.run.base import RunStatus
+    from agno.run.response import RunResponse
+
+    runs = [RunResponse.from_dict({**run, "status": RunStatus(run["status"])}) for run in saved["runs"]]
+    return {"agent_id": saved["agent_id"], "session_id": saved["session_id"],
+            "memory": Memory(runs={saved["session_id"]: runs})}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Show what a checkpoint holds")
+    parser.add_argument("checkpoint")
+    args = parser.parse_args()
+
+    data = load(args.checkpoint)
+    population, food, knowledge = data["history"][-1]
+    print(f"Turn {data['turn']}: {population} 👥, {food} 🍎, {knowledge} 🧠 (seed {data['settings']['seed']})")
+    print(f"{len(data['memories'])} agent memories, {os.path.getsize(args.checkpoint)} bytes")
@@ -0,0 +1,43 @@
+"""
+agno models sharing the process-wide HTTP clients. Imported by the model providers of game/agents.py
+the first time a model is built, so games that never call a model don't load agno, openai or httpx.
+"""
+from agno.models.openrouter import OpenRouter
+from agno.models.openai import OpenAIChat
+from dataclasses import dataclass
+from openai import AsyncOpenAI
+from typing import Optional
+import httpx
+
+
+class SharedAsyncClient:
+    """Reuses a shared async HTTP client instead of opening a new one per request"""
+
+    def get_async_client(self) -> AsyncOpenAI:
+        if self.async_http_client is None:
+            return super().get_async_client()
+        client_params = self._get_client_params()
+        client_params["http_client"] = self.async_http_client
+        return AsyncOpenAI(**client_params)
+
+
+@dataclass
+class SharedClientOpenAIChat(SharedAsyncClient, OpenAIChat):
+    async_http_client: Optional[httpx.AsyncClient] = None
+
+
+@dataclass
+class SharedClientOpenRouter(SharedAsyncClient, OpenRouter):
+    async_http_client: Optional[httpx.AsyncClient] = None
+
+
+# HTTP clients shared by every pool of the process, created on first use
+_http_clients = None
+
+
+def shared_http_clients() -> tuple[httpx.Client, httpx.AsyncClient]:
+    global _http_clients
+    if _http_clients is None:
+        limits = httpx.Limits(max_connections=1000, max_keepalive_connections=100)
+        _http_clients = (httpx.Client(limits=limits), httpx.AsyncClient(limits=limits))
+    return _http_clients
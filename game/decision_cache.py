@@ -0,0 +1,176 @@
+"""
+Opt-in cache of agent decisions, keyed on a normalized view of the situation an agent is in:
+bucketed food, knowledge and population, the agent's title and its last few actions, plus the
+model and instructions. Backed by SQLite with LRU eviction beyond `max_entries` and a TTL:
+expired entries are purged when the cache is opened and as new ones are stored.
+A share of the lookups (`fresh_rate`) always calls the model, refreshing the cached decision.
+A hit runs the cached tool call on the agent's record, without building its LLM-backed agent.
+"""
+import hashlib
+import json
+import random
+import sqlite3
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from tools.actions import ACTIONS, defer_action
+
+if TYPE_CHECKING:
+    from agno.run.response import RunResponse
+
+
+def log2_bucket(value: int) -> int:
+    """0 for nothing, then 1, 2-3, 4-7, 8-15, ..."""
+    return max(value, 0).bit_length()
+
+
+class DecisionCache:
+    def __init__(self, path="cache/decisions.sqlite", max_entries: int = 100_000, ttl: Optional[float] = 7 * 24 * 3600,
+                 fresh_rate: float = 0.1, history_length: int = 3, bucket=log2_bucket, seed: Optional[int] = None,
+                 max_recent: int = 10_000, clock=time.time):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.ttl = ttl  # Seconds, None to keep entries until evicted
+        self.fresh_rate = fresh_rate
+        self.bucket = bucket
+        self.rng = random.Random(seed)  # Own RNG, the game's one only serves the rules
+        self.history_length = history_length
+        self.max_recent = max_recent
+        self.clock = clock
+        # (game, agent name) -> its last tools, least recently used first: dead agents and ended games age out
+        self.recent = OrderedDict()
+        self.metrics = {"hits": 0, "misses": 0, "fresh": 0, "stores": 0, "evictions": 0, "expired": 0}
+        self._instructions = {}  # Digest of the instructions, by pool
+
+        if self.path != Path(":memory:"):
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS decisions "
+            "(key TEXT PRIMARY KEY, tool TEXT, args TEXT, content TEXT, created REAL, used REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS decisions_used ON decisions (used)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS decisions_created ON decisions (created)")
+        self._size = self._db.execute("SELECT COUNT(*) FROM decisions").fetchone()[0]
+        self.purge()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _recent(self, game_state, name: str) -> deque:
+        """Last tools of an agent"""
+        agent = (id(game_state), name)
+        tools = self.recent.get(agent)
+        if tools is None:
+            tools = self.recent[agent] = deque(maxlen=self.history_length)
+            if len(self.recent) > self.max_recent:
+                self.recent.popitem(last=False)
+        else:
+            self.recent.move_to_end(agent)
+        return tools
+
+    def key(self, game_state, model) -> str:
+        """Normalized situation of an agent about to decide"""
+        pool = model.pool
+        if id(pool) not in self._instructions:
+            self._instructions[id(pool)] = hashlib.blake2b(pool.instructions.encode(), digest_size=8).hexdigest()
+        situation = (
+            pool.model_id, self._instructions[id(pool)],
+            self.bucket(game_state.food), self.bucket(game_state.knowledge), self.bucket(game_state.population),
+            game_state.get_agent_title(model.name), model.name in game_state.starvation_immune,
+            tuple(self._recent(game_state, model.name)),
+        )
+        return hashlib.blake2b(repr(situation).encode(), digest_size=16).hexdigest()
+
+    def purge(self, now: Optional[float] = None) -> int:
+        """Delete the expired entries, returns how many there were"""
+        if self.ttl is None:
+            return 0
+        expired = self._db.execute("DELETE FROM decisions WHERE created < ?",
+                                   ((self.clock() if now is None else now) - self.ttl,)).rowcount
+        self._size -= expired
+        self.metrics["expired"] += expired
+        return expired
+
+    def get(self, key: str) -> Optional[tuple[str, dict, str]]:
+        """Cached (tool, arguments, content), None on a miss or when the entry has expired"""
+        row = self._db.execute("SELECT tool, args, content, created FROM decisions WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        now = self.clock()
+        tool, args, content, created = row
+        if self.ttl is not None and now - created > self.ttl:
+            self._db.execute("DELETE FROM decisions WHERE key = ?", (key,))
+            self._size -= 1
+            self.metrics["expired"] += 1
+            return None
+        self._db.execute("UPDATE decisions SET used = ? WHERE key = ?", (now, key))
+        return tool, json.loads(args), content
+
+    def put(self, key: str, tool: str, arguments: dict, content: str):
+        now = self.clock()
+        self.purge(now)
+        existed = self._db.execute("SELECT 1 FROM decisions WHERE key = ?", (key,)).fetchone() is not None
+        self._db.execute("INSERT OR REPLACE INTO decisions VALUES (?, ?, ?, ?, ?, ?)",
+                         (key, tool, json.dumps(arguments), content, now, now))
+        self._size += not existed
+        self.metrics["stores"] += 1
+        if self._size > self.max_entries:
+            excess = self._size - self.max_entries
+            self._db.execute("DELETE FROM decisions WHERE key IN (SELECT key FROM decisions ORDER BY used LIMIT ?)",
+                             (excess,))
+            self._size -= excess
+            self.metrics["evictions"] += excess
+
+    def lookup(self, game_state, model) -> tuple[str, Optional["RunResponse"]]:
+        """
+        Key of the agent's situation and, on a hit, a response replaying the cached decision: its tool call
+        is run (or queued during a concurrent turn) like the model's own would be.
+        """
+        key = self.key(game_state, model)
+        if self.rng.random() < self.fresh_rate:
+            self.metrics["fresh"] += 1
+            return key, None
+        cached = self.get(key)
+        if cached is None:
+            self.metrics["misses"] += 1
+            return key, None
+
+        from agno.models.response import ToolExecution
+        from agno.run.response import RunResponse
+
+        self.metrics["hits"] += 1
+        tool, arguments, content = cached
+        if tool == "kill_agent":
+            # The cached target may be dead or the agent itself: aim at someone alive instead
+            targets = [name for name in game_state.models.names() if name != model.name]
+            if not targets:
+                tool, arguments = "do_nothing", {}
+            elif arguments.get("agent_name") not in targets:
+                arguments = {"agent_name": self.rng.choice(targets)}
+
+        # The record stands in for its agent: tools only read its name and session state
+        result = defer_action(model, tool, lambda **kwargs: ACTIONS[tool](agent=model, **kwargs), arguments)
+        self._recent(game_state, model.name).append(tool)
+        return key, RunResponse(content=content, tools=[ToolExecution(tool_name=tool, tool_args=arguments, result=result)])
+
+    def remember(self, key: str, game_state, model, response: "RunResponse"):
+        """Store the decision of a model response, if it called a tool"""
+        if not response.tools:
+            return
+        tool = response.tools[0]
+        if tool.tool_name not in ACTIONS:
+            return
+        self.put(key, tool.tool_name, tool.tool_args or {}, response.content or "")
+        self._recent(game_state, model.name).append(tool.tool_name)
+
+    def hit_rate(self) -> float:
+        lookups = self.metrics["hits"] + self.metrics["misses"] + self.metrics["fresh"]
+        return self.metrics["hits"] / lookups if lookups else 0.0
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,374 @@
+"""
+In-process event bus of a game. The game emits structured events (an agent's decision and action,
+failed decisions, deaths, births, resource decay, turn start and end) and subscribers consume them on a background
+thread, so rendering and I/O stay off the simulation's path:
+- ConsoleLog prints the scrolling log of the game,
+- LiveView keeps a rich Live dashboard of the colony in place,
+- JsonlSink writes every event to a JSON-lines file,
+- DashboardServer serves a live chart over HTTP, fed by server-sent events.
+Emitting never blocks: the queue is bounded and events that do not fit are dropped and counted.
+"""
+import json
+import queue
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Optional
+
+from rich.console import Console, Group
+from rich.live import Live
+from rich.panel import Panel
+from rich.table import Table
+
+_STOP = object()
+
+
+class EventBus:
+    def __init__(self, max_queue: int = 10_000):
+        self.turn = 0  # Stamped on every event, kept up to date by the Simulation
+        self.subscribers: list[Callable[[dict], None]] = []
+        self.emitted = 0
+        self.delivered = 0
+        self.dropped: dict[str, int] = {}  # Events that did not fit in the queue, by kind
+        self.failed: dict[str, int] = {}  # Subscriber errors, by subscriber
+        self._queue = queue.Queue(max_queue)
+        self._thread = None
+        self._closed = False
+
+    def __repr__(self) -> str:
+        return f"EventBus(subscribers={len(self.subscribers)}, queued={self._queue.qsize()}, dropped={sum(self.dropped.values())})"
+
+    def subscribe(self, subscriber: Callable[[dict], None]):
+        """Call `subscriber(event)` for every event from now on; its close() (if any) is called by close()"""
+        self.subscribers.append(subscriber)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._drain, name="event-bus", daemon=True)
+            self._thread.start()
+        return subscriber
+
+    def emit(self, kind: str, **fields):
+        if self._closed or not self.subscribers:
+            return
+        try:
+            self._queue.put_nowait({"event": kind, "turn": self.turn, "time": round(time.time(), 3), **fields})
+            self.emitted += 1
+        except queue.Full:
+            self.dropped[kind] = self.dropped.get(kind, 0) + 1
+
+    def _drain(self):
+        while True:
+            event = self._queue.get()
+            if event is _STOP:
+                self._queue.task_done()
+                return
+            for subscriber in self.subscribers:
+                try:
+                    subscriber(event)
+                except Exception:
+                    name = type(subscriber).__name__
+                    self.failed[name] = self.failed.get(name, 0) + 1
+            self.delivered += 1
+            self._queue.task_done()
+
+    def flush(self):
+        """Wait until every queued event has been delivered"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        """Deliver the queued events, then close the subscribers"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+        for subscriber in self.subscribers:
+            if hasattr(subscriber, "close"):
+                subscriber.close()
+
+    def summary(self) -> dict:
+        return {"emitted": self.emitted, "delivered": self.delivered, "dropped": dict(self.dropped),
+                "failed": dict(self.failed)}
+
+
+def _resources(event: dict) -> str:
+    return f"{event['population']} 👥, {event['food']} 🍎, {event['knowledge']} 🧠"
+
+
+class ConsoleLog:
+    """The scrolling log of the game: decisions, actions and the end of each turn"""
+
+    def __init__(self, console: Optional[Console] = None):
+        self.console = console or Console()
+
+    def __call__(self, event: dict):
+        kind, print = event["event"], self.console.print
+        if kind == "turn_start":
+            print(f"\n======== Turn {event['turn']} ========", style="bold green")
+        elif kind == "decision" and event.get("mode"):
+            # Decisions collected during a concurrent or batched turn, their actions are applied afterwards
+            if event["content"]:
+                print(f"{event['agent']}: \"", event["content"], "\"", style="dim")
+        elif kind == "decision":
+            if event["content"]:
+                print("\"", event["content"], "\"", style="dim")
+            if event["tool"]:
+                print("Tool: ", event["tool"], style="cyan")
+            else:
+                print(f"{event['agent']} did not call any tool.", style="bold red")
+        elif kind == "action":
+            print(event["message"])
+        elif kind in ("decision_error", "batch_error"):
+            print(event["message"], style="bold red")
+        elif kind == "batch_fallback":
+            print(event["message"], style="yellow")
+        elif kind == "lost_action":
+            print(f"{event['agent']} -> {event['action']}: Agent died before acting.", style="cyan")
+        elif kind == "turn_end":
+            if event["natural_deaths"] > 0:
+                print(f"💀 {event['natural_deaths']} models died of natural death.", style="bold yellow")
+            if event["starved"] > 0:
+                print(f"💀 Starvation! {event['starved']} models died.", style="bold yellow")
+            if event["immune"] > 0:
+                print(f"{event['immune']} models survived starvation due to immunity from stealing food!")
+            print(f"Game state: {_resources(event)}", style="bold blue")
+            if event["population"] == 1:
+                print("The colony has perished! Only one survivor is left. Game over.", style="bold red")
+            elif event["population"] == 0:
+                print("All agents have died! Game over.", style="bold red")
+
+
+class LiveView:
+    """rich Live dashboard: resources and their trend, titles, recent actions and deaths"""
+
+    SPARKS = "▁▂▃▄▅▆▇█"
+
+    def __init__(self, console: Optional[Console] = None, bus: Optional[EventBus] = None, width: int = 60,
+                 recent: int = 12, refresh_per_second: float = 4):
+        self.bus = bus
+        self.width = width
+        self.state = {"turn": 0, "population": 0, "food": 0, "knowledge": 0}
+        self.trend = {name: deque(maxlen=width) for name in ("population", "food", "knowledge")}
+        self.titles: dict[str, int] = {}
+        self.recent = deque(maxlen=recent)
+        self.counts = {"actions": 0, "births": 0, "deaths": 0}
+        self._lock = threading.Lock()
+        self.live = Live(get_renderable=self.render, console=console, refresh_per_second=refresh_per_second)
+        self.live.start()
+
+    def __call__(self, event: dict):
+        kind = event["event"]
+        with self._lock:
+            self.state["turn"] = event["turn"]
+            if "population" in event:
+                self.state.update(population=event["population"], food=event["food"], knowledge=event["knowledge"])
+            if kind == "action":
+                self.counts["actions"] += 1
+                self.recent.append(event["message"])
+            elif kind in ("decision_error", "batch_error", "batch_fallback"):
+                self.recent.append(event["message"])
+            elif kind == "birth":
+                self.counts["births"] += len(event["agents"])
+            elif kind == "death":
+                self.counts["deaths"] += len(event["agents"])
+                if event["cause"] != "killed":  # Kills are already in the actions
+                    self.recent.append(f"💀 {len(event['agents'])} died of {event['cause']}")
+            elif kind == "turn_end":
+                for name in self.trend:
+                    self.trend[name].append(event[name])
+                self.titles = event["titles"]
+
+    def _spark(self, values) -> str:
+        if not values:
+            return ""
+        low, high = min(values), max(values)
+        scale = (len(self.SPARKS) - 1) / (high - low) if high > low else 0
+        return "".join(self.SPARKS[int((value - low) * scale)] for value in values)
+
+    def render(self):
+        with self._lock:
+            state = self.state
+            resources = Table.grid(padding=(0, 2))
+            for name, icon in (("population", "👥"), ("food", "🍎"), ("knowledge", "🧠")):
+                resources.add_row(f"{icon} {name}", str(state[name]), self._spark(self.trend[name]))
+            titles = Table("Title", "Agents", box=None)
+            for title, count in sorted(self.titles.items(), key=lambda item: -item[1]):
+                titles.add_row(title, str(count))
+            counts = ", ".join(f"{count} {name}" for name, count in self.counts.items())
+            if self.bus is not None and self.bus.dropped:
+                counts += f", {sum(self.bus.dropped.values())} events dropped"
+            return Panel(Group(resources, "", titles, "", *self.recent, "", counts),
+                         title=f"Turn {state['turn']}", border_style="green")
+
+    def close(self):
+        self.live.stop()
+
+
+class JsonlSink:
+    """Every event as one line of JSON, flushed at the end of each turn"""
+
+    def __init__(self, path, append: bool = False):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a" if append else "w", encoding="utf-8")
+
+    def __call__(self, event: dict):
+        self._file.write(json.dumps(event, separators=(",", ":")) + "\n")
+        if event["event"] == "turn_end":
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Colony</title>
+<style>body{font-family:sans-serif;margin:2em}#log{font-size:13px;color:#444;white-space:pre}</style></head>
+<body><h2 id="title">Waiting for the first turn...</h2>
+<canvas id="chart" width="900" height="360"></canvas><div id="log"></div>
+<script>
+const series = {population: "#2E86AB", food: "#A23B72", knowledge: "#F18F01"};
+const points = [], log = [];
+const canvas = document.getElementById("chart"), ctx = canvas.getContext("2d");
+function draw() {
+  ctx.clearRect(0, 0, canvas.width, canvas.height);
+  if (!points.length) return;
+  const high = Math.max(1, ...points.flatMap(p => Object.keys(series).map(name => p[name])));
+  const x = i => 40 + i * (canvas.width - 60) / Math.max(1, points.length - 1);
+  const y = v => canvas.height - 20 - v * (canvas.height - 40) / high;
+  ctx.fillStyle = "#888"; ctx.fillText(high, 5, 20); ctx.fillText(0, 5, canvas.height - 20);
+  for (const [name, color] of Object.entries(series)) {
+    ctx.strokeStyle = color; ctx.beginPath();
+    points.forEach((p, i) => i ? ctx.lineTo(x(i), y(p[name])) : ctx.moveTo(x(i), y(p[name])));
+    ctx.stroke(); ctx.fillStyle = color; ctx.fillText(name, canvas.width - 90, 20 + 14 * Object.keys(series).indexOf(name));
+  }
+}
+const source = new EventSource("/events");
+source.onmessage = message => {
+  const event = JSON.parse(message.data);
+  if (event.event === "turn_end") {
+    points.push(event);
+    document.getElementById("title").textContent =
+      `Turn ${event.turn}: ${event.population} agents, ${event.food} food, ${event.knowledge} knowledge`;
+    draw();
+  } else {
+    log.unshift(`turn ${event.turn}: ${event.agents.length} ${event.event === "birth" ? "born" : event.cause}`);
+    log.length = Math.min(log.length, 15);
+    document.getElementById("log").textContent = log.join("\\n");
+  }
+};
+</script></body></html>
+"""
+
+
+class DashboardServer(ThreadingHTTPServer):
+    """
+    Live chart of the colony at http://127.0.0.1:<port>/, pushed over server-sent events (/events).
+    Turn ends are kept and sent to every new client first; a slow client drops events rather than
+    slowing the bus down.
+    """
+    daemon_threads = True
+    STREAMED = {"turn_end", "birth", "death"}
+
+    def __init__(self, address=("127.0.0.1", 8050), client_queue: int = 1000):
+        super().__init__(address, DashboardHandler)
+        self.client_queue = client_queue
+        self.turns = []  # Serialized turn_end events
+        self.clients: set[queue.Queue] = set()
+        self.dropped = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def __call__(self, event: dict):
+        if event["event"] not in self.STREAMED:
+            return
+        data = json.dumps(event, separators=(",", ":"))
+        with self.lock:
+            if event["event"] == "turn_end":
+                self.turns.append(data)
+            for client in self.clients:
+                try:
+                    client.put_nowait(data)
+                except queue.Full:
+                    self.dropped += 1
+
+    def connect(self) -> tuple[queue.Queue, list[str]]:
+        """A new client's queue, with the turns played so far"""
+        client = queue.Queue(self.client_queue)
+        with self.lock:
+            self.clients.add(client)
+            return client, list(self.turns)
+
+    def disconnect(self, client: queue.Queue):
+        with self.lock:
+            self.clients.discard(client)
+
+    def close(self):
+        with self.lock:
+            for client in self.clients:
+                try:
+                    client.put_nowait(None)
+                except queue.Full:
+                    pass
+        self.shutdown()
+        self.server_close()
+
+
+class DashboardHandler(BaseHTTPRequestHandler):
+    server: DashboardServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/":
+            data = PAGE.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        elif self.path == "/events":
+            self._stream()
+        else:
+            self.send_error(404)
+
+    def _stream(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        client, turns = self.server.connect()
+        try:
+            for data in turns:
+                self.wfile.write(f"data: {data}\n\n".encode())
+            self.wfile.flush()
+            while True:
+                try:
+                    data = client.get(timeout=15)
+                except queue.Empty:
+                    self.wfile.write(b": keep-alive\n\n")  # Comment line, detects closed connections
+                    self.wfile.flush()
+                    continue
+                if data is None:
+                    return
+                self.wfile.write(f"data: {data}\n\n".encode())
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.server.disconnect(client)
+
+
+def start_dashboard(port: int = 8050, **kwargs) -> DashboardServer:
+    """Serve the live chart in a background thread"""
+    server = DashboardServer(("127.0.0.1", port), **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
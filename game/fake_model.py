@@ -0,0 +1,152 @@
+import asyncio
+import itertools
+import json
+import random
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Iterator, Optional
+
+from agno.models.base import Model
+from agno.models.message import Message
+from agno.models.response import ModelResponse
+
+# Actions the fake model can pick from, matching the tools in tools/actions.py
+ACTIONS = ["add_food", "add_knowledge", "kill_agent", "do_nothing", "reproduce", "steal_food"]
+
+
+def _targets(prompt: str) -> list[str]:
+    return re.findall(r'"([^"]+)"', prompt.split("Available targets:", 1)[-1].split("\n", 1)[0])
+
+
+def random_policy(prompt: str, choose: Optional[Callable[[], str]] = None, rng=random) -> tuple[str, dict]:
+    """
+    Pick a random action (with `choose`, uniformly by default), choosing a kill target from the prompt's
+    target list. Every draw goes through `rng`, a random.Random or the random module itself.
+    """
+    action = choose() if choose is not None else rng.choice(ACTIONS)
+    if action == "kill_agent":
+        targets = _targets(prompt)
+        if not targets:
+            return "do_nothing", {}
+        return action, {"agent_name": rng.choice(targets)}
+    return action, {}
+
+
+def random_batch_policy(prompt: str, malformed_rate: float = 0.0, choose: Optional[Callable[[], str]] = None,
+                        rng=random) -> str:
+    """
+    JSON list of random decisions for the players of a batched prompt. With `malformed_rate`,
+    that share of the entries is dropped or broken, to exercise the per-agent fallback.
+    """
+    choose = choose or (lambda: rng.choice(ACTIONS))
+    players = re.findall(r'^\s*- "([^"]+)":', prompt.split("Decide for these players:", 1)[-1], re.MULTILINE)
+    targets = _targets(prompt)
+    decisions = []
+    for player in players:
+        action = choose()
+        arguments = {}
+        if action == "kill_agent":
+            others = [target for target in targets if target != player]
+            if others:
+                arguments = {"agent_name": rng.choice(others)}
+            else:
+                action = "do_nothing"
+        if rng.random() < malformed_rate:
+            if rng.random() < 0.5:
+                continue  # Forgotten player
+            action = "dance"  # Invented tool
+        decisions.append({"agent": player, "tool": action, "arguments": arguments})
+    return json.dumps(decisions)
+
+
+def weighted_policies(weights: dict[str, float], seed: Optional[int] = None,
+                      rng: Optional[random.Random] = None) -> tuple[Callable[[str], tuple[str, dict]], Callable[[str], str]]:
+    """
+    Policy and batch policy picking actions with the given relative probabilities, e.g. {"add_food": 3, "steal_food": 1}.
+    Both draw from `rng`, by default their own random.Random(seed), so a seeded pair answers the same prompts the same way.
+    """
+    unknown = set(weights) - set(ACTIONS)
+    if unknown:
+        raise ValueError(f"Unknown actions: {', '.join(sorted(unknown))}")
+    rng = rng or random.Random(seed)
+    actions, cum_weights = list(weights), list(itertools.accumulate(weights.values()))
+    choose = lambda: rng.choices(actions, cum_weights=cum_weights)[0]
+    return ((lambda prompt: random_policy(prompt, choose, rng)),
+            (lambda prompt: random_batch_policy(prompt, choose=choose, rng=rng)))
+
+
+# Named action mixes, for the stub server's command line
+POLICIES = {
+    "random": dict.fromkeys(ACTIONS, 1),
+    "peaceful": {"add_food": 3, "add_knowledge": 2, "reproduce": 1, "do_nothing": 1},
+    "greedy": {"add_food": 2, "steal_food": 3, "reproduce": 1},
+    "violent": {"kill_agent": 3, "steal_food": 1, "add_food": 1, "reproduce": 1},
+}
+
+
+def fake_reply(last_role: str, prompt: str, policy=None, batch_policy=None, rng=random) -> dict[str, Any]:
+    """Assistant message answering a conversation whose last message has `last_role` and last user message `prompt`"""
+    # After the tool result comes back, just close the run with a short comment
+    if last_role == "tool":
+        return {"content": "Done."}
+    if "Decide for these players:" in prompt:
+        return {"content": (batch_policy or random_batch_policy)(prompt)}
+
+    action, arguments = (policy or random_policy)(prompt)
+    return {
+        "content": f"I choose {action}.",
+        "tool_calls": [{
+            "id": f"call_{rng.getrandbits(48):012x}",
+            "type": "function",
+            "function": {"name": action, "arguments": json.dumps(arguments)},
+        }],
+    }
+
+
+@dataclass
+class FakeModel(Model):
+    """
+    Local stand-in for an LLM: waits `latency` seconds, then calls one tool picked by `policy`.
+    Used to exercise the turn loop (and its concurrency) without network access.
+    """
+
+    id: str = "fake-model"
+    name: str = "FakeModel"
+    provider: str = "Fake"
+    latency: float = 0.5
+    policy: Optional[Callable[[str], tuple[str, dict]]] = None
+    batch_policy: Optional[Callable[[str], str]] = None  # Reply to batched decision prompts
+
+    def _reply(self, messages: list[Message]) -> dict[str, Any]:
+        reply = self._decide(messages)
+        # Rough token usage (4 characters per token), so traces show realistic growth
+        prompt_chars = sum(len(m.get_content_string() or "") for m in messages)
+        completion_chars = len(reply.get("content") or "") + len(json.dumps(reply.get("tool_calls", [])))
+        reply["usage"] = {"prompt_tokens": prompt_chars // 4, "completion_tokens": completion_chars // 4}
+        return reply
+
+    def _decide(self, messages: list[Message]) -> dict[str, Any]:
+        prompt = next((m.get_content_string() for m in reversed(messages) if m.role == "user"), "")
+        return fake_reply(messages[-1].role if messages else "user", prompt, self.policy, self.batch_policy)
+
+    def invoke(self, messages: list[Message], **kwargs) -> dict[str, Any]:
+        time.sleep(self.latency)
+        return self._reply(messages)
+
+    async def ainvoke(self, messages: list[Message], **kwargs) -> dict[str, Any]:
+        await asyncio.sleep(self.latency)
+        return self._reply(messages)
+
+    def invoke_stream(self, messages: list[Message], **kwargs) -> Iterator[dict[str, Any]]:
+        yield self.invoke(messages)
+
+    async def ainvoke_stream(self, messages: list[Message], **kwargs) -> AsyncIterator[dict[str, Any]]:
+        yield await self.ainvoke(messages)
+
+    def parse_provider_response(self, response: dict[str, Any], **kwargs) -> ModelResponse:
+        return ModelResponse(role="assistant", content=response.get("content"), tool_calls=response.get("tool_calls", []),
+                             response_usage=response.get("usage"))
+
+    def parse_provider_response_delta(self, response: dict[str, Any]) -> ModelResponse:
+        return self.parse_provider_response(response)
@@ -0,0 +1,209 @@
+"""
+Headless simulation: the colony rules of game/rules.py driven by scripted policies instead of LLM calls.
+Runs offline and fast, to tune balance parameters and regression-test rule changes.
+"""
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from game import rules
+from game.balance import Balance, DEFAULT_BALANCE
+from game.status import GameState
+
+ACTION_NAMES = list(rules.ACTIONS)
+
+
+class HeadlessAgent:
+    """Colony member without any LLM behind it"""
+    __slots__ = ("agent_id", "name")
+
+    def __init__(self, agent_id: int):
+        self.agent_id = agent_id
+        self.name = f"Agent {agent_id}"
+
+    def __repr__(self) -> str:
+        return f"HeadlessAgent({self.name!r})"
+
+
+# A policy picks the action of an agent: (tool name, tool arguments)
+Policy = Callable[[GameState, HeadlessAgent, random.Random], tuple[str, dict]]
+
+
+def random_target(state: GameState, agent: HeadlessAgent, rng: random.Random) -> Optional[str]:
+    """Name of a random agent other than `agent`, None if it is alone"""
+    members = state.models
+    count = len(members)
+    if count < 2:
+        return None
+    while True:
+        target = members.member(int(rng.random() * count))
+        if target is not agent:
+            return target.name
+
+
+def _with_arguments(action: str, state: GameState, agent: HeadlessAgent, rng: random.Random) -> tuple[str, dict]:
+    if action != "kill_agent":
+        return action, {}
+    target = random_target(state, agent, rng)
+    return ("kill_agent", {"agent_name": target}) if target else ("do_nothing", {})
+
+
+def random_policy(state: GameState, agent: HeadlessAgent, rng: random.Random) -> tuple[str, dict]:
+    """Every action is equally likely"""
+    return _with_arguments(ACTION_NAMES[int(rng.random() * len(ACTION_NAMES))], state, agent, rng)
+
+
+def greedy_food_policy(state: GameState, agent: HeadlessAgent, rng: random.Random) -> tuple[str, dict]:
+    """Gather food until there is enough for two turns, then research"""
+    if state.food < state.population * 2:
+        return "add_food", {}
+    return "add_knowledge", {}
+
+
+def thief_policy(state: GameState, agent: HeadlessAgent, rng: random.Random) -> tuple[str, dict]:
+    """Steal whenever there is food, gather it otherwise"""
+    return ("steal_food", {}) if state.food > 0 else ("add_food", {})
+
+
+def weighted_policy(weights: dict[str, float]) -> Policy:
+    """Policy picking actions with the given relative probabilities, e.g. {"add_food": 0.6, "steal_food": 0.4}"""
+    actions = list(weights)
+    cum_weights = []
+    total = 0.0
+    for action in actions:
+        total += weights[action]
+        cum_weights.append(total)
+
+    def policy(state: GameState, agent: HeadlessAgent, rng: random.Random) -> tuple[str, dict]:
+        action = rng.choices(actions, cum_weights=cum_weights)[0]
+        return _with_arguments(action, state, agent, rng)
+
+    return policy
+
+
+def mixed_policy(policies: dict[Policy, float]) -> Policy:
+    """Policy delegating each decision to one of `policies`, picked with the given relative probabilities"""
+    options = list(policies)
+    weights = list(policies.values())
+
+    def policy(state: GameState, agent: HeadlessAgent, rng: random.Random) -> tuple[str, dict]:
+        return rng.choices(options, weights=weights)[0](state, agent, rng)
+
+    return policy
+
+
+# Named fixed action weights; the batch simulator (game/batch.py) can only play these
+WEIGHTS = {
+    "random": dict.fromkeys(ACTION_NAMES, 1.0),
+    "cooperative": {"add_food": 0.55, "add_knowledge": 0.3, "reproduce": 0.15},
+    "steal_heavy": {"steal_food": 0.5, "add_food": 0.3, "reproduce": 0.1, "kill_agent": 0.1},
+}
+
+# Named policies, for the command line, sweeps and scenarios
+POLICIES = {
+    "random": random_policy,  # Same distribution as WEIGHTS["random"]
+    "cooperative": weighted_policy(WEIGHTS["cooperative"]),
+    "steal_heavy": weighted_policy(WEIGHTS["steal_heavy"]),
+    "greedy_food": greedy_food_policy,
+    "thief": thief_policy,
+    "thief_heavy": mixed_policy({thief_policy: 0.6, random_policy: 0.4}),
+}
+
+
+@dataclass
+class GameResult:
+    seed: Optional[int]
+    turns_played: int
+    population: int
+    food: int
+    knowledge: int
+    history: list[tuple[int, int, int]] = field(default_factory=list)  # (population, food, knowledge) per turn, from turn 0
+
+    @property
+    def survived(self) -> bool:
+        return self.population > 1
+
+
+def play_actions(state: GameState, policy: Policy, rng: random.Random):
+    """The acting phase of a turn: every agent acts in order, agents killed earlier in the turn lose their action"""
+    actions = rules.ACTIONS
+    for agent in state.models.snapshot():
+        if agent not in state.models:
+            continue
+        action, arguments = policy(state, agent, rng)
+        outcome = actions[action](state, agent.name, rng, **arguments)
+        if action == "reproduce":
+            state.models.extend(HeadlessAgent(agent_id) for agent_id in state.allocate_agent_ids(outcome))
+        if state.population <= 1:
+            break
+
+
+def run_game(policy: Policy = random_policy, turns: int = 100, n_agents: int = 10, food: int = 10,
+             seed: Optional[int] = None, record_history: bool = True, balance: Balance = DEFAULT_BALANCE,
+             recorder=None, knowledge: int = 0) -> GameResult:
+    """
+    Play a full game with the same turn structure as the sequential LLM game (Simulation.run_sequential_turn):
+    agents act in order (agents killed earlier in the turn lose their action), then natural deaths, decay and starvation. The game ends
+    when at most one agent is left. A game.store.RunRecorder, if given, records every counted action and every turn.
+    """
+    rng = random.Random(seed)
+    state = GameState(food=food, knowledge=knowledge, rng=rng, balance=balance, recorder=recorder)
+    state.models.extend(HeadlessAgent(agent_id) for agent_id in state.allocate_agent_ids(n_agents))
+
+    history = [(state.population, state.food, state.knowledge)] if record_history else []
+    turn = 0
+    while turn < turns and state.population > 1:
+        turn += 1
+        play_actions(state, policy, rng)
+
+        if record_history:
+            history.append((state.population, state.food, state.knowledge))
+        state.end_turn()
+        if recorder is not None:
+            recorder.end_turn(turn, state.population, state.food, state.knowledge, state.title_counts())
+
+    if recorder is not None:
+        recorder.finish(turn, state.population, state.food, state.knowledge)
+    return GameResult(seed, turn, state.population, state.food, state.knowledge, history)
+
+
+def run_games(n_games: int, policy: Policy = random_policy, seed: int = 0, **kwargs) -> list[GameResult]:
+    """Play `n_games` games seeded seed, seed + 1, ..."""
+    return [run_game(policy, seed=seed + i, **kwargs) for i in range(n_games)]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run headless colony games with a scripted policy")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--agents", type=int, default=10)
+    parser.add_argument("--food", type=int, default=10)
+    parser.add_argument("--policy", choices=POLICIES, default="random")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--store", metavar="PATH", help="record every game into a run store (game/store.py)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.store:
+        from game.store import RunRecorder, RunStore
+
+        store = RunStore(args.store)
+        results = []
+        for seed in range(args.seed, args.seed + args.games):
+            recorder = RunRecorder(seed, args.agents, args.food, args.turns, "headless", params={"policy": args.policy})
+            results.append(run_game(POLICIES[args.policy], turns=args.turns, n_agents=args.agents, food=args.food,
+                                    seed=seed, record_history=False, recorder=recorder))
+            store.add(recorder)
+        store.close()
+    else:
+        results = run_games(args.games, POLICIES[args.policy], seed=args.seed, turns=args.turns,
+                            n_agents=args.agents, food=args.food, record_history=False)
+    elapsed = time.perf_counter() - start
+
+    survived = sum(result.survived for result in results)
+    mean_turns = sum(result.turns_played for result in results) / len(results)
+    print(f"{args.games} games in {elapsed:.2f}s ({args.games / elapsed:.0f} games/s)")
+    print(f"Survived {args.turns} turns: {survived / len(results):.1%}, mean turns played: {mean_turns:.1f}")
@@ -0,0 +1,67 @@
+"""
+Bounded memory for long-lived colony agents. The agno transcript only keeps a sliding window of
+recent runs (see AgentPool); what happened before is carried by a compact, structured summary that
+is updated incrementally as the game goes, so the prompt size stays flat however long an agent lives.
+"""
+from collections import deque
+
+
+def agent_record(state, agent_name: str) -> str:
+    """An agent's title, action counts and last actions (all kept incrementally by its AgentState)"""
+    agent_state = state.agent_states.get(agent_name)
+    if agent_state is None or not agent_state.total:
+        return "Newcomer, no actions yet"
+    counts = ", ".join(f"{action} {count}" for action, count in sorted(agent_state.action_counts.items()))
+    return f"{agent_state.title}; {counts}; last: {', '.join(agent_state.recent_actions)}"
+
+
+class Chronicle:
+    """
+    Running summary of a game: resource trend over the last turns and notable events (kills,
+    starvation, natural deaths). Each agent's prompt gets it along with the agent's own record.
+    """
+
+    def __init__(self, trend_length: int = 5, max_events: int = 6):
+        self.turn = 0
+        self.trend = deque(maxlen=trend_length)  # (turn, population, food, knowledge) at the end of each turn
+        self.events = deque(maxlen=max_events)  # Most recent notable events, oldest first
+        self._colony_summary = None  # Rendered trend and events, until they change
+
+    def _changed(self):
+        self._colony_summary = None
+
+    def kill(self, killer: str, target: str):
+        self.events.append(f"turn {self.turn}: {killer} killed {target}")
+        self._changed()
+
+    def end_turn(self, state, outcome: dict):
+        """Add the end-of-turn deaths and the resulting resources"""
+        deaths = []
+        if outcome.get("starved"):
+            deaths.append(f"{outcome['starved']} starved")
+        if outcome.get("natural_deaths"):
+            deaths.append(f"{outcome['natural_deaths']} died of natural death")
+        if deaths:
+            self.events.append(f"turn {self.turn}: " + ", ".join(deaths))
+        self.trend.append((self.turn, state.population, state.food, state.knowledge))
+        self._changed()
+
+    def colony_summary(self) -> str:
+        if self._colony_summary is None:
+            lines = []
+            if self.trend:
+                (first, *start), (last, *end) = self.trend[0], self.trend[-1]
+                changes = ", ".join(f"{name} {a} -> {b}" for name, a, b in zip(("population", "food", "knowledge"), start, end))
+                lines.append(f"Colony trend (turns {first}-{last}): {changes}")
+            if self.events:
+                lines.append("Notable events: " + "; ".join(self.events))
+            self._colony_summary = "\n".join(lines)
+        return self._colony_summary
+
+    def agent_summary(self, state, agent_name: str) -> str:
+        return f"Your record: {agent_record(state, agent_name)}"
+
+    def summary(self, state, agent_name: str) -> str:
+        colony = self.colony_summary()
+        agent = self.agent_summary(state, agent_name)
+        return f"{agent}\n{colony}" if colony else agent
@@ -1,51 +1,144 @@
-import seaborn as sns
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend for crash fix
-import matplotlib.pyplot as plt
-import pandas as pd
+from array import array
 from pathlib import Path
+import json
+import time
 
-# Global storage for game history
-game_history = []
+# Tracked series, with their plot style
+SERIES = {
+    'population': {'marker': 'o', 'label': 'Population', 'color': '#2E86AB'},
+    'food': {'marker': 's', 'label': 'Food', 'color': '#A23B72'},
+    'knowledge': {'marker': '^', 'label': 'Knowledge', 'color': '#F18F01'},
+}
 
-def save_game_stats(turn, population, food, knowledge, save_dir="docs/img/plots"):
+
+class StatsRecorder:
     """
-    Save a simple line graph of population, food, and knowledge over turns.
-    Each call adds the current turn data and saves the cumulative graph.
+    Records population, food and knowledge per turn into a columnar buffer (O(1) per turn)
+    and keeps a single figure whose lines are updated in place. The figure is only rendered
+    at checkpoints (every `every` turns and/or the given `checkpoints`) and when the game ends.
+    matplotlib and seaborn are imported on the first render, recording alone doesn't load them.
     """
-    # Add current turn data
-    game_history.append({
-        'turn': turn,
-        'population': population,
-        'food': food,
-        'knowledge': knowledge
-    })
-    
-    # Create DataFrame
-    df = pd.DataFrame(game_history)
-    
-    # Create the plot
-    plt.figure(figsize=(10, 6))
-    sns.set_style("whitegrid")
-    
-    plt.plot(df['turn'], df['population'], marker='o', linewidth=2.5, label='Population', color='#2E86AB')
-    plt.plot(df['turn'], df['food'], marker='s', linewidth=2.5, label='Food', color='#A23B72')
-    plt.plot(df['turn'], df['knowledge'], marker='^', linewidth=2.5, label='Knowledge', color='#F18F01')
-    
-    plt.xlabel('Turn')
-    plt.ylabel('Value')
-    plt.title(f'Game Stats - Turns 1-{turn}')
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-    
-    # Force integer values on both axes
-    plt.gca().yaxis.set_major_locator(plt.MaxNLocator(integer=True))
-    plt.gca().xaxis.set_major_locator(plt.MaxNLocator(integer=True))
-    
-    # Save the plot
-    Path(save_dir).mkdir(parents=True, exist_ok=True)
-    filename = f"{save_dir}/game_stats_turn_{turn}.png"
-    plt.savefig(filename, dpi=300, bbox_inches='tight')
-    plt.close()
-    
-    print(f"Game stats saved: {filename}")
\ No newline at end of file
+
+    def __init__(self, save_dir="docs/img/plots", every=None, checkpoints=(), dpi=100, formats=("png",)):
+        self.save_dir = save_dir
+        self.every = every
+        self.checkpoints = set(checkpoints)
+        self.dpi = dpi
+        self.formats = formats  # Any of "png", "svg", "html"
+
+        self.columns = {'turn': array('l'), **{name: array('l') for name in SERIES}}
+        self.record_times = array('d')  # Seconds spent in record(), excluding rendering
+        self.render_times = array('d')
+
+        self._figure = None
+        self._lines = {}
+
+    def __len__(self):
+        return len(self.columns['turn'])
+
+    def record(self, turn, population, food, knowledge):
+        """Append the stats of a turn, rendering the figure if the turn is a checkpoint"""
+        start = time.perf_counter()
+        self.columns['turn'].append(turn)
+        self.columns['population'].append(population)
+        self.columns['food'].append(food)
+        self.columns['knowledge'].append(knowledge)
+        self.record_times.append(time.perf_counter() - start)
+
+        if turn in self.checkpoints or (self.every and turn > 0 and turn % self.every == 0):
+            self.render()
+
+    def backfill(self, rows):
+        """Append the (population, food, knowledge) of turns already played, from turn 0, without rendering"""
+        for turn, row in enumerate(rows, start=len(self)):
+            self.columns['turn'].append(turn)
+            for name, value in zip(SERIES, row):
+                self.columns[name].append(value)
+
+    def history(self) -> list[dict]:
+        """Recorded turns as a list of dicts"""
+        names = list(self.columns)
+        return [dict(zip(names, row)) for row in zip(*self.columns.values())]
+
+    def _build_figure(self):
+        """Create the persistent figure and its (empty) lines once"""
+        import seaborn as sns
+        import matplotlib
+        matplotlib.use('Agg')  # Use non-interactive backend for crash fix
+        from matplotlib.figure import Figure
+        from matplotlib.ticker import MaxNLocator
+
+        self._figure = Figure(figsize=(10, 6))
+        with sns.axes_style("whitegrid"):
+            ax = self._figure.add_subplot()
+        for name, style in SERIES.items():
+            self._lines[name], = ax.plot([], [], linewidth=2.5, **style)
+
+        ax.set_xlabel('Turn')
+        ax.set_ylabel('Value')
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+
+        # Force integer values on both axes
+        ax.yaxis.set_major_locator(MaxNLocator(integer=True))
+        ax.xaxis.set_major_locator(MaxNLocator(integer=True))
+
+    def render(self, final=False) -> list[str]:
+        """Update the figure with the recorded data and save it. Returns the written files."""
+        if not len(self):
+            return []
+        start = time.perf_counter()
+        if self._figure is None:
+            self._build_figure()
+
+        turns = self.columns['turn']
+        for name, line in self._lines.items():
+            line.set_data(turns, self.columns[name])
+
+        ax = self._figure.axes[0]
+        ax.relim()
+        ax.autoscale_view()
+        last_turn = turns[-1]
+        ax.set_title(f'Game Stats - Turns 1-{last_turn}')
+
+        Path(self.save_dir).mkdir(parents=True, exist_ok=True)
+        stem = f"{self.save_dir}/game_stats_{'final' if final else f'turn_{last_turn}'}"
+        written = []
+        for fmt in self.formats:
+            filename = f"{stem}.{fmt}"
+            if fmt == "html":
+                self._write_html(filename)
+            else:
+                self._figure.savefig(filename, dpi=self.dpi, bbox_inches='tight', format=fmt)
+            written.append(filename)
+
+        self.render_times.append(time.perf_counter() - start)
+        print(f"Game stats saved: {', '.join(written)}")
+        return written
+
+    def _write_html(self, filename):
+        """Write a standalone page with the chart as inline SVG and the raw data as JSON"""
+        import io
+
+        svg = io.StringIO()
+        self._figure.savefig(svg, format='svg', bbox_inches='tight')
+        data = json.dumps({name: column.tolist() for name, column in self.columns.items()})
+        with open(filename, 'w') as f:
+            f.write(f"<!DOCTYPE html>\n<html><body>\n{svg.getvalue()}\n"
+                    f"<script type=\"application/json\" id=\"game-stats\">{data}</script>\n</body></html>\n")
+
+    def finish(self) -> list[str]:
+        """Render the final figure"""
+        return self.render(final=True)
+
+    def overhead(self) -> dict:
+        """Per-turn recording overhead and total rendering time, in seconds"""
+        n = len(self.record_times)
+        return {
+            'turns': n,
+            'record_mean': sum(self.record_times) / n if n else 0.0,
+            'record_max': max(self.record_times, default=0.0),
+            'renders': len(self.render_times),
+            'render_total': sum(self.render_times),
+        }
+
@@ -0,0 +1,226 @@
+"""
+Replay logs: an append-only JSONL record of a game (gzip compressed when the path ends with .gz).
+
+The first line holds the settings of the run (seed, agents, food, balance). Then every applied tool
+call is an "act" event (turn, agent, prompt hash, tool, arguments, RNG draws, state delta) and every
+end of turn an "end" event (RNG draws, deaths, resulting state). Replaying feeds the recorded
+decisions back through game/rules.py with the same seeded RNG, so any run can be rebuilt, or
+fast-forwarded to a turn and continued from there, without a single model call.
+"""
+import gzip
+import hashlib
+import json
+import os
+import random
+import zlib
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from game import rules
+
+
+class TapedRandom(random.Random):
+    """random.Random keeping its raw draws (random() floats, getrandbits() ints) on a tape"""
+
+    def __init__(self, seed=None):
+        self.tape = []
+        super().__init__(seed)
+
+    def random(self) -> float:
+        value = super().random()
+        self.tape.append(value)
+        return value
+
+    def getrandbits(self, k: int) -> int:
+        value = super().getrandbits(k)
+        self.tape.append(value)
+        return value
+
+    def take(self) -> list:
+        """Draws since the last call"""
+        tape, self.tape = self.tape, []
+        return tape
+
+
+def _open(path: Path, mode: str):
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.blake2b(prompt.encode(), digest_size=8).hexdigest()
+
+
+def _resources(state) -> tuple[int, int, int]:
+    return state.population, state.food, state.knowledge
+
+
+class ReplayLog:
+    """
+    Writer of a replay log, attached to a GameState as its `replay_log`.
+    Without a path nothing is written, only the last event is kept (used to verify replays).
+    With `append`, an existing log is continued (a game resumed from a checkpoint).
+    """
+
+    def __init__(self, path, settings: dict, append: bool = False):
+        self.path = Path(path) if path is not None else None
+        self.turn = 0
+        self.last = None  # Last recorded event
+        self._prompts = {}  # Agent name -> hash of the prompt it is answering
+        self._file = None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = _open(self.path, "a" if append else "w")
+        if not append:
+            self._write({"event": "start", **settings})
+
+    def _write(self, event: dict):
+        self.last = event
+        if self._file is not None:
+            self._file.write(json.dumps(event, separators=(",", ":")) + "\n")
+
+    def prompt(self, agent_name: str, prompt: str = "", digest: Optional[str] = None):
+        """Remember the prompt an agent is answering, or its already computed `digest`"""
+        self._prompts[agent_name] = digest or prompt_hash(prompt)
+
+    def action(self, state, agent_name: str, tool: str, arguments: dict, call: Callable):
+        """Run a tool call and record it"""
+        rng = state.rng
+        before = _resources(state)
+        result = call()
+        after = _resources(state)
+        self._write({
+            "event": "act", "turn": self.turn, "agent": agent_name, "prompt": self._prompts.get(agent_name),
+            "tool": tool, "args": arguments, "draws": rng.take() if isinstance(rng, TapedRandom) else None,
+            "delta": [a - b for a, b in zip(after, before)],
+        })
+        return result
+
+    def end_turn(self, state, call: Callable) -> dict:
+        """Run the end-of-turn phase and record it"""
+        if isinstance(state.rng, TapedRandom):
+            state.rng.take()  # Draws outside the rules (none expected) are not part of any event
+        outcome = call()
+        self._write({
+            "event": "end", "turn": self.turn, "draws": state.rng.take() if isinstance(state.rng, TapedRandom) else None,
+            **outcome, "state": list(_resources(state)),
+        })
+        self._prompts.clear()
+        if self._file is not None:
+            self._file.flush()
+        return outcome
+
+    def close(self):
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+
+
+def read_log(path) -> Iterator[dict]:
+    with _open(Path(path), "r") as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def truncate_log(path, turn: int):
+    """
+    Cut a log back to the end of `turn`, dropping the events of a turn that was interrupted.
+    The unreadable tail of a log left by a crashed process is dropped too.
+    """
+    path = Path(path)
+    kept = []
+    try:
+        for event in read_log(path):
+            if event["event"] != "start" and event["turn"] > turn:
+                break
+            kept.append(event)
+    except (EOFError, gzip.BadGzipFile, zlib.error, json.JSONDecodeError):
+        pass
+    temporary = path.with_name(path.name + ".tmp" + path.suffix)
+    with _open(temporary, "w") as file:
+        file.writelines(json.dumps(event, separators=(",", ":")) + "\n" for event in kept)
+    os.replace(temporary, path)
+
+
+def apply_action(simulation, agent_name: str, tool: str, arguments: dict):
+    """Apply a recorded tool call through the rules, like the tool itself would"""
+    state = simulation.state
+    outcome = rules.ACTIONS[tool](state, agent_name, state.rng, **arguments)
+    if tool == "reproduce":
+        state.models.extend(simulation.pool.generate(outcome))
+    elif tool == "kill_agent" and outcome and state.chronicle is not None:
+        state.chronicle.kill(agent_name, arguments["agent_name"])
+    return outcome
+
+
+def replay(path, until_turn: Optional[int] = None, verify: bool = True, log_path=None, **simulation_kwargs):
+    """
+    Rebuild the game recorded in `path` up to the end of `until_turn` (the whole log by default), without
+    any model call. With `verify`, the RNG draws and resulting state of every event are checked against
+    the log; a mismatch (e.g. the rules changed since the recording) raises ValueError.
+    The returned Simulation can keep playing from there: a what-if branch, logged to `log_path` if given.
+    """
+    from game.balance import Balance
+    from game.simulation import Simulation
+
+    events = read_log(path)
+    header = next(events)
+    if header.get("event") != "start":
+        raise ValueError(f"{path} is not a replay log")
+
+    simulation = Simulation(
+        n_agents=header["n_agents"], food=header["food"], seed=header["seed"], balance=Balance(**header["balance"]),
+        model_id=header["model_id"], knowledge=header.get("knowledge", 0), replay_path=log_path, **simulation_kwargs,
+    )
+    state = simulation.state
+    if state.replay_log is None:
+        simulation.attach_log(None)
+    log = state.replay_log
+    simulation.record()
+
+    for event in events:
+        if until_turn is not None and event["turn"] > until_turn:
+            break
+        while simulation.turn < event["turn"]:
+            simulation.start_turn()
+
+        if event["event"] == "act":
+            agent_name, tool, arguments = event["agent"], event["tool"], event["args"]
+            log.prompt(agent_name, digest=event["prompt"])
+            log.action(state, agent_name, tool, arguments, lambda: apply_action(simulation, agent_name, tool, arguments))
+            checked = ("draws", "delta")
+        else:
+            simulation.record()
+            simulation.end_turn()
+            checked = ("draws", "natural_deaths", "starved", "immune", "state")
+
+        if verify:
+            for key in checked:
+                if event.get(key) is not None and log.last.get(key) != event[key]:
+                    raise ValueError(f"Turn {event['turn']}: {key} is {log.last.get(key)}, the log says {event[key]}")
+    return simulation
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Replay a recorded game without calling the model")
+    parser.add_argument("log", help="replay log (.jsonl or .jsonl.gz)")
+    parser.add_argument("--turn", type=int, help="stop at the end of this turn")
+    parser.add_argument("--no-verify", action="store_true", help="don't check the draws and states against the log")
+    parser.add_argument("--plot", metavar="DIR", help="render the stats chart of the replayed turns into DIR")
+    args = parser.parse_args()
+
+    simulation = replay(args.log, args.turn, verify=not args.no_verify)
+    for turn, (population, food, knowledge) in enumerate(simulation.history):
+        print(f"Turn {turn}: {population} 👥, {food} 🍎, {knowledge} 🧠")
+    print(simulation)
+
+    if args.plot:
+        from game.plots import StatsRecorder
+
+        stats = StatsRecorder(save_dir=args.plot)
+        for turn, resources in enumerate(simulation.history):
+            stats.record(turn, *resources)
+        stats.finish()
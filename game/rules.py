@@ -0,0 +1,120 @@
+"""
+Colony rules, shared by the LLM tools (tools/actions.py) and the headless engine (game/headless.py).
+Every random draw goes through the `rng` argument (a random.Random or the random module itself),
+and the constants come from the state's Balance (game/balance.py).
+"""
+from game.balance import Balance, DEFAULT_BALANCE
+
+
+def add_food(state, actor: str, rng) -> int:
+    """Gather food with success rates improved by knowledge. Returns the food gained."""
+    state.record_action(actor, 'add_food')
+
+    # Knowledge bonus: every 10 knowledge improves food gathering
+    balance = state.balance
+    knowledge_bonus = state.knowledge // balance.knowledge_bonus_step
+    food_gained = balance.harvest.draw(knowledge_bonus, rng.random())
+
+    state.food += food_gained
+    return food_gained
+
+
+def add_knowledge(state, actor: str, rng=None) -> int:
+    """Research, adding 1 knowledge. Returns the knowledge gained."""
+    state.record_action(actor, 'add_knowledge')
+
+    knowledge_gained = 1
+    state.knowledge += knowledge_gained
+    return knowledge_gained
+
+
+def kill_agent(state, actor: str, rng=None, agent_name: str = None) -> bool:
+    """Remove the agent called `agent_name` from the colony. Returns whether the target was found."""
+    killed = state.models.pop(agent_name) is not None
+    state.record_action(actor, 'kill_agent', agent_name if killed else None)
+    return killed
+
+
+def steal_food(state, actor: str, rng) -> int:
+    """
+    Steal food from the colony, gaining starvation immunity. Higher knowledge = more efficient stealing.
+    Returns the food stolen, or -1 when there was nothing to steal (the action is wasted, not recorded).
+    """
+    if state.food <= 0:
+        return -1
+
+    # Record action for title tracking (this also grants starvation immunity)
+    state.record_action(actor, 'steal_food')
+
+    # Knowledge bonus: every 10 knowledge improves stealing efficiency
+    balance = state.balance
+    knowledge_bonus = state.knowledge // balance.knowledge_bonus_step
+    stolen_food = balance.theft.draw(knowledge_bonus, rng.random())
+
+    # Can't steal more food than available
+    actual_stolen = min(stolen_food, state.food)
+    state.food = max(0, state.food - actual_stolen)
+    return actual_stolen
+
+
+def do_nothing(state, actor: str, rng=None) -> None:
+    """Do nothing productive."""
+    state.record_action(actor, 'do_nothing')
+
+
+def reproduce(state, actor: str, rng) -> int:
+    """
+    Decide how many new agents are born, with chances improved by knowledge.
+    Returns the number of offspring; the caller creates them and adds them to the colony.
+    """
+    state.record_action(actor, 'reproduce')
+
+    # Knowledge bonus: every 10 knowledge improves reproduction
+    balance = state.balance
+    knowledge_bonus = state.knowledge // balance.knowledge_bonus_step
+    return balance.offspring.draw(knowledge_bonus, rng.random())
+
+
+def resources_decay(population: int, food: int, knowledge: int, balance: Balance = DEFAULT_BALANCE):
+    """Food is consumed by 1 for every pop (tiered decay over abundance), knowledge naturally decays every turn."""
+    # Food consumption
+    total_food_consumption = int(population * balance.food_consumption)
+    food_after_eating = max(food - total_food_consumption, 0)
+
+    # Tiered food decay based on abundance thresholds (these blobs are going to waste so much food...)
+    for food_per_agent, kept in balance.food_decay_tiers:
+        if food_after_eating >= population * food_per_agent:
+            food_after_eating = int(food_after_eating * kept)
+            break
+
+    # Knowledge natural decay
+    total_knowledge_decay = int(knowledge * balance.knowledge_decay) # 10% decay
+    knowledge_after_decay = max(knowledge - total_knowledge_decay, 0)
+
+    return food_after_eating, knowledge_after_decay
+
+
+def starvation_deaths(vulnerable: list, rng) -> list:
+    """Pick the vulnerable agents dying of starvation (1 to half of them), drawing only the ones that die"""
+    num_to_die = rng.randint(1, max(1, int(len(vulnerable)/2)))
+    num_to_die = min(num_to_die, len(vulnerable))  # Can't kill more than available
+    return rng.sample(vulnerable, num_to_die)
+
+
+def natural_deaths(agents, rng, balance: Balance = DEFAULT_BALANCE) -> list:
+    """Pick up to an eighth of the agents to die of natural death (never all of them)"""
+    num_to_die = rng.randint(0, int(len(agents)/balance.natural_death_divisor))
+    if num_to_die > 0 and num_to_die < len(agents):
+        return rng.sample(agents, num_to_die)
+    return []
+
+
+# Action rules by tool name
+ACTIONS = {
+    'add_food': add_food,
+    'add_knowledge': add_knowledge,
+    'kill_agent': kill_agent,
+    'do_nothing': do_nothing,
+    'reproduce': reproduce,
+    'steal_food': steal_food,
+}
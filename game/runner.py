@@ -0,0 +1,319 @@
+"""
+Run a scenario (game/scenario.py) from the command line, for one seed or many in parallel:
+
+    python -m game.runner [SCENARIO] [--seeds N] [--jobs K] [--seed S] [--set NAME=VALUE ...] [--out runs]
+
+Every run gets its own directory, <out>/<scenario name>/<start time>/seed-<seed>/, holding result.json
+(settings, outcome, stats of every turn) and whatever the scenario's output settings ask for: replay.jsonl.gz,
+events.jsonl, trace.jsonl, checkpoint.ckpt and the stats chart in plots/. The directory of the batch holds
+the resolved scenario.json, results.jsonl (one line per run, as each one ends) and summary.json.
+
+A single run is played in this process with its log on the console (game_loop.py is this runner);
+several seeds are fanned out over `--jobs` worker processes, which play quietly.
+"""
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Optional
+
+from game.scenario import Scenario, load
+
+DEFAULT_SCENARIO = Path(__file__).resolve().parent.parent / "scenarios" / "default.toml"
+
+
+def _headless(scenario: Scenario, seed: int, record: bool) -> tuple[dict, list, object]:
+    from game.headless import run_game
+    from game.store import RunRecorder
+
+    recorder = None
+    if record:
+        recorder = RunRecorder(seed, scenario.n_agents, scenario.food, scenario.turns, "headless",
+                               params={"policy": scenario.policy}, name=scenario.name, knowledge=scenario.knowledge)
+    game = run_game(scenario.headless_policy(), turns=scenario.turns, n_agents=scenario.n_agents, food=scenario.food,
+                    seed=seed, balance=scenario.balance, recorder=recorder, knowledge=scenario.knowledge)
+    outcome = {"turns_played": game.turns_played, "population": game.population, "food": game.food,
+               "knowledge": game.knowledge}
+    return outcome, game.history, recorder
+
+
+def play(scenario: Scenario, seed: int, run_dir, console=None, resume: Optional[str] = None, live_view: bool = False,
+         dashboard_port: Optional[int] = None, event_queue_size: int = 10_000, record: bool = False,
+         on_ready=None) -> dict:
+    """
+    Play one run of a scenario into `run_dir`, or continue the one saved in the checkpoint `resume`.
+    With a rich `console`, the game is logged on it (as a live view with `live_view`); without, it plays
+    quietly. `on_ready()` is called before the first turn. Returns the outcome written to result.json,
+    with the game.store.RunRecorder of the run under "recording" if `record`.
+    """
+    run_dir = Path(run_dir)
+    run_dir.mkdir(parents=True, exist_ok=True)
+    output = scenario.output
+    started = time.perf_counter()
+    result = {"scenario": scenario.name, "seed": seed, "mode": scenario.mode, "turns": scenario.turns}
+
+    if scenario.mode == "headless":
+        if on_ready is not None:
+            on_ready()
+        outcome, history, recorder = _headless(scenario, seed, record)
+        result.update(outcome, survived=outcome["population"] > 1, elapsed=time.perf_counter() - started,
+                      history=history)
+        (run_dir / "result.json").write_text(json.dumps(result))
+        if recorder is not None:
+            recorder.finish(outcome["turns_played"], outcome["population"], outcome["food"], outcome["knowledge"])
+            result["recording"] = recorder
+        return result
+
+    from game.agents import ModelBackend
+    from game.events import ConsoleLog, EventBus, JsonlSink, LiveView, start_dashboard
+    from game.scheduler import Scheduler
+    from game.simulation import Simulation
+
+    settings = scenario.model
+    stats = None
+    if output.plots:
+        from game.plots import StatsRecorder
+        stats = StatsRecorder(save_dir=str(run_dir / "plots"), every=output.plot_every, dpi=output.plot_dpi,
+                              formats=tuple(output.plot_formats))
+
+    stub = settings.stub
+    if settings.provider == "stub" and "policy" not in stub:
+        stub = {**stub, "policy": scenario.model_policy(), "seed": seed}
+    backend = ModelBackend(provider=settings.provider, model_id=settings.model_id, base_url=settings.base_url, stub=stub)
+
+    model_factory = None
+    if settings.fake_latency is not None:
+        from game.fake_model import FakeModel, weighted_policies
+        policy, batch_policy = weighted_policies(scenario.model_policy(), seed)
+        model_factory = lambda: FakeModel(latency=settings.fake_latency, policy=policy, batch_policy=batch_policy)
+
+    scheduler = Scheduler(max_concurrency=settings.max_concurrency, requests_per_minute=settings.requests_per_minute,
+                          tokens_per_minute=settings.tokens_per_minute, max_retries=settings.max_retries)
+
+    events = EventBus(max_queue=event_queue_size)
+    if console is not None:
+        events.subscribe(LiveView(console, events) if live_view else ConsoleLog(console))
+    if output.events:
+        events.subscribe(JsonlSink(run_dir / "events.jsonl", append=resume is not None))
+    if dashboard_port is not None:
+        dashboard = events.subscribe(start_dashboard(dashboard_port))
+        print(f"Live chart on {dashboard.url}")
+
+    decision_cache = None
+    if settings.decision_cache is not None:
+        from game.decision_cache import DecisionCache
+        decision_cache = DecisionCache(settings.decision_cache, fresh_rate=settings.decision_fresh_rate)
+
+    replay_path = run_dir / "replay.jsonl.gz" if output.replay else None
+    trace_path = run_dir / "trace.jsonl" if output.trace else None
+    if resume is not None:
+        from game.checkpoint import resume as resume_checkpoint
+        simulation = resume_checkpoint(resume, model_factory=model_factory, stats=stats, replay_path=replay_path,
+                                       decision_cache=decision_cache, trace_path=trace_path, scheduler=scheduler,
+                                       events=events, backend=backend)
+        result["seed"] = simulation.seed
+    else:
+        simulation = Simulation(n_agents=scenario.n_agents, food=scenario.food, seed=seed, balance=scenario.balance,
+                                model_factory=model_factory, stats=stats, replay_path=replay_path,
+                                decision_cache=decision_cache, history_window=settings.history_window,
+                                trace_path=trace_path, scheduler=scheduler, events=events, backend=backend,
+                                knowledge=scenario.knowledge)
+        simulation.record()
+    game_state = simulation.state
+    if console is not None:
+        verb = f"Resumed after turn {simulation.turn}" if resume is not None else "Initial state"
+        print(f"\n{verb}: {game_state.population} 👥, {game_state.food} 🍎, {game_state.knowledge} 🧠")
+
+    recorder = None
+    if record:
+        from game.store import RunRecorder
+        name = f"{scenario.name}, resumed after turn {simulation.turn}" if resume is not None else scenario.name
+        recorder = RunRecorder.for_simulation(simulation, scenario.turns, name=name)
+
+    if on_ready is not None:
+        on_ready()
+
+    # Game turns, reported through the event bus
+    for _ in range(simulation.turn, scenario.turns):
+        simulation.start_turn()
+        if scenario.mode == "batched":
+            simulation.run_batched_turn(settings.batch_group_size, settings.max_concurrency)
+        elif scenario.mode == "concurrent":
+            simulation.run_concurrent_turn(settings.max_concurrency)
+        else:
+            simulation.run_sequential_turn()
+        simulation.record()
+        # Natural deaths, decays and starving check
+        simulation.end_turn()
+        if output.checkpoint_every and simulation.turn % output.checkpoint_every == 0:
+            simulation.checkpoint(run_dir / "checkpoint.ckpt")
+        if simulation.over:
+            break
+
+    events.close()
+    simulation.close()
+    result.update(turns_played=simulation.turn, population=game_state.population, food=game_state.food,
+                  knowledge=game_state.knowledge, survived=game_state.population > 1,
+                  elapsed=time.perf_counter() - started, titles=game_state.title_counts(),
+                  trace=simulation.tracer.summary(), scheduler=scheduler.summary(), events=events.summary(),
+                  history=simulation.history)
+
+    if console is not None:
+        if game_state.population > 1:
+            console.print(f"\nThe colony survived {scenario.turns} turns!", style="bold green")
+        console.print(f"Game state: {game_state.population} 👥, {game_state.food} 🍎, {game_state.knowledge} 🧠", style="bold blue")
+        print(f"Titles: {result['titles']}")
+        simulation.tracer.print_summary(console)
+        print(f"Scheduler: {result['scheduler']}")
+        print(f"Events: {result['events']}")
+    if decision_cache is not None:
+        result["decision_cache"] = {"hit_rate": decision_cache.hit_rate(), **decision_cache.metrics}
+        if console is not None:
+            print(f"Decision cache: {decision_cache.hit_rate():.0%} hits, {decision_cache.metrics}, {len(decision_cache)} entries")
+        decision_cache.close()
+    if stats is not None:
+        stats.finish()
+        overhead = result["stats_overhead"] = stats.overhead()
+        if console is not None:
+            print(f"Stats overhead: {overhead['record_mean'] * 1e6:.1f}µs/turn recording, {overhead['render_total']:.2f}s over {overhead['renders']} renders")
+
+    (run_dir / "result.json").write_text(json.dumps(result, default=str))
+    if recorder is not None:
+        recorder.finish(simulation.turn, game_state.population, game_state.food, game_state.knowledge)
+        result["recording"] = recorder
+    return result
+
+
+def _play_quietly(scenario: Scenario, seed: int, run_dir: str, record: bool) -> dict:
+    """Worker process entry point: one run without console output"""
+    import contextlib
+    import io
+
+    with contextlib.redirect_stdout(io.StringIO()):  # The stats chart reports every file it saves
+        return play(scenario, seed, run_dir, record=record)
+
+
+def summarize(results: list[dict]) -> dict:
+    """Survival and final state of a batch of runs"""
+    runs = len(results)
+    mean = lambda key: sum(result[key] for result in results) / runs if runs else 0.0
+    return {"runs": runs, "survival_rate": mean("survived"), "mean_turns_played": mean("turns_played"),
+            "mean_population": mean("population"), "mean_food": mean("food"), "mean_knowledge": mean("knowledge"),
+            "elapsed": sum(result["elapsed"] for result in results)}
+
+
+def run_seeds(scenario: Scenario, seeds: list[int], jobs: Optional[int] = None, out: str = "runs",
+              progress=lambda line: None) -> tuple[Path, list[dict]]:
+    """
+    Play a run of the scenario for every seed on `jobs` worker processes (all cores by default), each into
+    its own directory. Results are appended to results.jsonl as runs end. Returns the batch directory and the
+    results in seed order.
+    """
+    batch_dir = Path(out) / scenario.name / time.strftime("%Y%m%d-%H%M%S")
+    batch_dir.mkdir(parents=True, exist_ok=True)
+    (batch_dir / "scenario.json").write_text(json.dumps({**scenario.model_dump(), "seeds": seeds}, indent=2))
+
+    run_store = None
+    if scenario.output.store is not None:
+        from game.store import RunStore
+        run_store = RunStore(scenario.output.store)
+
+    results = {}
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as pool, open(batch_dir / "results.jsonl", "w") as lines:
+        futures = {pool.submit(_play_quietly, scenario, seed, str(batch_dir / f"seed-{seed}"), run_store is not None): seed
+                   for seed in seeds}
+        for done, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            recording = result.pop("recording", None)
+            if run_store is not None:
+                result["run_id"] = run_store.add(recording)
+            result.pop("history", None)
+            results[futures[future]] = result
+            lines.write(json.dumps(result, default=str) + "\n")
+            lines.flush()
+            progress(f"{done}/{len(seeds)} runs ({time.perf_counter() - started:.1f}s): seed {result['seed']} "
+                     f"{'survived' if result['survived'] else 'collapsed'} after {result['turns_played']} turns")
+    if run_store is not None:
+        run_store.close()
+
+    ordered = [results[seed] for seed in seeds]
+    (batch_dir / "summary.json").write_text(json.dumps({**summarize(ordered), "wall_time": time.perf_counter() - started},
+                                                       indent=2))
+    return batch_dir, ordered
+
+
+def _parse_setting(text: str) -> tuple[str, object]:
+    """NAME=VALUE with a Python literal value (a bare word is a string)"""
+    import ast
+
+    name, _, value = text.partition("=")
+    try:
+        return name, ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return name, value
+
+
+def main(started: Optional[float] = None):
+    import argparse
+    import random
+    import sys
+
+    from rich.console import Console
+
+    started = started if started is not None else time.perf_counter()
+    parser = argparse.ArgumentParser(description="Play a colony scenario, for one seed or many in parallel")
+    parser.add_argument("scenario", nargs="?", default=str(DEFAULT_SCENARIO), help="scenario file (TOML)")
+    parser.add_argument("--seeds", type=int, default=1, help="number of runs, with seeds SEED, SEED + 1, ...")
+    parser.add_argument("--seed", type=int, help="seed of the first run (default: the scenario's, else random)")
+    parser.add_argument("--jobs", type=int, help="worker processes for several seeds (default: all cores)")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE", type=_parse_setting,
+                        help="override a scenario setting, e.g. turns=50 or balance.knowledge_decay=0.05; repeatable")
+    parser.add_argument("--out", default="runs", help="root of the run directories")
+    parser.add_argument("--resume", metavar="CHECKPOINT", help="continue the run saved in a checkpoint, in its directory")
+    parser.add_argument("--no-plots", action="store_true", help="don't record nor render the stats chart")
+    parser.add_argument("--live", action="store_true", help="rich live dashboard of the colony instead of the scrolling log")
+    parser.add_argument("--dashboard", type=int, metavar="PORT", help="live chart at http://127.0.0.1:PORT/")
+    parser.add_argument("--import-times", action="store_true", help="report the import time of each package before playing")
+    args = parser.parse_args()
+
+    scenario = load(args.scenario).override(dict(args.set))
+    if args.no_plots:
+        scenario = scenario.override({"output.plots": False})
+    first_seed = next(seed for seed in (args.seed, scenario.seed, random.randrange(2 ** 32)) if seed is not None)
+    seeds = [first_seed + index for index in range(args.seeds)]
+    console = Console()
+
+    if len(seeds) > 1:
+        if args.resume or args.live or args.dashboard:
+            parser.error("--resume, --live and --dashboard play a single run")
+        batch_dir, results = run_seeds(scenario, seeds, args.jobs, args.out, lambda line: console.print(line, style="dim"))
+        summary = summarize(results)
+        console.print(f"{scenario.name}: {summary['runs']} runs, {summary['survival_rate']:.0%} survived, "
+                      f"{summary['mean_turns_played']:.1f} turns played on average", style="bold blue")
+        console.print(f"Results in {batch_dir}")
+        return
+
+    def ready():
+        print(f"Ready in {time.perf_counter() - started:.2f}s")
+        if args.import_times:
+            from game.startup import import_times, summary
+            # The game's own modules loaded so far, timed cold in a fresh interpreter
+            loaded = sorted(name for name in sys.modules if name.split(".")[0] in ("game", "tools", "prompts"))
+            print(summary(import_times(loaded)))
+
+    run_dir = Path(args.resume).parent if args.resume else Path(args.out) / scenario.name / time.strftime("%Y%m%d-%H%M%S") / f"seed-{seeds[0]}"
+    record = scenario.output.store is not None
+    result = play(scenario, seeds[0], run_dir, console, resume=args.resume, live_view=args.live,
+                  dashboard_port=args.dashboard, record=record, on_ready=ready)
+    if record:
+        from game.store import RunStore
+        run_store = RunStore(scenario.output.store)
+        print(f"Run {run_store.add(result['recording'])} saved to {scenario.output.store}")
+        run_store.close()
+    console.print(f"Results in {run_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Scenario files: everything a run is set up from, in TOML (see scenarios/). Every key is optional:
+
+    name = "thieves"              # Directory of its runs (the file name by default)
+    turns = 100
+    n_agents = 10
+    food = 10                     # Starting resources
+    knowledge = 0
+    seed = 1                      # Seed of the first run, the next ones use seed + 1, ... (random by default)
+    mode = "sequential"           # "sequential", "concurrent", "batched" or "headless" (no model at all)
+    policy = "random"             # How headless agents, the fake model and the stub server pick their actions:
+                                  # a named policy or an action probability table, e.g.
+                                  # policy = { add_food = 3, steal_food = 2, kill_agent = 1 }
+
+    [balance]                     # Fields of game.balance.Balance: decay constants, outcome tables...
+    knowledge_decay = 0.05
+
+    [model]                       # Where the agents' model is served, see ModelSettings
+    provider = "stub"
+
+    [output]                      # What each run writes into its directory, see OutputSettings
+    plots = false
+
+Settings can be overridden after loading with dotted names, e.g. {"balance.knowledge_decay": 0.05}.
+"""
+import tomllib
+from pathlib import Path
+from typing import Literal, Optional, Union
+
+from pydantic import BaseModel, Field
+
+from game.balance import Balance
+
+MODES = ("sequential", "concurrent", "batched", "headless")
+
+
+class ModelSettings(BaseModel):
+    """The agents' model (game.agents.ModelBackend) and how it is called"""
+    provider: str = "openai"  # "openai", "openrouter" or "stub" (a local stub server started in-process)
+    model_id: str = "gpt-4o-mini"
+    base_url: Optional[str] = None  # Any OpenAI-compatible endpoint
+    stub: dict = Field(default_factory=lambda: {"latency": 0.2, "jitter": 0.1})  # Settings of the stub server
+    fake_latency: Optional[float] = None  # Seconds; set to use the in-process FakeModel instead of any server
+    history_window: int = 2  # Runs kept in each agent's conversation history
+    max_concurrency: int = 8  # Max requests in flight during a concurrent or batched turn
+    batch_group_size: int = 25  # Agents per batched request
+    requests_per_minute: Optional[int] = None  # Rate limits of the API account
+    tokens_per_minute: Optional[int] = None
+    max_retries: int = 5
+    decision_cache: Optional[str] = None  # e.g. "cache/decisions.sqlite": reuse decisions taken in similar situations
+    decision_fresh_rate: float = 0.1  # Share of the cached situations still sent to the model
+
+    class Config:
+        extra = "forbid"
+
+
+class OutputSettings(BaseModel):
+    """What a run writes into its directory"""
+    replay: bool = True  # replay.jsonl.gz, to replay the run without the model (python -m game.replay)
+    trace: bool = True  # trace.jsonl, timings and tokens of every call and turn
+    events: bool = True  # events.jsonl, every game event
+    checkpoint_every: Optional[int] = 1  # Turns between two checkpoints (checkpoint.ckpt), None to disable
+    plots: bool = True  # Stats chart in plots/; False never imports matplotlib
+    plot_every: Optional[int] = 10  # Render the chart every N turns (None: only at the end)
+    plot_dpi: int = 150
+    plot_formats: list[str] = Field(default_factory=lambda: ["png"])  # Any of "png", "svg", "html"
+    store: Optional[str] = None  # Run store (game/store.py) every run is also recorded into, e.g. "runs/runs.sqlite"
+
+    class Config:
+        extra = "forbid"
+
+
+class Scenario(BaseModel):
+    name: str = "default"
+    description: str = ""
+    turns: int = 100
+    n_agents: int = 10
+    food: int = 10
+    knowledge: int = 0
+    seed: Optional[int] = None
+    mode: Literal[MODES] = "sequential"
+    policy: Union[str, dict[str, float]] = "random"
+    balance: Balance = Field(default_factory=Balance)
+    model: ModelSettings = Field(default_factory=ModelSettings)
+    output: OutputSettings = Field(default_factory=OutputSettings)
+
+    class Config:
+        extra = "forbid"
+
+    def override(self, settings: dict) -> "Scenario":
+        """Copy with the given settings changed, by dotted name: {"turns": 50, "balance.knowledge_decay": 0.05}"""
+        data = self.model_dump()
+        for name, value in settings.items():
+            *sections, key = name.split(".")
+            target = data
+            for section in sections:
+                if not isinstance(target.get(section), dict):
+                    raise ValueError(f"Unknown scenario setting {name!r}")
+                target = target[section]
+            target[key] = value
+        return Scenario(**data)
+
+    def headless_policy(self):
+        """Policy of the headless engine (game.headless)"""
+        from game.headless import POLICIES, weighted_policy
+        from game.rules import ACTIONS
+
+        if isinstance(self.policy, dict):
+            unknown = set(self.policy) - set(ACTIONS)
+            if unknown:
+                raise ValueError(f"Unknown actions: {', '.join(sorted(unknown))}")
+            return weighted_policy(self.policy)
+        if self.policy not in POLICIES:
+            raise ValueError(f"Unknown headless policy {self.policy!r}, expected one of {', '.join(POLICIES)} or a table")
+        return POLICIES[self.policy]
+
+    def model_policy(self) -> dict[str, float]:
+        """Action probability table of the fake model and the stub server"""
+        from game.fake_model import POLICIES
+
+        if isinstance(self.policy, dict):
+            return self.policy
+        if self.policy not in POLICIES:
+            raise ValueError(f"Unknown model policy {self.policy!r}, expected one of {', '.join(POLICIES)} or a table")
+        return POLICIES[self.policy]
+
+
+def load(path) -> Scenario:
+    """Scenario of a TOML file, named after the file unless it sets a name"""
+    path = Path(path)
+    with open(path, "rb") as file:
+        data = tomllib.load(file)
+    data.setdefault("name", path.stem)
+    return Scenario(**data)
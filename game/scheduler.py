@@ -0,0 +1,299 @@
+"""
+Traffic shaping of the model calls: every agent request goes through a Scheduler, which
+- keeps under the provider's requests/min and tokens/min limits with two token buckets,
+- retries throttled (429), timed out and failed (5xx, connection) requests with jittered exponential
+  backoff, honoring Retry-After and pausing every request while the provider asks to slow down,
+- adapts the number of requests in flight: additive increase while latency stays near its baseline,
+  multiplicative decrease on throttling, timeouts and server errors (AIMD),
+- serves the waiting requests by priority (turn order within a turn) rather than arrival order.
+"""
+import asyncio
+import heapq
+import itertools
+import random
+import sys
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional
+
+from game.trace import response_tokens
+
+RETRYABLE_STATUS = {408, 409, 429}
+
+
+class TokenBucket:
+    """
+    `per_minute` units per minute, up to `burst` seconds worth of them at once. Reservations may
+    overdraw the bucket: the caller then waits for the returned delay, so reservations are served in order.
+    """
+
+    def __init__(self, per_minute: float, burst: float = 6.0, clock=time.monotonic):
+        self.rate = per_minute / 60
+        self.capacity = max(self.rate * burst, 1.0)
+        self.level = self.capacity
+        self.clock = clock
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take `amount` units, returns the seconds to wait before using them"""
+        self._refill()
+        self.level -= amount
+        return max(0.0, -self.level / self.rate)
+
+    def try_take(self, amount: float) -> float:
+        """Take `amount` units only if available: returns 0, else the seconds until they would be"""
+        self._refill()
+        if self.level >= amount:
+            self.level -= amount
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def refund(self, amount: float):
+        """Give back units reserved but not used (a negative amount charges more)"""
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+def status_code(error: BaseException) -> Optional[int]:
+    """HTTP status of a failed model call (agno's ModelProviderError or an openai error), None if there is none"""
+    openai = sys.modules.get("openai")  # Not imported yet: the error can't be one of its own
+    for candidate in (error, error.__cause__):
+        if isinstance(candidate, (asyncio.TimeoutError, TimeoutError)):
+            return 408
+        if openai is not None and isinstance(candidate, openai.APIConnectionError):
+            return 408
+        code = getattr(candidate, "status_code", None)
+        if isinstance(code, int):
+            return code
+    return None
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the provider asked to wait before retrying, if it said so"""
+    for candidate in (error, error.__cause__):
+        response = getattr(candidate, "response", None)
+        headers = getattr(response, "headers", None)
+        if not headers:
+            continue
+        try:
+            if headers.get("retry-after-ms"):
+                return float(headers["retry-after-ms"]) / 1000
+            if headers.get("retry-after"):
+                return float(headers["retry-after"])
+        except ValueError:
+            pass
+    return None
+
+
+class Scheduler:
+    def __init__(self, max_concurrency: int = 8, min_concurrency: int = 1, requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None, max_retries: int = 5, base_delay: float = 0.5,
+                 max_delay: float = 30.0, timeout: Optional[float] = 120.0, latency_tolerance: float = 2.0,
+                 latency_slack: float = 0.5, decrease_ratio: float = 0.7, burst: float = 1.0, seed: Optional[int] = None):
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = float(max_concurrency)  # Adaptive cap on the requests in flight
+        # Providers enforce their per-minute limits over much shorter windows: `burst` seconds worth at once
+        self.requests = TokenBucket(requests_per_minute, burst) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, burst) if tokens_per_minute else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout  # Seconds per attempt (async requests only)
+        # Smoothed latency above tolerance × baseline + slack (seconds) counts as congestion
+        self.latency_tolerance = latency_tolerance
+        self.latency_slack = latency_slack
+        self.decrease_ratio = decrease_ratio
+        self.rng = random.Random(seed)  # Backoff jitter, never the game's RNG
+        self.metrics = {"calls": 0, "retries": 0, "throttled": 0, "timeouts": 0, "errors": 0, "not_retried": 0,
+                        "waited": 0.0}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._waiting = []  # Heap of (priority, arrival, future)
+        self._arrivals = itertools.count()
+        self._latencies = deque(maxlen=100)  # Recent successful latencies, their minimum is the baseline
+        self._latency = None  # Moving average of the latency
+        self._sizes = {}  # Kind of request -> (model calls per request, tokens / estimated tokens), observed
+        self._paused_until = 0.0  # Provider asked every request to wait until then
+        self._last_decrease = 0.0
+
+    def __repr__(self) -> str:
+        return f"Scheduler(limit={self.limit:.1f}, in_flight={self.in_flight}, waiting={len(self._waiting)})"
+
+    # Admission
+
+    def _dispatch(self):
+        """Let the highest priority requests in, as long as there is room under the limit"""
+        while self._waiting and self.in_flight < max(int(self.limit), self.min_concurrency):
+            _, _, future = heapq.heappop(self._waiting)
+            if future.done():  # Cancelled while waiting
+                continue
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            future.set_result(None)
+
+    def _release(self):
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _reserve(self, calls: float, tokens: float) -> float:
+        """Take the budget of a request, returns the seconds to wait before sending it"""
+        wait = self._paused_until - time.monotonic()
+        if self.requests is not None:
+            wait = max(wait, self.requests.reserve(calls))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.reserve(tokens))
+        wait = max(wait, 0.0)
+        self.metrics["waited"] += wait
+        return wait
+
+    def _refund(self, estimate: tuple[float, float]):
+        """Give back the budget reserved for an attempt that failed: throttled or failed requests aren't billed"""
+        if self.requests is not None:
+            self.requests.refund(estimate[0])
+        if self.tokens is not None:
+            self.tokens.refund(estimate[1])
+
+    def _estimate(self, kind: str, tokens: float) -> tuple[float, float]:
+        """Expected model calls and tokens of a request: an agent run may call the model more than once"""
+        calls, ratio = self._sizes.get(kind, (1.0, 1.0))
+        return calls, tokens * ratio
+
+    def _settle(self, kind: str, estimate: tuple[float, float], tokens: float, result):
+        """Charge the model calls and tokens the request actually used and refine the estimates of its kind"""
+        prompt_tokens, completion_tokens, calls = response_tokens(result)
+        used = prompt_tokens + completion_tokens
+        if not calls:
+            return
+        if self.requests is not None:
+            self.requests.refund(estimate[0] - calls)
+        if self.tokens is not None:
+            self.tokens.refund(estimate[1] - used)
+        ratio = used / tokens if tokens else 1.0
+        if kind in self._sizes:
+            previous_calls, previous_ratio = self._sizes[kind]
+            calls, ratio = 0.8 * previous_calls + 0.2 * calls, 0.8 * previous_ratio + 0.2 * ratio
+        self._sizes[kind] = (calls, ratio)
+
+    # Adaptive concurrency
+
+    def _succeeded(self, latency: float):
+        self.metrics["calls"] += 1
+        self._latencies.append(latency)
+        self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+        if self._latency <= self.latency_tolerance * min(self._latencies) + self.latency_slack:
+            self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+        else:
+            self.limit = max(self.min_concurrency, self.limit - 1 / self.limit)
+
+    def _congested(self):
+        """Back off at most once per typical request duration, a burst of errors is one congestion signal"""
+        now = time.monotonic()
+        window = sum(self._latencies) / len(self._latencies) if self._latencies else self.base_delay
+        if now - self._last_decrease >= window:
+            self.limit = max(self.min_concurrency, self.limit * self.decrease_ratio)
+            self._last_decrease = now
+
+    def _failed(self, error: BaseException, attempt: int, retry: bool) -> Optional[float]:
+        """Account for a failed attempt, returns the delay before the next one or None to give up"""
+        code = status_code(error)
+        if code == 429:
+            self.metrics["throttled"] += 1
+        elif code == 408:
+            self.metrics["timeouts"] += 1
+        if code is None or not (code in RETRYABLE_STATUS or code >= 500):
+            self.metrics["errors"] += 1
+            return None
+        self._congested()
+        if not retry:
+            self.metrics["not_retried"] += 1
+            return None
+        if attempt >= self.max_retries:
+            self.metrics["errors"] += 1
+            return None
+
+        delay = self.rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))  # Full jitter
+        asked = retry_after(error)
+        if asked is not None:
+            delay = max(delay, asked)
+            self._paused_until = max(self._paused_until, time.monotonic() + asked)
+        self.metrics["retries"] += 1
+        return delay
+
+    # Requests
+
+    async def run(self, call: Callable[[], Awaitable], priority: float = 0, tokens: float = 0, kind: str = "default",
+                  retry_if: Optional[Callable[[], bool]] = None):
+        """
+        Await `call()` once admitted, retrying it when it fails transiently and `retry_if()` (if given)
+        still allows it. Lower `priority` values are served first; `tokens` is the estimated size of the
+        request. Returns (result, retries).
+        """
+        attempt = 0
+        while True:
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiting, (priority, next(self._arrivals), future))
+            self._dispatch()
+            try:
+                await future
+            except BaseException:
+                if future.done() and not future.cancelled():
+                    self._release()
+                raise
+
+            estimate = self._estimate(kind, tokens)
+            try:
+                wait = self._reserve(*estimate)
+                if wait:
+                    await asyncio.sleep(wait)
+                started = time.monotonic()
+                result = await asyncio.wait_for(call(), self.timeout)
+            except Exception as error:
+                self._release()
+                self._refund(estimate)
+                delay = self._failed(error, attempt, retry_if is None or retry_if())
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                self._release()
+                raise
+            self._release()
+            self._succeeded(time.monotonic() - started)
+            self._settle(kind, estimate, tokens, result)
+            return result, attempt
+
+    def run_sync(self, call: Callable, tokens: float = 0, kind: str = "default",
+                 retry_if: Optional[Callable[[], bool]] = None):
+        """Blocking version of run, for the sequential turns: one request at a time, same limits and retries"""
+        attempt = 0
+        while True:
+            estimate = self._estimate(kind, tokens)
+            wait = self._reserve(*estimate)
+            if wait:
+                time.sleep(wait)
+            started = time.monotonic()
+            try:
+                result = call()
+            except Exception as error:
+                self._refund(estimate)
+                delay = self._failed(error, attempt, retry_if is None or retry_if())
+                if delay is None:
+                    raise
+                attempt += 1
+                time.sleep(delay)
+                continue
+            self._succeeded(time.monotonic() - started)
+            self._settle(kind, estimate, tokens, result)
+            return result, attempt
+
+    def summary(self) -> dict:
+        return {**self.metrics, "waited": round(self.metrics["waited"], 3), "limit": round(self.limit, 2),
+                "peak_in_flight": self.peak_in_flight}
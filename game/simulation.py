@@ -0,0 +1,225 @@
+"""
+A colony game as an explicit instance: its own GameState, RNG, agent pool and history.
+Nothing is shared between simulations but the HTTP clients, so any number of games can
+run in one process, one after the other or side by side on the same event loop.
+"""
+import asyncio
+import random
+import time
+from typing import Optional
+
+from game.agents import AgentPool, ModelBackend
+from game.balance import Balance
+from game.history import Chronicle
+from game.status import GameState
+from game.replay import ReplayLog, TapedRandom
+from game.scheduler import Scheduler
+from game.trace import Tracer
+from game.turns import (action_marker, arun_batched_turn, arun_concurrent_turn, estimate_tokens, get_loop,
+                        run_batched_turn, run_concurrent_turn)
+from prompts.agents_instructions import choices
+
+
+class Simulation:
+    def __init__(self, n_agents: int = 10, food: int = 10, seed: Optional[int] = None,
+                 balance: Optional[Balance] = None, model_id: str = "gpt-4o-mini", model_factory=None, stats=None,
+                 replay_path=None, decision_cache=None, history_window: int = 2, trace_path=None,
+                 scheduler: Optional[Scheduler] = None, events=None, backend: Optional[ModelBackend] = None,
+                 knowledge: int = 0):
+        # Always seeded, so that any run can be replayed
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.n_agents = n_agents
+        self.food = food
+        self.knowledge = knowledge
+        self.model_id = backend.model_id if backend is not None else model_id
+        self.rng = random.Random(self.seed)
+        self.state = GameState(food=food, knowledge=knowledge, rng=self.rng, balance=balance or Balance(), decision_cache=decision_cache,
+                               chronicle=Chronicle(), tracer=Tracer(trace_path), scheduler=scheduler,
+                               events=events)
+        self.pool = AgentPool(self.state, model_id=self.model_id, model_factory=model_factory,
+                              history_window=history_window, backend=backend)
+        self.stats = stats  # Optional game.plots.StatsRecorder, fed by record()
+        self.history: list[tuple[int, int, int]] = []  # (population, food, knowledge) per recorded turn
+        self.turn = 0  # Turn being played, 0 before the first one
+        self._turn_start = (0.0, 0)  # perf_counter and population when the turn started
+        self._phases = {}  # Seconds spent in each phase of the current turn
+        if replay_path is not None:
+            self.attach_log(replay_path)
+        self.state.models.extend(self.pool.generate(n_agents))
+
+    def __repr__(self) -> str:
+        return f"Simulation(turn={self.turn}, population={self.state.population}, food={self.state.food}, knowledge={self.state.knowledge})"
+
+    def settings(self) -> dict:
+        """What it takes to rebuild the game from scratch"""
+        return {"seed": self.seed, "n_agents": self.n_agents, "food": self.food, "knowledge": self.knowledge,
+                "balance": self.state.balance.model_dump(), "model_id": self.model_id}
+
+    def attach_log(self, path) -> ReplayLog:
+        """Record the game into a replay log (game/replay.py); must happen before the first turn"""
+        self.rng = self.state.rng = TapedRandom(self.seed)
+        self.state.replay_log = ReplayLog(path, self.settings())
+        return self.state.replay_log
+
+    def checkpoint(self, path) -> int:
+        """Save the game between two turns (game/checkpoint.py), returns the checkpoint size in bytes"""
+        from game.checkpoint import save
+
+        return save(self, path)
+
+    @property
+    def tracer(self) -> Tracer:
+        return self.state.tracer
+
+    def close(self):
+        if self.state.replay_log is not None:
+            self.state.replay_log.close()
+        self.state.tracer.close()
+        self.pool.close()
+
+    @property
+    def over(self) -> bool:
+        return self.state.population <= 1
+
+    def start_turn(self) -> int:
+        self.turn += 1
+        if self.state.replay_log is not None:
+            self.state.replay_log.turn = self.turn
+        self.state.chronicle.turn = self.state.tracer.turn = self.turn
+        self._turn_start = (time.perf_counter(), self.state.population)
+        if self.state.events is not None:
+            self.state.events.turn = self.turn
+            self.state.emit("turn_start", population=self.state.population, food=self.state.food,
+                            knowledge=self.state.knowledge)
+        self._phases = {}
+        return self.turn
+
+    def record(self):
+        """Record the current resources for the current turn"""
+        started = time.perf_counter()
+        if self.turn > 0:
+            self._phases["decide"] = started - self._turn_start[0]
+        state = self.state
+        self.history.append((state.population, state.food, state.knowledge))
+        if self.stats is not None:
+            self.stats.record(self.turn, state.population, state.food, state.knowledge)
+        self._phases["plot"] = time.perf_counter() - started
+
+    def decide(self, model):
+        """Let one agent act right away (sequential turns)"""
+        self.state.current_agent = model.name
+        prompt = choices(agent_name=model.name, game_state=self.state)
+        if self.state.replay_log is not None:
+            self.state.replay_log.prompt(model.name, prompt)
+
+        tracer = self.state.tracer
+        started = time.perf_counter()
+        cache = self.state.decision_cache
+        if cache is not None:
+            key, cached = cache.lookup(self.state, model)
+            if cached is not None:
+                tracer.agent_call(model.name, "sequential", time.perf_counter() - started, cached=True)
+                self._decided(model, cached)
+                return cached
+
+        started = time.perf_counter()
+        retries = 0
+        try:
+            if self.state.scheduler is None:
+                response = model.run(prompt)
+            else:
+                marker = action_marker(self.state, model.name)
+                response, retries = self.state.scheduler.run_sync(
+                    lambda: model.run(prompt), tokens=estimate_tokens(prompt), kind="sequential",
+                    retry_if=lambda: action_marker(self.state, model.name) == marker,
+                )
+        except BaseException as error:
+            tracer.agent_call(model.name, "sequential", time.perf_counter() - started, error=error)
+            if not isinstance(error, Exception) or self.state.scheduler is None or action_marker(self.state, model.name) == marker:
+                raise
+            response = model.agent.run_response  # Only the closing reply failed, the decision was taken
+            self._decided(model, response)
+            return response
+        tracer.agent_call(model.name, "sequential", time.perf_counter() - started, response, retries=retries)
+        if cache is not None:
+            cache.remember(key, self.state, model, response)
+        self._decided(model, response)
+        return response
+
+    def _decided(self, model, response):
+        if self.state.events is not None:
+            tools = getattr(response, "tools", None)
+            self.state.emit("decision", agent=model.name, content=getattr(response, "content", None),
+                            tool=tools[0].tool_name if tools else None)
+
+    def run_sequential_turn(self) -> list:
+        """
+        Let every agent act in turn order, each one seeing the state left by the previous ones. Agents
+        killed earlier in the turn lose their action, like in the headless engine (game/headless.py).
+        Returns the responses of the agents that acted.
+        """
+        responses = []
+        for model in self.state.models.snapshot():
+            if model not in self.state.models:
+                continue
+            responses.append(self.decide(model))
+            if self.over:
+                break
+        return responses
+
+    def run_concurrent_turn(self, max_concurrency: int = 8) -> list[tuple[str, str, str]]:
+        return run_concurrent_turn(self.state, max_concurrency)
+
+    async def arun_concurrent_turn(self, max_concurrency: int = 8, scheduler: Optional[Scheduler] = None):
+        return await arun_concurrent_turn(self.state, max_concurrency, scheduler)
+
+    def run_batched_turn(self, group_size: int = 25, max_concurrency: int = 8) -> list[tuple[str, str, str]]:
+        return run_batched_turn(self.state, group_size, max_concurrency)
+
+    async def arun_batched_turn(self, group_size: int = 25, max_concurrency: int = 8,
+                                scheduler: Optional[Scheduler] = None):
+        return await arun_batched_turn(self.state, group_size, max_concurrency, scheduler)
+
+    def end_turn(self) -> dict[str, int]:
+        """Close the current turn: natural deaths, decay and starvation"""
+        started = time.perf_counter()
+        if self.state.replay_log is not None:
+            outcome = self.state.replay_log.end_turn(self.state, self.state.end_turn)
+        else:
+            outcome = self.state.end_turn()
+        self.state.chronicle.end_turn(self.state, outcome)
+        self._phases["end_turn"] = time.perf_counter() - started
+        self._phases.update(self.state.phase_times)
+        self.state.tracer.end_turn(self._turn_start[1], self._phases)
+        state = self.state
+        if state.events is not None or state.recorder is not None:
+            titles = state.title_counts()
+            if state.recorder is not None:
+                state.recorder.end_turn(self.turn, state.population, state.food, state.knowledge, titles)
+            state.emit("turn_end", population=state.population, food=state.food, knowledge=state.knowledge,
+                       titles=titles, **outcome)
+        return outcome
+
+    async def aplay(self, turns: int, scheduler: Optional[Scheduler] = None) -> "Simulation":
+        """Play concurrent turns until `turns` are played or the colony has perished"""
+        if not self.history:
+            self.record()
+        while self.turn < turns and not self.over:
+            self.start_turn()
+            await self.arun_concurrent_turn(scheduler=scheduler)
+            self.record()
+            self.end_turn()
+        return self
+
+
+def run_simulations(simulations: list[Simulation], turns: int = 100, max_concurrency: int = 8,
+                    scheduler: Optional[Scheduler] = None) -> list[Simulation]:
+    """
+    Play several games side by side on one event loop, their LLM calls going through one shared `scheduler`
+    (by default, one with at most `max_concurrency` calls in flight overall)
+    """
+    async def play_all():
+        shared = scheduler or Scheduler(max_concurrency)
+        return await asyncio.gather(*(simulation.aplay(turns, shared) for simulation in simulations))
+
+    return get_loop().run_until_complete(play_all())
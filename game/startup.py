@@ -0,0 +1,65 @@
+"""
+Import-time breakdown of the game's entry points: the modules are imported in a fresh interpreter under
+python -X importtime (a running process has them cached already) and the time each package spent
+importing its own modules is summed.
+
+    python -m game.startup [module ...]
+
+With no module, the breakdown covers what game_loop.py imports before its first turn with the default
+scenario. game_loop.py --import-times (game/runner.py) reports it for the modules it actually loaded.
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# What game_loop.py imports before its first turn, with the default scenario
+GAME_LOOP = ("game.runner", "game.simulation", "game.agents", "game.scheduler", "game.events", "game.store", "game.plots")
+
+
+def import_times(modules=GAME_LOOP) -> dict[str, float]:
+    """Seconds spent in the modules of each top level package while importing `modules` cold, slowest first"""
+    statement = "; ".join(f"import {module}" for module in modules)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=ROOT, capture_output=True,
+                            text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {', '.join(modules)} failed: {result.stderr.strip().splitlines()[-1]}")
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or line.endswith("imported package"):
+            continue
+        own, _, name = line.removeprefix("import time:").split("|")
+        package = name.strip().split(".")[0]
+        times[package] = times.get(package, 0.0) + int(own) / 1e6
+    return dict(sorted(times.items(), key=lambda item: -item[1]))
+
+
+def summary(times: dict[str, float], top: int = 6) -> str:
+    """One line: the total, then the slowest packages"""
+    total = sum(times.values())
+    shown = list(times.items())[:top]
+    parts = [f"{package} {seconds:.2f}s" for package, seconds in shown]
+    if len(times) > top:
+        parts.append(f"{len(times) - top} others {total - sum(seconds for _, seconds in shown):.2f}s")
+    return f"Imports {total:.2f}s: {', '.join(parts)}"
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from rich.console import Console
+    from rich.table import Table
+
+    parser = argparse.ArgumentParser(description="Import-time breakdown of the game's modules, by package")
+    parser.add_argument("modules", nargs="*", default=GAME_LOOP, help="modules to import (default: game_loop.py's)")
+    parser.add_argument("--top", type=int, default=15, help="packages listed")
+    args = parser.parse_args()
+
+    times = import_times(args.modules)
+    total = sum(times.values())
+    table = Table("Package", "Seconds", "Share", title=f"Importing {', '.join(args.modules)}")
+    for package, seconds in list(times.items())[:args.top]:
+        table.add_row(package, f"{seconds:.3f}", f"{seconds / total:.0%}")
+    Console().print(table)
+    print(f"Total {total:.2f}s over {len(times)} packages")
@@ -1,7 +1,11 @@
 from pydantic import BaseModel, Field, computed_field
-from agno.agent import Agent
-from typing import Optional
-from collections import defaultdict
+from typing import Any, Optional
+from collections import deque
+import random
+import time
+
+from game import rules
+from game.balance import Balance
 
 # Available titles based on agent behavior patterns
 TITLES = {
@@ -22,12 +26,120 @@ TITLES = {
 }
 
 
-class AgentState(BaseModel):
-    title: Optional[str] = Field(default="Newcomer")
-    action_counts: dict = Field(default_factory=lambda: defaultdict(int))
-    
+# Counted actions, in the order of AgentState.counts
+ACTIONS = ("add_food", "add_knowledge", "kill_agent", "reproduce", "steal_food", "do_nothing")
+FOOD, KNOWLEDGE, KILL, REPRODUCE, STEAL, NOTHING = range(len(ACTIONS))
+ACTION_INDEX = {action: index for index, action in enumerate(ACTIONS)}
+
+# Actions that can still change a title once an absolute threshold is crossed (counts never go down)
+_KILLS = frozenset({KILL})
+_THEFTS = frozenset({KILL, STEAL})
+_IDLING = frozenset({KILL, STEAL, NOTHING})
+_FINAL = frozenset()
+
+
+class AgentState:
+    """
+    Per-agent action counters in fixed slots with a running total, and the title they give.
+    The title is only reclassified after an action that can change it: once an absolute threshold
+    is crossed (2 kills, 3 thefts, 6 idle turns), the others can't, however the shares move.
+    """
+    __slots__ = ("counts", "total", "title", "recent_actions", "_other_counts", "_triggers")
+
+    def __init__(self, title: Optional[str] = "Newcomer"):
+        self.counts = [0] * len(ACTIONS)
+        self.total = 0
+        self.title = title
+        self.recent_actions = deque(maxlen=3)  # Last actions, newest last
+        self._other_counts = None  # Actions outside ACTIONS, counted in the total only
+        self._triggers = None  # Indexes of the actions that can change the title, None for any
+
+    def __repr__(self) -> str:
+        return f"AgentState(title={self.title!r}, action_counts={self.action_counts})"
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, AgentState):
+            return NotImplemented
+        return (self.title, self.action_counts, list(self.recent_actions)) == \
+            (other.title, other.action_counts, list(other.recent_actions))
+
+    @classmethod
+    def from_counts(cls, action_counts: dict, recent_actions=()) -> "AgentState":
+        agent_state = cls()
+        for action, count in action_counts.items():
+            agent_state._add(action, count)
+        agent_state.recent_actions.extend(recent_actions)
+        agent_state.classify()
+        return agent_state
+
+    def copy(self) -> "AgentState":
+        other = AgentState(self.title)
+        other.counts = self.counts.copy()
+        other.total = self.total
+        other.recent_actions.extend(self.recent_actions)
+        other._other_counts = dict(self._other_counts) if self._other_counts else None
+        other._triggers = self._triggers
+        return other
+
+    @property
+    def action_counts(self) -> dict[str, int]:
+        """Count of every action taken at least once"""
+        counts = {action: count for action, count in zip(ACTIONS, self.counts) if count}
+        if self._other_counts:
+            counts.update(self._other_counts)
+        return counts
+
+    def _add(self, action: str, count: int = 1) -> Optional[int]:
+        index = ACTION_INDEX.get(action)
+        if index is None:
+            if self._other_counts is None:
+                self._other_counts = {}
+            self._other_counts[action] = self._other_counts.get(action, 0) + count
+        else:
+            self.counts[index] += count
+        self.total += count
+        return index
+
+    def record(self, action: str):
+        """Count an action, reclassifying the title only if the action can change it"""
+        index = self._add(action)
+        self.recent_actions.append(action)
+        if self._triggers is None or index in self._triggers:
+            self.classify()
+
+    def classify(self) -> str:
+        """Same cascade as get_title_based_on_actions, on the counters, noting which actions can change the result"""
+        total = self.total
+        food, knowledge, kill, reproduce, steal, nothing = self.counts
+        self._triggers = None
+        if total < 3:
+            self.title = "Newcomer"
+        elif kill >= 2:
+            self.title = TITLES["killer"][min(kill - 1, 3)]
+            self._triggers = _FINAL if kill >= 5 else _KILLS
+        elif steal / total >= 0.3 or steal >= 3:
+            self.title = TITLES["thief"][min(steal // 2, 3)]
+            if steal >= 3:
+                self._triggers = _KILLS if steal >= 6 else _THEFTS
+        elif nothing / total >= 0.5 or nothing >= 6:
+            self.title = TITLES["slacker"][min(nothing // 3, 3)]
+            if nothing >= 6:
+                # The theft share only grows by stealing
+                self._triggers = _THEFTS if nothing >= 9 else _IDLING
+        elif food / total >= 0.4:
+            self.title = TITLES["food_gatherer"][min(food // 4, 3)]
+        elif knowledge / total >= 0.4:
+            self.title = TITLES["researcher"][min(knowledge // 3, 3)]
+        elif reproduce / total >= 0.3:
+            self.title = TITLES["builder"][min(reproduce // 2, 3)]
+        elif (food + knowledge + reproduce) / total >= 0.7:
+            self.title = TITLES["balanced"][3 if total >= 20 else 2 if total >= 12 else 1]
+        else:
+            self.title = TITLES["balanced"][2 if total >= 15 else 1 if total >= 8 else 0]
+        return self.title
+
     def get_title_based_on_actions(self) -> str:
-        """Calculate title based on action patterns using percentage-based logic"""
+        """Calculate title based on action patterns using percentage-based logic (reference for classify)"""
         total_actions = sum(self.action_counts.values())
         if total_actions < 3:
             return "Newcomer"
@@ -99,14 +211,260 @@ class AgentState(BaseModel):
             return TITLES["balanced"][0]  # Newcomer
 
 
+class _Ranks:
+    """Order statistics over the members (a Fenwick tree of living slots): the i-th member in O(log n) as members come and go"""
+
+    def __init__(self, agents):
+        self.slots = list(agents)  # Members in order, None where one was removed
+        self.slot = {agent.name: index for index, agent in enumerate(self.slots)}
+        self.removed = 0
+        self.tree = [0] + [1] * len(self.slots)
+        for index in range(1, len(self.tree)):
+            parent = index + (index & -index)
+            if parent < len(self.tree):
+                self.tree[parent] += self.tree[index]
+
+    def _prefix(self, index: int) -> int:
+        """Living members among the first `index` slots"""
+        total = 0
+        while index > 0:
+            total += self.tree[index]
+            index -= index & -index
+        return total
+
+    def append(self, agent):
+        index = len(self.tree)  # 1-based position of the new slot
+        self.tree.append(self._prefix(index - 1) - self._prefix(index - (index & -index)) + 1)
+        self.slot[agent.name] = len(self.slots)
+        self.slots.append(agent)
+
+    def remove(self, name: str):
+        index = self.slot.pop(name) + 1
+        self.slots[index - 1] = None
+        self.removed += 1
+        while index < len(self.tree):
+            self.tree[index] -= 1
+            index += index & -index
+
+    def member(self, rank: int):
+        position = 0
+        step = 1 << (len(self.tree) - 1).bit_length()
+        while step:
+            if position + step < len(self.tree) and self.tree[position + step] <= rank:
+                position += step
+                rank -= self.tree[position]
+            step >>= 1
+        return self.slots[position]
+
+
+class Population:
+    """
+    Colony members indexed by name: O(1) lookup and removal, stable (insertion) iteration order,
+    a cached snapshot for the turn loop and a cached rendering of the kill targets list.
+    """
+
+    def __init__(self, agents=()):
+        self._agents = {}  # name -> agent, dicts keep insertion order
+        self._snapshot = None
+        self._targets = None  # (rendered names, offsets and position of each name in the rendering, names in order)
+        self._ranks = None  # _Ranks answering member() between two snapshots, built on demand
+        self.extend(agents)
+
+    def _changed(self):
+        self._snapshot = None
+        self._targets = None
+
+    def __len__(self) -> int:
+        return len(self._agents)
+
+    def __iter__(self):
+        return iter(self.snapshot())
+
+    def __getitem__(self, index):
+        if isinstance(index, int):
+            return self.member(index)
+        return self.snapshot()[index]
+
+    def __contains__(self, agent) -> bool:
+        """Accepts either an agent or an agent name"""
+        if isinstance(agent, str):
+            return agent in self._agents
+        return self._agents.get(agent.name) is agent
+
+    def __repr__(self) -> str:
+        return f"Population({self.names()})"
+
+    def append(self, agent):
+        self.extend((agent,))
+
+    def extend(self, agents):
+        for agent in agents:
+            if agent.name in self._agents:
+                self._ranks = None  # Replaced in place, the ranks are rebuilt on demand
+            self._agents[agent.name] = agent
+            if self._ranks is not None:
+                self._ranks.append(agent)
+        self._changed()
+
+    def member(self, index: int):
+        """The index-th member in order, like snapshot()[index] but without rebuilding the snapshot after changes"""
+        if self._snapshot is not None:
+            return self._snapshot[index]
+        if index < 0:
+            index += len(self._agents)
+        if not 0 <= index < len(self._agents):
+            raise IndexError("population index out of range")
+        if self._ranks is None or self._ranks.removed > len(self._agents):  # Rebuilt once half the slots are empty
+            self._ranks = _Ranks(self._agents.values())
+        return self._ranks.member(index)
+
+    def get(self, name: str):
+        return self._agents.get(name)
+
+    def excluding(self, names) -> list:
+        """Members whose name is not in the set `names`, in order, in one pass without building a snapshot"""
+        if not names:
+            return list(self._agents.values())
+        return [agent for name, agent in self._agents.items() if name not in names]
+
+    def pop(self, name: str):
+        """Remove and return the agent with the given name, None if there is none"""
+        agent = self._agents.pop(name, None)
+        if agent is not None:
+            if self._ranks is not None:
+                self._ranks.remove(name)
+            self._changed()
+        return agent
+
+    def remove(self, agent):
+        if self.pop(agent.name) is None:
+            raise ValueError(f"{agent.name} is not in the population")
+
+    def remove_many(self, agents) -> int:
+        """Remove several agents at once, returns how many were removed"""
+        removed = 0
+        for agent in agents:
+            if self._agents.pop(agent.name, None) is not None:
+                removed += 1
+                if self._ranks is not None:
+                    self._ranks.remove(agent.name)
+        if removed:
+            self._changed()
+        return removed
+
+    def snapshot(self) -> tuple:
+        """Immutable view of the current members, rebuilt only after the population changes"""
+        if self._snapshot is None:
+            self._snapshot = tuple(self._agents.values())
+        return self._snapshot
+
+    def copy(self) -> list:
+        return list(self.snapshot())
+
+    def names(self) -> list[str]:
+        return list(self._agents)
+
+    def targets_for(self, agent_name: Optional[str], limit: Optional[int] = None) -> str:
+        """
+        Quoted, comma separated names of everyone but `agent_name`, from a cached rendering. With `limit`,
+        only the `limit` members following `agent_name` (wrapping around): a short, deterministic sample
+        that differs from one agent to the next, sliced from the same rendering.
+        """
+        if self._targets is None:
+            offsets = {}
+            parts = []
+            position = 0
+            for index, name in enumerate(self._agents):
+                quoted = f'"{name}"'
+                offsets[name] = (position, position + len(quoted), index)
+                parts.append(quoted)
+                position += len(quoted) + 2  # ", " separator
+            self._targets = (", ".join(parts), offsets, tuple(self._agents))
+
+        rendered, offsets, names = self._targets
+        others = len(names) - (agent_name in offsets)
+        if limit is not None and limit < others:
+            if limit <= 0:
+                return ""
+            first = offsets[agent_name][2] + 1 if agent_name in offsets else 0
+            first, last = first % len(names), (first + limit - 1) % len(names)
+            start, end = offsets[names[first]][0], offsets[names[last]][1]
+            if first <= last:
+                return rendered[start:end]
+            return rendered[start:] + ", " + rendered[:end]
+
+        if agent_name not in offsets:
+            return rendered
+        start, end, _ = offsets[agent_name]
+        if start == 0:
+            return rendered[end + 2:]
+        return rendered[:start - 2] + rendered[end:]
+
+
+class Immunity:
+    """
+    Names of the agents immune to the next starvation, as flags stamped with the generation they were
+    granted in. Lifting every immunity is O(1): the generation moves on and the older flags stop counting.
+    """
+
+    def __init__(self, names=()):
+        self._stamps = {}  # name -> generation the immunity was granted in
+        self.generation = 0
+        self._count = 0
+        for name in names:
+            self.add(name)
+
+    def add(self, name: str):
+        if self._stamps.get(name) != self.generation:
+            self._stamps[name] = self.generation
+            self._count += 1
+
+    def discard(self, name: str):
+        if self._stamps.pop(name, None) == self.generation:
+            self._count -= 1
+
+    def clear(self):
+        self.generation += 1
+        self._count = 0
+        if len(self._stamps) > 1024:  # Drop the stale flags now and then, amortized O(1) per flag
+            self._stamps = {}
+
+    def __contains__(self, name) -> bool:
+        return self._stamps.get(name) == self.generation
+
+    def names(self) -> set[str]:
+        generation = self.generation
+        return {name for name, stamp in self._stamps.items() if stamp == generation}
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self):
+        return iter(self.names())
+
+    def __repr__(self) -> str:
+        return f"Immunity({sorted(self)})"
+
+
 class GameState(BaseModel):
-    models: list["Agent"] = Field(default_factory=list)
+    models: Population = Field(default_factory=Population)  # Colony members (game.agents.AgentRecord)
     food: int = Field(default=10)
     knowledge: int = Field(default=0)
     agent_states: dict[str, AgentState] = Field(default_factory=dict) # Agent titles
     current_agent: Optional[str] = Field(default=None)  # Track which agent is currently acting
-    starvation_immune: set[str] = Field(default_factory=set)  # Agents immune to starvation this turn
-    # record: list[dict] = Field(default_factory=list)  # Record of actions
+    starvation_immune: Immunity = Field(default_factory=Immunity)  # Agents immune to the next starvation
+    pending_actions: Optional[list[tuple]] = Field(default=None)  # Tool calls queued during a concurrent turn
+    next_agent_id: int = Field(default=1)  # Monotonic counter, IDs of dead agents are never reused
+    balance: Balance = Field(default_factory=Balance)  # Constants of the rules
+    rng: Any = Field(default=random, exclude=True)  # Source of every random draw (random.Random or the random module)
+    replay_log: Any = Field(default=None, exclude=True)  # game.replay.ReplayLog recording the actions, if any
+    decision_cache: Any = Field(default=None, exclude=True)  # game.decision_cache.DecisionCache, if decisions are cached
+    chronicle: Any = Field(default=None, exclude=True)  # game.history.Chronicle summarizing the earlier turns, if any
+    tracer: Any = Field(default=None, exclude=True)  # game.trace.Tracer timing the calls and turns, if any
+    scheduler: Any = Field(default=None, exclude=True)  # game.scheduler.Scheduler shaping the model calls, if any
+    events: Any = Field(default=None, exclude=True)  # game.events.EventBus publishing what happens, if any
+    recorder: Any = Field(default=None, exclude=True)  # game.store.RunRecorder collecting the counted actions, if any
+    phase_times: dict[str, float] = Field(default_factory=dict, exclude=True)  # Seconds spent in each phase of the last end_turn
     
     class Config:
         arbitrary_types_allowed = True
@@ -117,19 +475,43 @@ class GameState(BaseModel):
             self.agent_states[agent_name] = AgentState()
         return self.agent_states[agent_name]
     
-    def record_action(self, agent_name: str, action: str):
-        """Record an action and update agent's title"""
-        agent_state = self.get_agent_state(agent_name)
-        agent_state.action_counts[action] += 1
-        agent_state.title = agent_state.get_title_based_on_actions()
+    def allocate_agent_ids(self, count: int) -> range:
+        """Reserve `count` new sequential agent IDs"""
+        start = self.next_agent_id
+        self.next_agent_id += count
+        return range(start, start + count)
+    
+    def record_action(self, agent_name: str, action: str, target: Optional[str] = None):
+        """Record an action (and the agent it killed) and update agent's title"""
+        self.get_agent_state(agent_name).record(action)
+        if self.recorder is not None:
+            self.recorder.action(agent_name, action, target)
         
         # If agent stole food, they become immune to starvation next turn
         if action == 'steal_food':
             self.starvation_immune.add(agent_name)
     
+    def emit(self, kind: str, **fields):
+        """Publish an event on the game's bus, if it has one"""
+        if self.events is not None:
+            self.events.emit(kind, **fields)
+    
     def get_agent_title(self, agent_name: str) -> str:
         """Get current title for an agent"""
         return self.get_agent_state(agent_name).title
+
+    def titles(self, agent_names=None) -> dict[str, str]:
+        """Titles of the given agents (the living ones by default), in one pass"""
+        agent_states = self.agent_states
+        names = self.models.names() if agent_names is None else agent_names
+        return {name: agent_states[name].title if name in agent_states else "Newcomer" for name in names}
+
+    def title_counts(self, agent_names=None) -> dict[str, int]:
+        """Number of agents holding each title (the living ones by default)"""
+        counts = {}
+        for title in self.titles(agent_names).values():
+            counts[title] = counts.get(title, 0) + 1
+        return counts
     
     def is_agent_immune(self, agent_name: str) -> bool:
         """Check if an agent is immune to starvation"""
@@ -145,79 +527,55 @@ class GameState(BaseModel):
         """Population is automatically calculated as the number of models."""
         return len(self.models)
     
-    def resources_decay(self, base_food_consumption: int = 1, base_knowledge_decay: float = 0.1):
+    def resources_decay(self, base_food_consumption: Optional[int] = None, base_knowledge_decay: Optional[float] = None):
         """Food is consumed by 1 for every pop (tiered decay over abundance), knowledge naturally decays every turn."""
-        # Food consumption
-        total_food_consumption = int(self.population * base_food_consumption)
-        food_after_eating = max(self.food - total_food_consumption, 0)
-        
-        # Tiered food decay based on abundance thresholds (these blobs are going to waste so much food...)
-        if food_after_eating >= self.population * 6:
-            food_after_eating = int(food_after_eating * 0.5)  # 50% decay
-        elif food_after_eating >= self.population * 5:
-            food_after_eating = int(food_after_eating * 0.6)  # 40% decay
-        elif food_after_eating >= self.population * 4:
-            food_after_eating = int(food_after_eating * 0.7)  # 30% decay
-        elif food_after_eating >= self.population * 3:
-            food_after_eating = int(food_after_eating * 0.8)  # 20% decay
-        elif food_after_eating >= self.population * 2:
-            food_after_eating = int(food_after_eating * 0.9)  # 10% decay
-        
-        # Knowledge natural decay
-        total_knowledge_decay = int(self.knowledge * base_knowledge_decay) # 10% decay
-        knowledge_after_decay = max(self.knowledge - total_knowledge_decay, 0)
-        
-        return food_after_eating, knowledge_after_decay
+        balance = self.balance
+        if base_food_consumption is not None or base_knowledge_decay is not None:
+            balance = balance.model_copy(update={
+                "food_consumption": balance.food_consumption if base_food_consumption is None else base_food_consumption,
+                "knowledge_decay": balance.knowledge_decay if base_knowledge_decay is None else base_knowledge_decay,
+            })
+        return rules.resources_decay(self.population, self.food, self.knowledge, balance)
     
     def starving(self):
-        """If food is less than population, some random number of models die."""
-        if self.food <= 0:
-            import random
-            
-            # Separate immune and vulnerable agents
-            vulnerable_agents = []
-            immune_agents = []
-            
-            for agent in self.models:
-                if agent.name in self.starvation_immune:
-                    immune_agents.append(agent)
-                else:
-                    vulnerable_agents.append(agent)
-            
-            # Only vulnerable agents can die from starvation
-            if len(vulnerable_agents) > 0:
-                random.shuffle(vulnerable_agents)
-                num_to_die = random.randint(1, max(1, int(len(vulnerable_agents)/2)))
-                num_to_die = min(num_to_die, len(vulnerable_agents))  # Can't kill more than available
-                
-                # Remove the dying agents from the models list
-                agents_to_remove = vulnerable_agents[:num_to_die]
-                for agent in agents_to_remove:
-                    self.models.remove(agent)
-                
-                # Clear starvation immunity for next turn
-                self.starvation_immune.clear()
-                
-                return num_to_die, len(immune_agents)  # Return deaths and immune count
-            else:
-                # All agents are immune, no deaths
-                self.starvation_immune.clear()
-                return 0, len(immune_agents)
-        
-        # No starvation, clear immunity for next turn
+        """If food ran out, a random number of the agents that are not immune die. Immunity is lifted afterwards."""
+        if self.food > 0:
+            self.starvation_immune.clear()
+            return 0, 0
+
+        # One pass over the members, without rebuilding the snapshot the natural deaths invalidated
+        vulnerable = self.models.excluding(self.starvation_immune.names() if self.starvation_immune else None)
+        immune_count = len(self.models) - len(vulnerable)
         self.starvation_immune.clear()
-        return 0, 0
+        if not vulnerable:
+            return 0, immune_count
+
+        dying = rules.starvation_deaths(vulnerable, self.rng)
+        self.emit("death", agents=[agent.name for agent in dying], cause="starvation")
+        return self.models.remove_many(dying), immune_count
 
     def natural_death(self):
         """Some models will die of natural death every turn"""
-        import random
-        num_to_die = random.randint(0, int(len(self.models)/8))
-        if num_to_die > 0 and num_to_die < len(self.models):
-            # Randomly select agents to die
-            agents_to_remove = random.sample(self.models, num_to_die)
-            for agent in agents_to_remove:
-                self.models.remove(agent)
-        return num_to_die
-
-
-game_state = GameState()
\ No newline at end of file
+        dying = rules.natural_deaths(self.models.snapshot(), self.rng, self.balance)
+        if dying:
+            self.emit("death", agents=[agent.name for agent in dying], cause="natural death")
+        return self.models.remove_many(dying)
+    
+    def end_turn(self) -> dict[str, int]:
+        """
+        End-of-turn phase: natural deaths, resources decay, then starvation if food ran out.
+        The seconds spent in each phase are kept in `phase_times`.
+        """
+        started = time.perf_counter()
+        outcome = {"natural_deaths": self.natural_death(), "starved": 0, "immune": 0}
+        decayed = time.perf_counter()
+        food, knowledge = self.food, self.knowledge
+        self.food, self.knowledge = self.resources_decay()
+        self.emit("decay", food_consumed=food - self.food, knowledge_lost=knowledge - self.knowledge,
+                  food=self.food, knowledge=self.knowledge)
+        starved = time.perf_counter()
+        if self.food <= 0:
+            outcome["starved"], outcome["immune"] = self.starving()
+        self.phase_times = {"natural_death": decayed - started, "decay": starved - decayed,
+                            "starvation": time.perf_counter() - starved}
+        return outcome
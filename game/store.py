@@ -0,0 +1,216 @@
+"""
+Persistent store of played games, to analyze many runs without replaying them. One SQLite file holds
+- runs: seed, engine, model, starting settings, balance parameters and outcome of every game,
+- turns: population, food and knowledge at the end of every turn (turn 0 is the start),
+- actions: every agent action, with its target for kills, as integer codes,
+- titles: how many agents hold each title at the end of every turn.
+Games are collected in memory by a RunRecorder, fed synchronously by the game it is attached to (the
+actions its agents' counters count, and every turn end), and written in one transaction by RunStore.add. The query helpers aggregate in SQL
+on indexed columns, so thousands of runs are answered without loading them.
+"""
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional
+
+from game.status import ACTION_INDEX, ACTIONS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY, name TEXT, created REAL, engine TEXT, model TEXT, seed INTEGER,
+    n_agents INTEGER, food INTEGER, turns INTEGER, params TEXT,
+    turns_played INTEGER, final_population INTEGER, final_food INTEGER, final_knowledge INTEGER, survived INTEGER
+);
+CREATE INDEX IF NOT EXISTS runs_food ON runs (food, survived);
+CREATE INDEX IF NOT EXISTS runs_model ON runs (model);
+CREATE TABLE IF NOT EXISTS turns (
+    run_id INTEGER, turn INTEGER, population INTEGER, food INTEGER, knowledge INTEGER,
+    PRIMARY KEY (run_id, turn)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS actions (run_id INTEGER, turn INTEGER, agent INTEGER, action INTEGER, target INTEGER);
+CREATE INDEX IF NOT EXISTS actions_run ON actions (run_id, turn);
+CREATE INDEX IF NOT EXISTS actions_action ON actions (action, run_id);
+CREATE TABLE IF NOT EXISTS titles (
+    run_id INTEGER, turn INTEGER, title TEXT, agents INTEGER,
+    PRIMARY KEY (run_id, turn, title)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS titles_turn ON titles (turn, title, agents);
+"""
+
+# Columns of runs the query helpers may filter and group on
+RUN_COLUMNS = ("name", "engine", "model", "seed", "n_agents", "food", "turns", "params", "survived")
+
+
+def agent_id(name: Optional[str]) -> Optional[int]:
+    """The number of an "Agent N" name"""
+    number = name.rsplit(" ", 1)[-1] if name else ""
+    return int(number) if number.isdigit() else None
+
+
+class RunRecorder:
+    """
+    One game as the store keeps it, collected while the game is played: set it as the GameState's
+    recorder, the state reports every counted action, and call end_turn at the end of every turn.
+    """
+
+    def __init__(self, seed: Optional[int], n_agents: int, food: int, turns: int, engine: str = "llm",
+                 model: Optional[str] = None, params: Optional[dict] = None, name: Optional[str] = None,
+                 knowledge: int = 0):
+        self.run = {"name": name, "engine": engine, "model": model, "seed": seed, "n_agents": n_agents, "food": food,
+                    "turns": turns, "params": json.dumps(params or {}, sort_keys=True)}
+        self.turns = [(0, n_agents, food, knowledge)]  # (turn, population, food, knowledge)
+        self.actions = []  # (turn, agent, action code, target)
+        self.titles = []  # (turn, title, agents)
+        self.outcome = None  # (turns played, population, food, knowledge)
+        self.turn = 1  # Turn being played, stamped on the actions
+
+    @classmethod
+    def for_simulation(cls, simulation, turns: int, engine: str = "llm", name: Optional[str] = None) -> "RunRecorder":
+        """Recorder of a Simulation, attached to its state from its next turn on"""
+        settings = simulation.settings()
+        recorder = cls(settings["seed"], settings["n_agents"], settings["food"], turns, engine, settings["model_id"],
+                       settings["balance"], name, settings["knowledge"])
+        recorder.turn = simulation.turn + 1
+        simulation.state.recorder = recorder
+        return recorder
+
+    def action(self, agent: str, action: str, target: Optional[str] = None):
+        self.actions.append((self.turn, agent_id(agent), ACTION_INDEX.get(action, -1), agent_id(target)))
+
+    def end_turn(self, turn: int, population: int, food: int, knowledge: int, titles: Optional[dict] = None):
+        self.turns.append((turn, population, food, knowledge))
+        self.turn = turn + 1
+        if titles:
+            self.titles.extend((turn, title, agents) for title, agents in titles.items())
+
+    def finish(self, turns_played: int, population: int, food: int, knowledge: int):
+        self.outcome = (turns_played, population, food, knowledge)
+
+
+class RunStore:
+    def __init__(self, path="runs/runs.sqlite"):
+        self.path = Path(path)
+        if self.path != Path(":memory:"):
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def add(self, recorder: RunRecorder) -> int:
+        """Write a recorded game, returns its run id"""
+        turns_played, population, food, knowledge = recorder.outcome or recorder.turns[-1]
+        run = {**recorder.run, "created": time.time(), "turns_played": turns_played, "final_population": population,
+               "final_food": food, "final_knowledge": knowledge, "survived": int(population > 1)}
+        with self._db:
+            self._db.execute("BEGIN")
+            cursor = self._db.execute(f"INSERT INTO runs ({', '.join(run)}) VALUES ({', '.join('?' * len(run))})",
+                                      tuple(run.values()))
+            run_id = cursor.lastrowid
+            self._db.executemany("INSERT OR REPLACE INTO turns VALUES (?, ?, ?, ?, ?)",
+                                 ((run_id, *row) for row in recorder.turns))
+            self._db.executemany("INSERT INTO actions VALUES (?, ?, ?, ?, ?)", ((run_id, *row) for row in recorder.actions))
+            self._db.executemany("INSERT OR REPLACE INTO titles VALUES (?, ?, ?, ?)",
+                                 ((run_id, *row) for row in recorder.titles))
+        return run_id
+
+    def _where(self, filters: dict) -> tuple[str, list]:
+        """WHERE clause on runs columns, e.g. engine="headless", food=10"""
+        unknown = set(filters) - set(RUN_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown run columns: {', '.join(sorted(unknown))}")
+        if not filters:
+            return "", []
+        return " WHERE " + " AND ".join(f"runs.{name} = ?" for name in filters), list(filters.values())
+
+    def _column(self, name: str) -> str:
+        if name not in RUN_COLUMNS:
+            raise ValueError(f"Unknown run column {name!r}")
+        return f"runs.{name}"
+
+    def count(self, **filters) -> int:
+        where, values = self._where(filters)
+        return self._db.execute(f"SELECT COUNT(*) FROM runs{where}", values).fetchone()[0]
+
+    def runs(self, **filters) -> list[dict]:
+        where, values = self._where(filters)
+        cursor = self._db.execute(f"SELECT * FROM runs{where} ORDER BY run_id", values)
+        names = [column[0] for column in cursor.description]
+        return [dict(zip(names, row)) for row in cursor]
+
+    def turns(self, run_id: int) -> list[tuple[int, int, int, int]]:
+        """(turn, population, food, knowledge) of a run"""
+        return self._db.execute("SELECT turn, population, food, knowledge FROM turns WHERE run_id = ? ORDER BY turn",
+                                (run_id,)).fetchall()
+
+    def extinction_rate(self, by: str = "food", **filters) -> dict:
+        """Share of the runs that ended with at most one agent, by starting food (or another run column): value -> (runs, rate)"""
+        where, values = self._where(filters)
+        column = self._column(by)
+        rows = self._db.execute(f"SELECT {column}, COUNT(*), 1.0 - AVG(survived) FROM runs{where} GROUP BY {column}",
+                                values)
+        return {value: (runs, rate) for value, runs, rate in rows}
+
+    def title_distribution(self, turn: int, **filters) -> dict[str, float]:
+        """Share of the agents alive at the end of `turn` holding each title, over the runs still going"""
+        where, values = self._where(filters)
+        join = " JOIN runs ON runs.run_id = titles.run_id" if filters else ""
+        where = where.replace(" WHERE ", " AND ", 1)
+        rows = self._db.execute(f"SELECT title, SUM(agents) FROM titles{join} WHERE titles.turn = ?{where} GROUP BY title",
+                                [turn, *values]).fetchall()
+        total = sum(agents for _, agents in rows)
+        return {title: agents / total for title, agents in sorted(rows, key=lambda row: -row[1])}
+
+    def kills_per_100_turns(self, by: Optional[str] = None, **filters) -> dict:
+        """Kills per 100 turns played, overall (key None) or by a run column"""
+        where, values = self._where(filters)
+        group = self._column(by) if by else "NULL"
+        kills = dict(self._db.execute(
+            f"SELECT {group}, COUNT(*) FROM actions JOIN runs ON runs.run_id = actions.run_id "
+            f"WHERE actions.action = ?{where.replace(' WHERE ', ' AND ', 1)} GROUP BY {group}",
+            [ACTION_INDEX["kill_agent"], *values]))
+        played = self._db.execute(f"SELECT {group}, SUM(turns_played) FROM runs{where} GROUP BY {group}", values)
+        return {key: 100 * kills.get(key, 0) / turns if turns else 0.0 for key, turns in played}
+
+    def action_mix(self, **filters) -> dict[str, float]:
+        """Share of each action over the matching runs"""
+        where, values = self._where(filters)
+        join = " JOIN runs ON runs.run_id = actions.run_id" if filters else ""
+        rows = self._db.execute(f"SELECT action, COUNT(*) FROM actions{join}{where} GROUP BY action", values).fetchall()
+        total = sum(count for _, count in rows)
+        return {ACTIONS[action] if action >= 0 else "other": count / total for action, count in rows}
+
+    def close(self):
+        self._db.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Query a store of played games")
+    parser.add_argument("store", nargs="?", default="runs/runs.sqlite")
+    parser.add_argument("--turn", type=int, default=10, help="turn of the title distribution")
+    parser.add_argument("--engine", help="only the runs of this engine (llm, headless)")
+    args = parser.parse_args()
+
+    store = RunStore(args.store)
+    filters = {"engine": args.engine} if args.engine else {}
+    if not store.count(**filters):
+        print(f"No runs in {args.store}" + (f" for the {args.engine} engine" if args.engine else ""))
+        raise SystemExit(0)
+    started = time.perf_counter()
+    extinction = store.extinction_rate(**filters)
+    titles = store.title_distribution(args.turn, **filters)
+    kills = store.kills_per_100_turns(**filters).get(None, 0.0)
+    elapsed = time.perf_counter() - started
+
+    print(f"{store.count(**filters)} runs")
+    for food, (runs, rate) in sorted(extinction.items()):
+        print(f"Starting food {food}: {rate:.1%} extinct over {runs} runs")
+    print(f"Titles at turn {args.turn}: " + ", ".join(f"{title} {share:.1%}" for title, share in titles.items()))
+    print(f"Kills per 100 turns: {kills:.1f}")
+    print(f"Queried in {elapsed * 1000:.1f}ms")
@@ -0,0 +1,197 @@
+"""
+Local OpenAI-compatible chat completions server answering like game/fake_model.py, with the
+throttling of a real provider: requests/min and tokens/min limits answered by 429s with
+Retry-After, random errors and a latency distribution. Decisions are valid tool calls for the six
+actions, drawn from a configurable mix (fake_model.POLICIES or any weights); with a seed, the answer to
+a conversation is always the same, so a seeded game is reproducible. Point the game at it
+with the "stub" model provider (game/agents.py), which can also start one in-process, or with
+OPENAI_BASE_URL=http://127.0.0.1:8008/v1 to load-test concurrency and rate limiting offline.
+"""
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from uuid import uuid4
+
+from game.fake_model import POLICIES, fake_reply, weighted_policies
+from game.scheduler import TokenBucket
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "lognormal", "exponential")
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 8008), requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None, latency: float = 0.2, jitter: float = 0.1,
+                 latency_distribution: str = "uniform", error_rate: float = 0.0, errors: Optional[dict[int, float]] = None,
+                 policy="random", seed: Optional[int] = None):
+        super().__init__(address, StubHandler)
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution {latency_distribution!r}")
+        # Providers enforce their limits over short windows: one second worth of burst
+        self.requests = TokenBucket(requests_per_minute, burst=1.0) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, burst=1.0) if tokens_per_minute else None
+        # Seconds per completion: `latency` ± `jitter` (uniform), `latency` median with log-sd `jitter` (lognormal),
+        # `latency` mean (exponential) or always `latency` (fixed)
+        self.latency = latency
+        self.jitter = jitter
+        self.latency_distribution = latency_distribution
+        self.errors = {500: error_rate, **(errors or {})}  # HTTP status -> share of the requests answered with it
+        # Name in fake_model.POLICIES or {action: weight}
+        self.weights = POLICIES[policy] if isinstance(policy, str) else policy
+        weighted_policies(self.weights)  # Fail on unknown actions now rather than on the first request
+        self.seed = seed
+        self.rng = random.Random(seed)  # Errors and latencies
+        self.lock = threading.Lock()
+        self.counts = {"served": 0, "throttled": 0, "errors": 0}
+        self.thread = None  # Serving thread, when started by start()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def reply(self, messages: list[dict]) -> dict:
+        """
+        Assistant message answering a conversation. A seeded server draws it from an RNG seeded by the seed and
+        the conversation, so the same game gets the same answers whatever order its concurrent requests arrive in.
+        """
+        rng = random.Random(f"{self.seed}:{json.dumps(messages, sort_keys=True)}" if self.seed is not None else None)
+        prompt = next((message.get("content") or "" for message in reversed(messages) if message.get("role") == "user"), "")
+        if isinstance(prompt, list):  # Content parts
+            prompt = "".join(part.get("text", "") for part in prompt if isinstance(part, dict))
+        policy, batch_policy = weighted_policies(self.weights, rng=rng)
+        return fake_reply(messages[-1].get("role", "user") if messages else "user", prompt, policy, batch_policy, rng)
+
+    def close(self):
+        """Stop serving and release the port"""
+        if self.thread is not None:
+            self.shutdown()
+            self.thread.join()
+            self.thread = None
+        self.server_close()
+
+    def admit(self, tokens: int) -> tuple[int, float]:
+        """HTTP status of a request of `tokens` tokens, with the seconds to wait before retrying when throttled"""
+        with self.lock:
+            draw = self.rng.random()
+            for status, rate in self.errors.items():
+                if draw < rate:
+                    self.counts["errors"] += 1
+                    return status, 0.0
+                draw -= rate
+            wait = self.requests.try_take(1) if self.requests is not None else 0.0
+            if not wait and self.tokens is not None:
+                wait = self.tokens.try_take(min(tokens, self.tokens.capacity))
+                if wait and self.requests is not None:
+                    self.requests.refund(1)
+            if wait:
+                self.counts["throttled"] += 1
+                return 429, wait
+            self.counts["served"] += 1
+            return 200, 0.0
+
+    def delay(self) -> float:
+        with self.lock:
+            if self.latency_distribution == "uniform":
+                return max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+            if self.latency_distribution == "lognormal":
+                return self.rng.lognormvariate(math.log(self.latency), self.jitter) if self.latency > 0 else 0.0
+            if self.latency_distribution == "exponential":
+                return self.rng.expovariate(1 / self.latency) if self.latency > 0 else 0.0
+            return self.latency
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server: StubServer
+
+    def log_message(self, format, *args):
+        pass  # Quiet, the counts tell what happened
+
+    def _send(self, status: int, body: dict, headers: Optional[dict] = None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send(404, {"error": {"message": f"Unknown endpoint {self.path}"}})
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        messages = request.get("messages", [])
+        prompt_tokens = sum(len(json.dumps(message.get("content") or "")) for message in messages) // 4
+
+        status, wait = self.server.admit(prompt_tokens)
+        if status == 429:
+            self._send(429, {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                       {"retry-after-ms": str(math.ceil(wait * 1000)), "retry-after": str(math.ceil(wait))})
+            return
+        if status != 200:
+            self._send(status, {"error": {"message": "The server had an error while processing your request"}})
+            return
+
+        time.sleep(self.server.delay())
+        reply = self.server.reply(messages)
+        completion_tokens = (len(reply.get("content") or "") + len(json.dumps(reply.get("tool_calls", [])))) // 4
+        self._send(200, {
+            "id": f"chatcmpl-{uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", **reply},
+                "finish_reason": "tool_calls" if reply.get("tool_calls") else "stop",
+            }],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        })
+
+
+def start(port: int = 0, **kwargs) -> StubServer:
+    """Serve in a background thread (on a free port by default), until close()"""
+    server = StubServer(("127.0.0.1", port), **kwargs)
+    server.thread = threading.Thread(target=server.serve_forever, name="stub-server", daemon=True)
+    server.thread.start()
+    return server
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub server with provider-like throttling")
+    parser.add_argument("--port", type=int, default=8008)
+    parser.add_argument("--rpm", type=float, help="requests per minute before answering 429")
+    parser.add_argument("--tpm", type=float, help="tokens per minute before answering 429")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per completion")
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--latency-distribution", choices=LATENCY_DISTRIBUTIONS, default="uniform")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with a 500")
+    parser.add_argument("--error", action="append", default=[], metavar="STATUS=RATE",
+                        help="share of requests answered with another status, e.g. 503=0.01, repeatable")
+    parser.add_argument("--policy", default="random",
+                        help=f"action mix: one of {', '.join(POLICIES)} or weights like add_food=3,steal_food=1")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    policy = args.policy
+    if policy not in POLICIES:
+        policy = {action: float(weight) for action, _, weight in (item.partition("=") for item in policy.split(","))}
+    errors = {int(status): float(rate) for status, _, rate in (item.partition("=") for item in args.error)}
+    server = StubServer(("127.0.0.1", args.port), requests_per_minute=args.rpm, tokens_per_minute=args.tpm,
+                        latency=args.latency, jitter=args.jitter, latency_distribution=args.latency_distribution,
+                        error_rate=args.error_rate, errors=errors, policy=policy, seed=args.seed)
+    print(f"Serving on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(server.counts)
@@ -0,0 +1,257 @@
+"""
+Parameter sweeps: play many seeded games for every point of a parameter grid (or random sample)
+on a process pool, stream the outcomes to CSV/Parquet chunks and aggregate survival statistics.
+
+Parameters are run settings (turns, n_agents, food, policy) or fields of game.balance.Balance,
+e.g. knowledge_decay, food_consumption or food_decay_tiers. Policies are named in headless.POLICIES;
+the batch engine only plays the fixed action weights of headless.WEIGHTS.
+Writing the chunks takes pandas, and pyarrow for Parquet: the `sweep` extra of the project.
+"""
+import importlib.util
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from game.balance import Balance
+
+RUN_SETTINGS = {"turns": 100, "n_agents": 10, "food": 10, "policy": "random"}
+
+
+def grid(**axes) -> list[dict]:
+    """Every combination of the given parameter values, e.g. grid(food=[5, 10], knowledge_decay=[0.05, 0.1])"""
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*axes.values())]
+
+
+def random_sample(n: int, seed: int = 0, **ranges) -> list[dict]:
+    """
+    `n` random parameter sets. A range is (low, high) - ints give integers, floats give uniform floats -
+    or a list of values to choose from.
+    """
+    rng = random.Random(seed)
+    samples = []
+    for _ in range(n):
+        point = {}
+        for name, values in ranges.items():
+            if isinstance(values, tuple):
+                low, high = values
+                point[name] = rng.randint(low, high) if isinstance(low, int) and isinstance(high, int) else rng.uniform(low, high)
+            else:
+                point[name] = rng.choice(values)
+        samples.append(point)
+    return samples
+
+
+def split_params(params: dict, engine: str = "headless") -> tuple[dict, Balance]:
+    """Run settings (with defaults) and the Balance described by a parameter set"""
+    from game.headless import POLICIES, WEIGHTS
+
+    unknown = set(params) - set(RUN_SETTINGS) - set(Balance.model_fields)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {', '.join(sorted(unknown))}")
+    settings = {name: params.get(name, default) for name, default in RUN_SETTINGS.items()}
+    policies = WEIGHTS if engine == "batch" else POLICIES
+    if settings["policy"] not in policies:
+        raise ValueError(f"Policy {settings['policy']!r} can't be played by the {engine} engine, "
+                         f"expected one of {', '.join(policies)}")
+    balance = Balance(**{name: value for name, value in params.items() if name in Balance.model_fields})
+    return settings, balance
+
+
+def task_seeds(base_seed: int, task_index: int, n_games: int) -> list[int]:
+    """Independent per-task seeds, stable whatever worker runs the task"""
+    return np.random.SeedSequence([base_seed, task_index]).generate_state(n_games).tolist()
+
+
+def run_task(task_index: int, params: dict, n_games: int, base_seed: int, engine: str = "headless",
+             record: bool = False) -> list[dict]:
+    """Play `n_games` games with a parameter set; one row per game, with its game.store.RunRecorder if `record`"""
+    settings, balance = split_params(params, engine)
+    seeds = task_seeds(base_seed, task_index, n_games)
+    common = {"task": task_index, "params": json.dumps(params, sort_keys=True)}
+
+    if engine == "batch":
+        if record:
+            raise ValueError("The batch engine plays games as arrays, it cannot record them")
+        from game.batch import run_batch
+        from game.headless import WEIGHTS
+
+        result = run_batch(n_games, WEIGHTS[settings["policy"]], turns=settings["turns"], n_agents=settings["n_agents"],
+                           food=settings["food"], seed=seeds[0], balance=balance)
+        # The whole batch shares one seed
+        outcomes = zip(itertools.repeat(seeds[0]), result.turns_played.tolist(), result.population.tolist(),
+                       result.food.tolist(), result.knowledge.tolist())
+    else:
+        from game.headless import POLICIES, run_game
+
+        from game.store import RunRecorder
+
+        policy = POLICIES[settings["policy"]]
+        outcomes, recorders = [], []
+        for seed in seeds:
+            recorder = RunRecorder(seed, settings["n_agents"], settings["food"], settings["turns"], "headless",
+                                   params=params) if record else None
+            game = run_game(policy, turns=settings["turns"], n_agents=settings["n_agents"], food=settings["food"],
+                            seed=seed, record_history=False, balance=balance, recorder=recorder)
+            outcomes.append((seed, game.turns_played, game.population, game.food, game.knowledge))
+            recorders.append(recorder)
+
+    rows = [
+        {**common, "seed": seed, "turns": settings["turns"], "turns_played": turns_played,
+         "population": population, "food": food, "knowledge": knowledge, "survived": population > 1}
+        for seed, turns_played, population, food, knowledge in outcomes
+    ]
+    if record:
+        for row, recorder in zip(rows, recorders):
+            row["recording"] = recorder
+    return rows
+
+
+def check_format(fmt: str):
+    """Fail before any game is played when the chunks can't be written in `fmt`"""
+    needed = ("pandas", "pyarrow") if fmt == "parquet" else ("pandas",)
+    missing = [module for module in needed if importlib.util.find_spec(module) is None]
+    if missing:
+        raise ImportError(f"Writing {fmt} sweep chunks needs {' and '.join(missing)}: "
+                          f"install the sweep extra (uv sync --extra sweep) or use another format")
+
+
+def _write_chunk(rows: list[dict], out_dir: Path, task_index: int, fmt: str) -> Path:
+    import pandas as pd
+
+    frame = pd.DataFrame(rows)
+    path = out_dir / f"chunk_{task_index:05d}.{fmt}"
+    if fmt == "parquet":
+        frame.to_parquet(path, index=False)
+    else:
+        frame.to_csv(path, index=False)
+    return path
+
+
+def run_sweep(points: list[dict], games_per_point: int = 100, out_dir: str = "sweeps/latest", jobs: Optional[int] = None,
+              seed: int = 0, engine: str = "headless", fmt: str = "csv", games_per_task: int = 50,
+              store: Optional[str] = None) -> Path:
+    """
+    Fan the games of every parameter set out over a process pool (all cores by default). Each task
+    plays up to `games_per_task` games and its rows are written as one chunk file as soon as it ends,
+    and its games into the run store at `store` (game/store.py) if given.
+    """
+    check_format(fmt)
+    tasks = []
+    for point in points:
+        split_params(point, engine)  # Fail fast on unknown parameters and policies
+        for start in range(0, games_per_point, games_per_task):
+            tasks.append((len(tasks), point, min(games_per_task, games_per_point - start)))
+
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    for old_chunk in out.glob("chunk_*"):
+        old_chunk.unlink()
+
+    (out / "sweep.json").write_text(json.dumps({
+        "points": points, "games_per_point": games_per_point, "seed": seed, "engine": engine, "tasks": len(tasks),
+    }, indent=2))
+
+    run_store = None
+    if store is not None:
+        from game.store import RunStore
+
+        run_store = RunStore(store)
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        futures = [pool.submit(run_task, index, point, n_games, seed, engine, store is not None)
+                   for index, point, n_games in tasks]
+        for done, future in enumerate(as_completed(futures), 1):
+            rows = future.result()
+            if run_store is not None:
+                for row in rows:
+                    run_store.add(row.pop("recording"))
+            _write_chunk(rows, out, rows[0]["task"], fmt)
+            print(f"\r{done}/{len(tasks)} tasks ({time.perf_counter() - started:.1f}s)", end="", flush=True)
+    print()
+    if run_store is not None:
+        run_store.close()
+    return out
+
+
+def load_results(out_dir: str):
+    """All the game rows of a sweep, as a DataFrame"""
+    import pandas as pd
+
+    chunks = sorted(Path(out_dir).glob("chunk_*"))
+    return pd.concat([pd.read_parquet(c) if c.suffix == ".parquet" else pd.read_csv(c) for c in chunks], ignore_index=True)
+
+
+def summarize(out_dir: str):
+    """
+    Aggregate a sweep per parameter set: extinction rate, time to collapse and survival curves.
+    Writes summary.csv and survival.csv (share of colonies still standing at each turn) next to the chunks.
+    """
+    import pandas as pd
+
+    results = load_results(out_dir)
+    collapsed = results[~results["survived"]]
+    summary = results.groupby("params").agg(games=("seed", "size"), extinction_rate=("survived", lambda s: 1 - s.mean()),
+                                            mean_population=("population", "mean"), mean_knowledge=("knowledge", "mean"))
+    collapse = collapsed.groupby("params")["turns_played"].agg(["mean", "median"]).rename(
+        columns={"mean": "mean_turns_to_collapse", "median": "median_turns_to_collapse"})
+    summary = summary.join(collapse)
+
+    # Survival curve: a colony that collapsed during turn t is standing at turns < t
+    max_turns = int(results["turns"].max())
+    turns = np.arange(max_turns + 1)
+    curves = {}
+    for params, group in results.groupby("params"):
+        collapse_turns = np.where(group["survived"], max_turns + 1, group["turns_played"]).astype(int)
+        counts = np.bincount(collapse_turns, minlength=max_turns + 2)
+        curves[params] = 1 - np.cumsum(counts)[:max_turns + 1] / len(group)
+    survival = pd.DataFrame(curves, index=pd.Index(turns, name="turn"))
+
+    summary.to_csv(Path(out_dir) / "summary.csv")
+    survival.to_csv(Path(out_dir) / "survival.csv")
+    return summary, survival
+
+
+def _parse_axis(text: str) -> tuple[str, list]:
+    """name=v1,v2,... with Python literal values, or name=low:high for random sampling ranges"""
+    import ast
+
+    name, _, values = text.partition("=")
+    if ":" in values and not values.startswith(("[", "(")):
+        low, high = values.split(":")
+        return name, tuple(ast.literal_eval(v) for v in (low, high))
+    return name, list(ast.literal_eval(f"[{values}]"))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sweep colony parameters over a process pool")
+    parser.add_argument("--grid", action="append", default=[], metavar="NAME=V1,V2", help="grid axis, repeatable")
+    parser.add_argument("--sample", type=int, help="random parameter sets instead of a grid, using NAME=LOW:HIGH axes")
+    parser.add_argument("--games", type=int, default=100, help="games per parameter set")
+    parser.add_argument("--jobs", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--engine", choices=["headless", "batch"], default="headless")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--out", default="sweeps/latest")
+    parser.add_argument("--store", metavar="PATH", help="also record every game into a run store (game/store.py)")
+    args = parser.parse_args()
+    try:
+        check_format(args.format)
+    except ImportError as error:
+        parser.error(str(error))
+
+    axes = dict(_parse_axis(axis) for axis in args.grid)
+    points = random_sample(args.sample, args.seed, **axes) if args.sample else grid(**axes)
+    out = run_sweep(points, args.games, args.out, args.jobs, args.seed, args.engine, args.format, store=args.store)
+    summary, _ = summarize(out)
+    print(summary.to_string())
@@ -0,0 +1,120 @@
+"""
+Instrumentation of a game: a JSON-lines trace with one event per agent call (LLM wall time, tokens,
+model calls, errors), per tool run and per turn (population, time spent deciding, plotting and in
+the end-of-turn phase), plus an end-of-run summary with latency percentiles and tokens per turn
+against population, to spot where the cost stops scaling with the colony.
+"""
+import json
+from pathlib import Path
+from typing import Optional
+
+
+def response_tokens(response) -> tuple[int, int, int]:
+    """Prompt tokens, completion tokens and model calls of an agno RunResponse"""
+    metrics = getattr(response, "metrics", None) or {}
+    return sum(metrics.get("input_tokens", ())), sum(metrics.get("output_tokens", ())), len(metrics.get("time", ()))
+
+
+def percentiles(values, points=(50, 95, 99)) -> dict[str, float]:
+    if not len(values):
+        return {f"p{p}": 0.0 for p in points}
+    import numpy as np
+
+    return {f"p{p}": float(v) for p, v in zip(points, np.percentile(values, points))}
+
+
+class Tracer:
+    def __init__(self, path=None, append: bool = False):
+        self.path = Path(path) if path is not None else None
+        self.turn = 0
+        self.calls = []  # (wall time, prompt tokens, completion tokens) per agent call
+        self.tool_times = []
+        self.turns = []  # Turn events
+        self.errors = 0
+        self._turn_tokens = 0
+        self._file = None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a" if append else "w", encoding="utf-8")
+
+    def _write(self, event: dict):
+        if self._file is not None:
+            self._file.write(json.dumps(event, separators=(",", ":")) + "\n")
+
+    def agent_call(self, agent: str, mode: str, wall: float, response=None, error: Optional[BaseException] = None,
+                   cached: bool = False, agents: int = 1, retries: int = 0):
+        """One decision request: a single agent (sequential/concurrent) or a group of `agents` (batched)"""
+        prompt_tokens, completion_tokens, model_calls = response_tokens(response)
+        self._turn_tokens += prompt_tokens + completion_tokens
+        if not cached:
+            self.calls.append((wall, prompt_tokens, completion_tokens))
+        self.errors += error is not None
+        self._write({
+            "event": "call", "turn": self.turn, "agent": agent, "mode": mode, "agents": agents, "wall": round(wall, 6),
+            "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "model_calls": model_calls,
+            "retries": retries, "cached": cached, "error": repr(error) if error is not None else None,
+        })
+
+    def tool(self, agent: str, tool: str, elapsed: float, error: Optional[BaseException] = None):
+        self.tool_times.append(elapsed)
+        self.errors += error is not None
+        self._write({"event": "tool", "turn": self.turn, "agent": agent, "tool": tool, "time": round(elapsed, 6),
+                     "error": repr(error) if error is not None else None})
+
+    def end_turn(self, population: int, phases: dict[str, float]):
+        """Close the turn: population at its start and seconds spent in each phase"""
+        event = {"event": "turn", "turn": self.turn, "population": population, "tokens": self._turn_tokens,
+                 **{name: round(seconds, 6) for name, seconds in phases.items()}}
+        self.turns.append(event)
+        self._turn_tokens = 0
+        self._write(event)
+        if self._file is not None:
+            self._file.flush()
+
+    def summary(self) -> dict:
+        import numpy as np
+
+        calls = np.array(self.calls, dtype=float).reshape(-1, 3)
+        populations = np.array([turn["population"] for turn in self.turns], dtype=float)
+        tokens = np.array([turn["tokens"] for turn in self.turns], dtype=float)
+        summary = {
+            "turns": len(self.turns),
+            "calls": len(calls),
+            "errors": self.errors,
+            "call_latency": percentiles(calls[:, 0]),
+            "tool_time": percentiles(self.tool_times),
+            "prompt_tokens": int(calls[:, 1].sum()),
+            "completion_tokens": int(calls[:, 2].sum()),
+        }
+        for phase in ("decide", "plot", "end_turn", "natural_death", "decay", "starvation"):
+            summary[f"{phase}_time"] = percentiles([turn.get(phase, 0.0) for turn in self.turns])
+        # Tokens per turn against the population: the slope is the marginal cost of one more agent
+        if len(populations) > 1 and np.ptp(populations) > 0:
+            slope, intercept = np.polyfit(populations, tokens, 1)
+            summary["tokens_per_agent"] = float(slope)
+            summary["tokens_base"] = float(intercept)
+        summary["tokens_by_population"] = {
+            int(population): float(tokens[populations == population].mean()) for population in np.unique(populations)
+        }
+        return summary
+
+    def print_summary(self, console):
+        from rich.table import Table
+
+        summary = self.summary()
+        table = Table(title=f"Trace: {summary['turns']} turns, {summary['calls']} calls, {summary['errors']} errors")
+        table.add_column("Timing (s)")
+        for point in ("p50", "p95", "p99"):
+            table.add_column(point, justify="right")
+        for name in ("call_latency", "tool_time", "decide_time", "plot_time", "end_turn_time", "natural_death_time",
+                     "decay_time", "starvation_time"):
+            table.add_row(name, *(f"{value:.4f}" for value in summary[name].values()))
+        console.print(table)
+        console.print(f"Tokens: {summary['prompt_tokens']} prompt, {summary['completion_tokens']} completion")
+        if "tokens_per_agent" in summary:
+            console.print(f"Tokens per turn ≈ {summary['tokens_base']:.0f} + {summary['tokens_per_agent']:.0f} × population")
+
+    def close(self):
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+
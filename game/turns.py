@@ -0,0 +1,242 @@
+import asyncio
+import json
+import time
+from typing import Optional
+
+from pydantic import BaseModel, Field, ValidationError
+from rich.console import Console
+
+from game.agents import AgentRecord
+from game.scheduler import Scheduler
+from game.status import GameState
+from prompts.agents_instructions import batch_choices, choices
+from tools.actions import ACTIONS, apply_pending_actions
+
+console = Console()
+
+# Kept across turns, so the shared async HTTP client stays bound to a live loop
+_loop = None
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+    return _loop
+
+
+def _report(game_state: GameState, kind: str, message: str, style: str, **fields):
+    """Report a failure of the turn: an event on the game's bus, or the console line when the game has none"""
+    if game_state.events is None:
+        console.print(message, style=style)
+    else:
+        game_state.emit(kind, message=message, **fields)
+
+
+def _decided(game_state: GameState, model: AgentRecord, response, mode: str):
+    """Report the decision of an agent asked during a concurrent or batched turn; its action comes later"""
+    if game_state.events is None:
+        if response.content:
+            console.print(f"{model.name}: \"", response.content, "\"", style="dim")
+        return
+    tools = getattr(response, "tools", None)
+    game_state.emit("decision", agent=model.name, content=response.content,
+                    tool=tools[0].tool_name if tools else None, mode=mode)
+
+
+def action_marker(game_state: GameState, agent_name: str) -> int:
+    """Changes once a tool call of the agent has been applied or queued"""
+    queued = sum(entry[0] == agent_name for entry in game_state.pending_actions or ())
+    return queued + game_state.get_agent_state(agent_name).total
+
+
+def estimate_tokens(prompt: str) -> int:
+    """Rough size of a prompt, refined by the scheduler against the actual usage"""
+    return len(prompt) // 4
+
+
+async def _decide(game_state: GameState, model: AgentRecord, scheduler: Scheduler, mode: str = "concurrent",
+                  priority: int = 0):
+    """Ask a single agent for its decision through the scheduler"""
+    choice_message = choices(agent_name=model.name, game_state=game_state)
+    if game_state.replay_log is not None:
+        game_state.replay_log.prompt(model.name, choice_message)
+    tracer = game_state.tracer
+
+    cache = game_state.decision_cache
+    if cache is not None:
+        started = time.perf_counter()
+        key, cached = cache.lookup(game_state, model)
+        if cached is not None:
+            if tracer is not None:
+                tracer.agent_call(model.name, mode, time.perf_counter() - started, cached=True)
+            return cached
+
+    # A request failing after the agent's tool call went through must not be retried: it would act twice
+    marker = action_marker(game_state, model.name)
+    started = time.perf_counter()
+    try:
+        response, retries = await scheduler.run(
+            lambda: model.arun(choice_message), priority=priority, tokens=estimate_tokens(choice_message), kind=mode,
+            retry_if=lambda: action_marker(game_state, model.name) == marker,
+        )
+    except BaseException as error:
+        if tracer is not None:
+            tracer.agent_call(model.name, mode, time.perf_counter() - started, error=error)
+        if not isinstance(error, Exception) or action_marker(game_state, model.name) == marker:
+            raise
+        return model.agent.run_response  # Only the closing reply failed, the decision was taken
+    if tracer is not None:
+        tracer.agent_call(model.name, mode, time.perf_counter() - started, response, retries=retries)
+    if cache is not None:
+        cache.remember(key, game_state, model, response)
+    return response
+
+
+async def arun_concurrent_turn(game_state: GameState, max_concurrency: int = 8,
+                               scheduler: Optional[Scheduler] = None) -> list[tuple[str, str, str]]:
+    """
+    Request every living agent's decision at the same time, then apply the tool calls in turn order.
+    All agents decide on the same start-of-turn state; queued calls are resolved deterministically
+    in the order of the population snapshot, so a seeded run always gives the same outcome.
+    Requests go through `scheduler`, else the game's, else one allowing `max_concurrency` requests in flight;
+    games played side by side can share one to share the rate limits. Earlier agents are served first.
+    """
+    agents = game_state.models.snapshot()
+    game_state.current_agent = None
+    game_state.pending_actions = []
+    scheduler = scheduler or game_state.scheduler or Scheduler(max_concurrency)
+
+    try:
+        responses = await asyncio.gather(*(_decide(game_state, model, scheduler, priority=index)
+                                           for index, model in enumerate(agents)),
+                                         return_exceptions=True)
+    except BaseException:
+        game_state.pending_actions = None
+        raise
+
+    for model, response in zip(agents, responses):
+        if isinstance(response, BaseException):
+            _report(game_state, "decision_error", f"{model.name} failed to decide: {response}", "bold red",
+                    agent=model.name, error=str(response))
+        else:
+            _decided(game_state, model, response, "concurrent")
+
+    return apply_pending_actions(game_state, agents)
+
+
+def run_concurrent_turn(game_state: GameState, max_concurrency: int = 8) -> list[tuple[str, str, str]]:
+    """Blocking version of arun_concurrent_turn"""
+    return get_loop().run_until_complete(arun_concurrent_turn(game_state, max_concurrency))
+
+
+class BatchDecision(BaseModel):
+    """One entry of a batched reply"""
+    agent: str
+    tool: str
+    arguments: dict = Field(default_factory=dict)
+
+
+def parse_batch_decisions(content: Optional[str], game_state: GameState, agent_names: list[str]) -> dict[str, tuple[str, dict]]:
+    """Valid decisions of a batched reply, by agent name. Malformed or unexpected entries are left out."""
+    text = content or ""
+    start, end = text.find("["), text.rfind("]")
+    if start < 0 or end < start:
+        return {}
+    try:
+        entries = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(entries, list):
+        return {}
+
+    expected = set(agent_names)
+    decisions = {}
+    for entry in entries:
+        try:
+            decision = BatchDecision.model_validate(entry)
+        except ValidationError:
+            continue
+        if decision.agent not in expected or decision.agent in decisions:
+            continue
+        if decision.tool == "kill_agent":
+            target = decision.arguments.get("agent_name")
+            if set(decision.arguments) != {"agent_name"} or target == decision.agent or target not in game_state.models:
+                continue
+        elif decision.tool not in ACTIONS or decision.arguments:
+            continue
+        decisions[decision.agent] = (decision.tool, decision.arguments)
+    return decisions
+
+
+async def _decide_group(game_state: GameState, group: list[AgentRecord], index: int,
+                        scheduler: Scheduler) -> list[AgentRecord]:
+    """Ask for the decisions of a whole group in one request and queue them. Returns the agents left without one."""
+    names = [model.name for model in group]
+    prompt = batch_choices(names, game_state)
+    if game_state.replay_log is not None:
+        for name in names:
+            game_state.replay_log.prompt(name, prompt)
+
+    tracer = game_state.tracer
+    coordinator = group[0].pool.coordinator(index)
+    started = time.perf_counter()
+    try:
+        response, retries = await scheduler.run(lambda: coordinator.arun(prompt), priority=index,
+                                                tokens=estimate_tokens(prompt), kind="batched")
+        if tracer is not None:
+            tracer.agent_call(f"group {index + 1}", "batched", time.perf_counter() - started, response,
+                              agents=len(group), retries=retries)
+        decisions = parse_batch_decisions(response.content, game_state, names)
+    except Exception as error:
+        if tracer is not None:
+            tracer.agent_call(f"group {index + 1}", "batched", time.perf_counter() - started, error=error, agents=len(group))
+        _report(game_state, "batch_error", f"Batched decision of group {index + 1} failed: {error}", "bold red",
+                group=index + 1, agents=names, error=str(error))
+        decisions = {}
+
+    for name, (tool, arguments) in decisions.items():
+        game_state.pending_actions.append((name, tool, arguments))
+    return [model for model in group if model.name not in decisions]
+
+
+async def arun_batched_turn(game_state: GameState, group_size: int = 25, max_concurrency: int = 8,
+                            scheduler: Optional[Scheduler] = None) -> list[tuple[str, str, str]]:
+    """
+    Like arun_concurrent_turn, but one request decides for a whole group of `group_size` agents: the
+    reply is a JSON list of tool calls. Agents with a missing or malformed entry are asked one by one.
+    """
+    agents = game_state.models.snapshot()
+    game_state.current_agent = None
+    game_state.pending_actions = []
+    scheduler = scheduler or game_state.scheduler or Scheduler(max_concurrency)
+    groups = [agents[start:start + group_size] for start in range(0, len(agents), group_size)]
+
+    try:
+        left = await asyncio.gather(*(_decide_group(game_state, group, index, scheduler)
+                                      for index, group in enumerate(groups)))
+        fallback = [model for group in left for model in group]
+        if fallback:
+            _report(game_state, "batch_fallback",
+                    f"No valid batched decision for {len(fallback)} agent(s), asking them one by one", "yellow",
+                    agents=[model.name for model in fallback])
+        responses = await asyncio.gather(*(_decide(game_state, model, scheduler, "fallback", index)
+                                           for index, model in enumerate(fallback)),
+                                         return_exceptions=True)
+    except BaseException:
+        game_state.pending_actions = None
+        raise
+
+    for model, response in zip(fallback, responses):
+        if isinstance(response, BaseException):
+            _report(game_state, "decision_error", f"{model.name} failed to decide: {response}", "bold red",
+                    agent=model.name, error=str(response))
+        else:
+            _decided(game_state, model, response, "fallback")
+
+    return apply_pending_actions(game_state, agents)
+
+
+def run_batched_turn(game_state: GameState, group_size: int = 25, max_concurrency: int = 8) -> list[tuple[str, str, str]]:
+    """Blocking version of arun_batched_turn"""
+    return get_loop().run_until_complete(arun_batched_turn(game_state, group_size, max_concurrency))
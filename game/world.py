@@ -0,0 +1,374 @@
+"""
+Multi-colony world: colonies, each with its own GameState, agents and balance, sharded over worker
+processes and synchronized by a coordinator at every turn barrier.
+
+A turn of the world:
+1. each worker applies the arrivals of its colonies (migrants and food), then plays one turn of each
+   colony with the unchanged colony rules (headless policies or LLM agents),
+2. it reports compact per-colony messages: resources, emigrants (agent id, action counters, recent
+   actions) and food offered for trade,
+3. the coordinator routes the emigrants to the colonies with the most food per agent, gives the
+   offered food to the hungry colonies (returning what nobody needs) and records per-colony metrics.
+Routing uses the coordinator's own RNG and colonies are processed in index order, so a seeded world
+plays the same whatever the number of workers. Agent ids are unique across the world: colony `i`
+numbers its agents from i × ID_SPACE + 1, so migrants keep their name.
+"""
+import multiprocessing
+import random
+import time
+import traceback
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+from game.balance import Balance
+from game.status import ACTION_INDEX, ACTIONS, AgentState
+
+ID_SPACE = 10_000_000
+
+
+@dataclass
+class ColonySpec:
+    engine: str = "headless"  # "headless" (scripted policy) or "llm"
+    n_agents: int = 10
+    food: int = 10
+    policy: str = "random"  # headless.POLICIES name
+    balance: dict = field(default_factory=dict)  # Balance fields overriding the defaults
+    backend: dict = field(default_factory=dict)  # game.agents.ModelBackend arguments (llm engine)
+    fake_model_latency: Optional[float] = None  # Seconds; FakeModel instead of the backend (llm engine)
+    max_concurrency: int = 8
+
+
+@dataclass
+class MigrationRules:
+    hunger: float = 1.0  # Food per agent under which a colony is hungry: some agents leave, it receives food
+    migration_rate: float = 0.2  # Share of a hungry colony's agents leaving each turn (at least 2 stay)
+    surplus: float = 3.0  # Food per agent kept by a colony; a share of what it has beyond is offered
+    export_rate: float = 0.5
+
+
+class Colony(ABC):
+    """One colony, played in a worker process"""
+
+    def __init__(self, index: int, spec: ColonySpec, seed: int):
+        self.index = index
+        self.spec = spec
+        self.turn = 0
+        self.migration_rng = random.Random(seed + 1)  # Leaves the game's RNG to the rules
+        self.state = None
+
+    @abstractmethod
+    def new_agent(self, agent_id: int):
+        """Colony member for an agent id (a newcomer or a migrant)"""
+
+    @abstractmethod
+    def play_turn(self):
+        """Play one turn of the colony with its own rules"""
+
+    def close(self):
+        """Release what the colony holds once the world is over"""
+
+    def arrive(self, migrants: list, food: int):
+        state = self.state
+        state.food += food
+        for agent_id, counts, recent in migrants:
+            agent = self.new_agent(agent_id)
+            state.agent_states[agent.name] = AgentState.from_counts(dict(zip(ACTIONS, counts)),
+                                                                    [ACTIONS[action] for action in recent])
+            state.models.append(agent)
+
+    def depart(self, rules: MigrationRules) -> tuple[list, int]:
+        """Emigrants (agent id, action counters, recent action codes) and food offered, removed from the colony"""
+        state = self.state
+        population = state.population
+        migrants = []
+        if population > 2 and state.food < rules.hunger * population:
+            leaving = min(population - 2, max(1, int(population * rules.migration_rate)))
+            leavers = self.migration_rng.sample(state.models.snapshot(), leaving)
+            for agent in leavers:
+                agent_state = state.agent_states.pop(agent.name, None) or AgentState()
+                migrants.append((agent.agent_id, tuple(agent_state.counts),
+                                 tuple(ACTION_INDEX[action] for action in agent_state.recent_actions if action in ACTION_INDEX)))
+                state.starvation_immune.discard(agent.name)
+            state.models.remove_many(leavers)
+        offer = 0
+        if state.food > rules.surplus * population:
+            offer = int((state.food - rules.surplus * population) * rules.export_rate)
+            state.food -= offer
+        return migrants, offer
+
+    def report(self, migrants=(), offer: int = 0) -> tuple:
+        state = self.state
+        return (self.index, self.turn, state.population, state.food, state.knowledge, migrants, offer)
+
+
+class HeadlessColony(Colony):
+    def __init__(self, index: int, spec: ColonySpec, seed: int):
+        from game.headless import POLICIES
+        from game.status import GameState
+
+        super().__init__(index, spec, seed)
+        self.policy = POLICIES[spec.policy]
+        self.rng = random.Random(seed)
+        self.state = GameState(food=spec.food, rng=self.rng, balance=Balance(**spec.balance),
+                               next_agent_id=index * ID_SPACE + 1)
+        self.state.models.extend(self.new_agent(agent_id) for agent_id in self.state.allocate_agent_ids(spec.n_agents))
+
+    def new_agent(self, agent_id: int):
+        from game.headless import HeadlessAgent
+
+        return HeadlessAgent(agent_id)
+
+    def play_turn(self):
+        from game.headless import play_actions
+
+        self.turn += 1
+        play_actions(self.state, self.policy, self.rng)
+        self.state.end_turn()
+
+
+class LlmColony(Colony):
+    def __init__(self, index: int, spec: ColonySpec, seed: int):
+        from game.agents import ModelBackend
+        from game.events import EventBus
+        from game.simulation import Simulation
+
+        super().__init__(index, spec, seed)
+        model_factory = None
+        if spec.fake_model_latency is not None:
+            from game.fake_model import FakeModel
+            model_factory = lambda: FakeModel(latency=spec.fake_model_latency)
+        self.simulation = Simulation(n_agents=0, food=spec.food, seed=seed, balance=Balance(**spec.balance),
+                                     model_factory=model_factory, backend=ModelBackend(**spec.backend),
+                                     events=EventBus())  # Without subscribers: the tools stay quiet
+        self.simulation.n_agents = spec.n_agents
+        self.state = self.simulation.state
+        self.state.next_agent_id = index * ID_SPACE + 1
+        self.state.models.extend(self.simulation.pool.generate(spec.n_agents))
+        self.simulation.record()
+
+    def new_agent(self, agent_id: int):
+        return self.simulation.pool.create(agent_id)
+
+    def play_turn(self):
+        simulation = self.simulation
+        self.turn = simulation.start_turn()
+        simulation.run_concurrent_turn(self.spec.max_concurrency)
+        simulation.record()
+        simulation.end_turn()
+
+    def close(self):
+        self.simulation.state.events.close()
+        self.simulation.close()
+
+
+COLONIES = {"headless": HeadlessColony, "llm": LlmColony}
+
+
+class WorkerError(RuntimeError):
+    """A worker process failed, with its traceback"""
+
+
+def _worker(connection, shard: list[tuple[int, ColonySpec, int]], rules: MigrationRules):
+    """Plays the colonies of a shard, one turn per message from the coordinator; a failure is sent back to it"""
+    colonies = []
+    try:
+        for index, spec, seed in shard:
+            colonies.append(COLONIES[spec.engine](index, spec, seed))
+        connection.send([colony.report() for colony in colonies])
+        while True:
+            arrivals = connection.recv()
+            if arrivals is None:
+                break
+            reports = []
+            for colony in colonies:
+                migrants, food = arrivals.get(colony.index, ((), 0))
+                colony.arrive(migrants, food)
+                if colony.state.population > 0:
+                    colony.play_turn()
+                else:
+                    colony.turn += 1
+                reports.append(colony.report(*colony.depart(rules)))
+            connection.send(reports)
+    except Exception:
+        connection.send(WorkerError(f"Colony worker of {[index for index, *_ in shard]} failed:\n{traceback.format_exc()}"))
+    finally:
+        for colony in colonies:
+            colony.close()
+        connection.close()
+
+
+def _receive(connection) -> list[tuple]:
+    """Reports of a worker, raising the error it sent instead if it failed"""
+    try:
+        message = connection.recv()
+    except EOFError:
+        raise WorkerError("A colony worker exited without reporting") from None
+    if isinstance(message, WorkerError):
+        raise message
+    return message
+
+
+@dataclass
+class WorldResult:
+    turns_played: int
+    colonies: int
+    metrics: list[dict]  # One row per colony and turn
+    elapsed: float
+
+    def final(self) -> list[dict]:
+        """Last row of every colony"""
+        return self.metrics[-self.colonies:]
+
+
+class World:
+    def __init__(self, colonies: list[ColonySpec], rules: Optional[MigrationRules] = None, seed: int = 0,
+                 jobs: Optional[int] = None):
+        self.specs = colonies
+        self.rules = rules or MigrationRules()
+        self.seed = seed
+        self.jobs = min(jobs or multiprocessing.cpu_count(), len(colonies))
+        self.rng = random.Random(seed)  # Routing of migrants
+        self.seeds = np.random.SeedSequence(seed).generate_state(len(colonies)).tolist()
+
+    def route(self, reports: list[tuple]) -> tuple[dict[int, tuple[list, int]], dict[int, dict]]:
+        """Arrivals per colony for the next turn, and the trade and migration counts of each colony"""
+        reports = sorted(reports)
+        hunger = self.rules.hunger
+        arrivals = {index: ([], 0) for index, *_ in reports}
+        moves = {index: {"emigrants": 0, "immigrants": 0, "food_out": 0, "food_in": 0} for index, *_ in reports}
+
+        # Migrants go to colonies with enough food, more likely to the best fed ones
+        havens = [(index, food / population) for index, _, population, food, *_ in reports
+                  if population > 0 and food >= hunger * population]
+        for index, _, _, _, _, migrants, _ in reports:
+            destinations = [(other, per_agent) for other, per_agent in havens if other != index]
+            for migrant in migrants:
+                if destinations:
+                    other = self.rng.choices([d for d, _ in destinations], [w + 1e-9 for _, w in destinations])[0]
+                else:
+                    other = index  # Nowhere to go, stays home
+                arrivals[other][0].append(migrant)
+                if other != index:
+                    moves[index]["emigrants"] += 1
+                    moves[other]["immigrants"] += 1
+
+        # Offered food goes to the hungry colonies in proportion to what they lack, the rest goes back
+        offered = {index: offer for index, *_, offer in reports if offer}
+        needs = {index: int(hunger * population) - food for index, _, population, food, *_ in reports
+                 if population > 0 and food < hunger * population}
+        total_offer, total_need = sum(offered.values()), sum(needs.values())
+        wanted = min(total_offer, total_need)
+        received = {}
+        if wanted:
+            given = {index: wanted * offer // total_offer for index, offer in offered.items()}
+            pool = sum(given.values())
+            shares = {index: pool * need // total_need for index, need in needs.items()}
+            # Rounding leftovers go one unit at a time to the largest remainders, never beyond what a colony lacks
+            left = pool - sum(shares.values())
+            for index in sorted(needs, key=lambda index: (-(pool * needs[index] % total_need), index)):
+                if left and shares[index] < needs[index]:
+                    shares[index] += 1
+                    left -= 1
+            # What no colony can take goes back to its offerers, food is neither made nor lost
+            for index in sorted(given):
+                taken_back = min(left, given[index])
+                given[index] -= taken_back
+                left -= taken_back
+            for index, food in shares.items():
+                received[index] = food
+                moves[index]["food_in"] = food
+            for index, food in given.items():
+                moves[index]["food_out"] = food
+        for index, offer in offered.items():
+            received[index] = received.get(index, 0) + offer - moves[index]["food_out"]
+        for index, food in received.items():
+            arrivals[index] = (arrivals[index][0], food)
+        return arrivals, moves
+
+    def run(self, turns: int = 100, progress=None) -> WorldResult:
+        started = time.perf_counter()
+        context = multiprocessing.get_context()
+        shards = [[] for _ in range(self.jobs)]
+        for index, spec in enumerate(self.specs):
+            shards[index % self.jobs].append((index, spec, self.seeds[index]))
+
+        connections, processes = [], []
+        for shard in shards:
+            parent, child = context.Pipe()
+            process = context.Process(target=_worker, args=(child, shard, self.rules), daemon=True)
+            process.start()
+            connections.append(parent)
+            processes.append(process)
+
+        metrics = []
+        turn = 0
+        try:
+            reports = [report for connection in connections for report in _receive(connection)]
+            arrivals = {}
+            while turn < turns:
+                turn += 1
+                for connection, shard in zip(connections, shards):
+                    connection.send({index: arrivals[index] for index, _, _ in shard if index in arrivals})
+                reports = [report for connection in connections for report in _receive(connection)]
+                arrivals, moves = self.route(reports)
+                for index, colony_turn, population, food, knowledge, _, _ in sorted(reports):
+                    metrics.append({"turn": turn, "colony": index, "population": population, "food": food,
+                                    "knowledge": knowledge, **moves[index]})
+                if progress is not None:
+                    progress(turn, metrics[-len(reports):])
+                if all(population <= 1 for _, _, population, *_ in reports):
+                    break
+        finally:
+            for connection in connections:
+                try:
+                    connection.send(None)
+                except OSError:  # The worker is gone already, its error is the one being raised
+                    pass
+            for process in processes:
+                process.join()
+        return WorldResult(turn, len(self.specs), metrics, time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from rich.console import Console
+    from rich.table import Table
+
+    parser = argparse.ArgumentParser(description="Play a world of colonies over worker processes")
+    parser.add_argument("--colonies", type=int, default=8)
+    parser.add_argument("--jobs", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--agents", type=int, default=10, help="agents per colony")
+    parser.add_argument("--food", type=int, default=10, help="starting food per colony")
+    parser.add_argument("--policy", default="random", help="headless policy, or a comma-separated list cycled over the colonies")
+    parser.add_argument("--engine", choices=COLONIES, default="headless")
+    parser.add_argument("--fake-model-latency", type=float, default=0.0, help="seconds per call (llm engine)")
+    parser.add_argument("--migration-rate", type=float, default=MigrationRules.migration_rate)
+    parser.add_argument("--export-rate", type=float, default=MigrationRules.export_rate)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    policies = args.policy.split(",")
+    specs = [ColonySpec(engine=args.engine, n_agents=args.agents, food=args.food, policy=policies[index % len(policies)],
+                        fake_model_latency=args.fake_model_latency if args.engine == "llm" else None)
+             for index in range(args.colonies)]
+    world = World(specs, MigrationRules(migration_rate=args.migration_rate, export_rate=args.export_rate), args.seed,
+                  args.jobs)
+    result = world.run(args.turns)
+
+    table = Table("Colony", "Policy", "Population", "Food", "Knowledge", "Emigrants", "Immigrants", "Food out", "Food in",
+                  title=f"World after {result.turns_played} turns")
+    totals = {}
+    for row in result.metrics:
+        for name in ("emigrants", "immigrants", "food_out", "food_in"):
+            totals[row["colony"], name] = totals.get((row["colony"], name), 0) + row[name]
+    for row in result.final():
+        index = row["colony"]
+        table.add_row(str(index), specs[index].policy, str(row["population"]), str(row["food"]), str(row["knowledge"]),
+                      *(str(totals[index, name]) for name in ("emigrants", "immigrants", "food_out", "food_in")))
+    Console().print(table)
+    print(f"{len(specs)} colonies on {world.jobs} workers: {result.turns_played} turns in {result.elapsed:.2f}s")
@@ -0,0 +1,6 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def no_telemetry(monkeypatch):
+    monkeypatch.setenv("AGNO_TELEMETRY", "false")  # Else agno reports every agent run to its servers
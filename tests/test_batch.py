@@ -0,0 +1,45 @@
+"""
+The vectorized batch simulator must play the same game as the scalar headless engine: for a few action
+weight sets, seeded samples of both engines are compared with a two-sample Kolmogorov-Smirnov test.
+"""
+import numpy as np
+import pytest
+
+from game.batch import run_batch
+from game.headless import WEIGHTS, run_games, weighted_policy
+
+METRICS = ("turns_played", "population", "food", "knowledge")
+# KS critical value coefficient at a 1% significance level
+ALPHA_COEFFICIENT = 1.628
+
+
+def ks_statistic(a, b) -> float:
+    """Two-sample Kolmogorov-Smirnov statistic"""
+    a, b = np.sort(a), np.sort(b)
+    values = np.concatenate([a, b])
+    cdf_a = np.searchsorted(a, values, side="right") / len(a)
+    cdf_b = np.searchsorted(b, values, side="right") / len(b)
+    return float(np.abs(cdf_a - cdf_b).max())
+
+
+def divergences(batch_weights, headless_weights, n_games: int, turns: int, seed: int = 0) -> dict[str, float]:
+    """Metrics whose distributions differ between the two engines, with their KS statistic"""
+    batch = run_batch(n_games, batch_weights, turns=turns, seed=seed)
+    scalar = run_games(n_games, weighted_policy(headless_weights), seed=seed, turns=turns, record_history=False)
+    critical = ALPHA_COEFFICIENT * np.sqrt(2 / n_games)
+    found = {}
+    for metric in METRICS:
+        statistic = ks_statistic(getattr(batch, metric), [getattr(result, metric) for result in scalar])
+        if statistic > critical:
+            found[metric] = statistic
+    return found
+
+
+# Colonies of cooperative agents grow, so they play fewer turns to keep the test quick
+@pytest.mark.parametrize("name, turns", [("random", 40), ("cooperative", 15), ("steal_heavy", 40)])
+def test_batch_matches_headless(name, turns):
+    assert divergences(WEIGHTS[name], WEIGHTS[name], n_games=400, turns=turns) == {}
+
+
+def test_comparison_detects_divergence():
+    assert divergences(WEIGHTS["cooperative"], WEIGHTS["random"], n_games=400, turns=15)
@@ -0,0 +1,86 @@
+"""
+A game checkpointed at turn k and resumed plays on exactly like the same seeded game left uninterrupted:
+same resources, population, agent counters and titles, starvation immunities and RNG state.
+"""
+import random
+
+import pytest
+
+from game.checkpoint import resume
+from game.fake_model import FakeModel, random_policy
+from game.simulation import Simulation
+
+TURNS, CHECKPOINT_TURN = 8, 4
+
+
+def prompt_policy(prompt: str) -> tuple[str, dict]:
+    """Random decisions drawn from the prompt itself, so a resumed game is asked, and answers, the same"""
+    return random_policy(prompt, rng=random.Random(prompt))
+
+
+def model_factory():
+    return FakeModel(latency=0.0, policy=prompt_policy)
+
+
+def play(simulation: Simulation, turns: int, mode: str) -> Simulation:
+    while simulation.turn < turns and not simulation.over:
+        simulation.start_turn()
+        if mode == "concurrent":
+            simulation.run_concurrent_turn()
+        else:
+            simulation.run_sequential_turn()
+        simulation.record()
+        simulation.end_turn()
+    return simulation
+
+
+def final_state(simulation: Simulation) -> dict:
+    state = simulation.state
+    return {
+        "turn": simulation.turn,
+        "history": simulation.history,
+        "agents": [model.name for model in state.models],
+        "next_agent_id": state.next_agent_id,
+        "agent_states": {name: (agent_state, agent_state.total, agent_state._triggers)
+                         for name, agent_state in state.agent_states.items() if agent_state.total},
+        "immune": (sorted(state.starvation_immune), len(state.starvation_immune)),
+        "rng": simulation.rng.getstate(),
+        "chronicle": list(state.chronicle.events),
+    }
+
+
+@pytest.mark.parametrize("mode", ["sequential", "concurrent"])
+def test_resumed_game_matches_the_uninterrupted_one(tmp_path, mode):
+    def new_game():
+        simulation = Simulation(n_agents=8, food=30, seed=21, model_factory=model_factory)
+        simulation.record()
+        return simulation
+
+    uninterrupted = play(new_game(), TURNS, mode)
+    uninterrupted.close()
+
+    interrupted = play(new_game(), CHECKPOINT_TURN, mode)
+    assert not interrupted.over
+    interrupted.checkpoint(tmp_path / "game.ckpt")
+    interrupted.close()
+
+    resumed = resume(tmp_path / "game.ckpt", model_factory=model_factory)
+    assert resumed.turn == CHECKPOINT_TURN
+    play(resumed, TURNS, mode)
+    resumed.close()
+    assert final_state(resumed) == final_state(uninterrupted)
+
+
+def test_immunity_survives_the_checkpoint(tmp_path):
+    simulation = Simulation(n_agents=4, food=30, seed=2, model_factory=model_factory)
+    state = simulation.state
+    state.starvation_immune.clear()  # Past generations must not matter once saved
+    state.starvation_immune.add("Agent 2")
+    simulation.checkpoint(tmp_path / "game.ckpt")
+    simulation.close()
+
+    resumed = resume(tmp_path / "game.ckpt", model_factory=model_factory)
+    assert sorted(resumed.state.starvation_immune) == ["Agent 2"]
+    resumed.state.starvation_immune.clear()
+    assert "Agent 2" not in resumed.state.starvation_immune
+    resumed.close()
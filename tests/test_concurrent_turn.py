@@ -0,0 +1,100 @@
+"""
+Concurrent turns: decisions are requested all at once, at most `max_concurrency` at a time, and the
+queued tool calls are applied in turn order whatever order the replies come back in.
+"""
+import asyncio
+import math
+import re
+import time
+from dataclasses import dataclass, field
+
+from game.fake_model import FakeModel
+from game.simulation import Simulation
+
+
+@dataclass
+class Probe:
+    agents: int
+    latency: float = 0.0  # Seconds per model call
+    stagger: float = 0.0  # Extra seconds per agent after the caller: later agents answer sooner
+    in_flight: int = 0
+    peak: int = 0
+    answered: list = field(default_factory=list)  # Agent numbers, in the order their decisions came back
+
+
+def agent_number(prompt: str) -> int:
+    return int(re.search(r"You are Agent (\d+)", prompt).group(1))
+
+
+@dataclass
+class ProbedModel(FakeModel):
+    """FakeModel taking its latency from a Probe, which counts the calls in flight"""
+    probe: Probe = None
+
+    async def ainvoke(self, messages, **kwargs):
+        probe = self.probe
+        number = agent_number(next(m.get_content_string() for m in reversed(messages) if m.role == "user"))
+        probe.in_flight += 1
+        probe.peak = max(probe.peak, probe.in_flight)
+        try:
+            await asyncio.sleep(probe.latency + probe.stagger * (probe.agents - number))
+        finally:
+            probe.in_flight -= 1
+        if messages[-1].role != "tool":
+            probe.answered.append(number)
+        return self._reply(messages)
+
+
+def simulation(n_agents: int, policy=None, **timing) -> tuple[Simulation, Probe]:
+    probe = Probe(n_agents, **timing)
+    game = Simulation(n_agents=n_agents, food=100, seed=0,
+                      model_factory=lambda: ProbedModel(probe=probe, policy=policy))
+    game.start_turn()
+    return game, probe
+
+
+def test_actions_are_applied_in_turn_order():
+    # Agent 1 kills Agent 2 and Agent 2 kills Agent 1, but Agent 2's decision comes back first
+    def policy(prompt: str):
+        number = agent_number(prompt)
+        if number <= 2:
+            return "kill_agent", {"agent_name": f"Agent {3 - number}"}
+        return "do_nothing", {}
+
+    game, probe = simulation(3, policy, stagger=0.1)
+    results = game.run_concurrent_turn(max_concurrency=3)
+    game.close()
+
+    assert probe.answered == [3, 2, 1]
+    assert [name for name, _, _ in results] == ["Agent 1", "Agent 2", "Agent 3"]
+    assert results[1][2] == "Agent died before acting."
+    assert [model.name for model in game.state.models] == ["Agent 1", "Agent 3"]
+
+
+def test_calls_in_flight_stay_under_the_cap():
+    game, probe = simulation(10, lambda prompt: ("do_nothing", {}), latency=0.02)
+    game.run_concurrent_turn(max_concurrency=3)
+    game.close()
+
+    assert probe.answered and sorted(probe.answered) == list(range(1, 11))
+    assert probe.peak == 3
+
+
+def test_turn_takes_rounds_of_the_cap():
+    cap, latency = 4, 0.1
+    game, probe = simulation(12, lambda prompt: ("do_nothing", {}))
+    game.run_concurrent_turn(max_concurrency=cap)  # Builds the agents and their tools, untimed
+    game.end_turn()
+
+    probe.latency = latency
+    n_agents = game.state.population
+    game.start_turn()
+    started = time.perf_counter()
+    game.run_concurrent_turn(max_concurrency=cap)
+    elapsed = time.perf_counter() - started
+    game.close()
+
+    # Every agent run is two model calls: the decision, then the reply to the tool result
+    expected = math.ceil(n_agents / cap) * 2 * latency
+    assert expected <= elapsed < expected * 1.5
+    assert elapsed < n_agents * 2 * latency / 2
@@ -0,0 +1,75 @@
+"""
+Cache hits replay a decision without building the agent's LLM-backed agent, and the per-agent tool
+history stays bounded.
+"""
+import pytest
+
+from game.decision_cache import DecisionCache
+from game.simulation import Simulation
+from tools.actions import apply_pending_actions
+
+
+def unbuildable():
+    pytest.fail("a cache hit built an agent")
+
+
+@pytest.fixture
+def game():
+    cache = DecisionCache(":memory:", fresh_rate=0.0, seed=0)
+    simulation = Simulation(n_agents=4, food=10, seed=0, model_factory=unbuildable, decision_cache=cache)
+    for model in simulation.state.models.snapshot():
+        cache.put(cache.key(simulation.state, model), "add_food", {}, "Gathering food.")
+    yield simulation
+    cache.close()
+
+
+def test_sequential_hit_runs_the_tool_without_the_agent(game):
+    food = game.state.food
+    model = game.state.models.snapshot()[0]
+    response = game.decide(model)
+    assert response.tools[0].tool_name == "add_food"
+    assert game.state.food > food
+    assert model._agent is None
+    assert game.state.decision_cache.metrics["hits"] == 1
+
+
+def test_queued_hits_resolve_without_the_agents(game):
+    state = game.state
+    agents = state.models.snapshot()
+    state.pending_actions = []
+    for model in agents:
+        state.decision_cache.lookup(state, model)
+    results = apply_pending_actions(state, agents)
+    assert [tool for _, tool, _ in results] == ["add_food"] * len(agents)
+    assert all(model._agent is None for model in agents)
+
+
+def test_recent_history_is_bounded(game):
+    cache = DecisionCache(":memory:", max_recent=3)
+    for model in game.state.models.snapshot():
+        cache.key(game.state, model)
+    assert len(cache.recent) == 3
+    cache.close()
+
+
+def test_expired_entries_are_deleted(tmp_path):
+    now = [1000.0]
+    clock = lambda: now[0]
+    path = tmp_path / "decisions.sqlite"
+    cache = DecisionCache(path, ttl=60, clock=clock)
+    cache.put("old", "add_food", {}, "")
+    cache.put("older", "do_nothing", {}, "")
+    now[0] += 30
+    cache.put("recent", "reproduce", {}, "")
+    now[0] += 31
+    assert cache.get("old") is None  # Expired on lookup
+    cache.put("new", "add_knowledge", {}, "")  # Storing purges the other expired entry
+    assert len(cache) == 2 and cache.metrics["expired"] == 2
+    cache.close()
+
+    # Opening the file later purges what expired meanwhile, without any lookup
+    now[0] += 45
+    reopened = DecisionCache(path, ttl=60, clock=clock)
+    rows = reopened._db.execute("SELECT key FROM decisions").fetchall()
+    assert rows == [("new",)] and len(reopened) == 1 and reopened.metrics["expired"] == 1
+    reopened.close()
@@ -0,0 +1,48 @@
+"""
+The headless engine and the sequential LLM game share one turn structure: agents act in order and
+an agent killed earlier in the turn loses its action.
+"""
+import random
+import re
+
+from game.fake_model import FakeModel
+from game.headless import HeadlessAgent, play_actions
+from game.simulation import Simulation
+from game.status import GameState
+
+
+def first_kills_second(name: str) -> tuple[str, dict]:
+    """Agent 1 kills Agent 2, everyone else does nothing"""
+    if name == "Agent 1":
+        return "kill_agent", {"agent_name": "Agent 2"}
+    return "do_nothing", {}
+
+
+def test_headless_killed_agent_loses_its_action():
+    state = GameState(food=10)
+    state.models.extend(HeadlessAgent(agent_id) for agent_id in state.allocate_agent_ids(3))
+    asked = []
+
+    def policy(state, agent, rng):
+        asked.append(agent.name)
+        return first_kills_second(agent.name)
+
+    play_actions(state, policy, random.Random(0))
+    assert asked == ["Agent 1", "Agent 3"]
+    assert state.get_agent_state("Agent 2").total == 0
+
+
+def test_sequential_killed_agent_loses_its_action():
+    def policy(prompt: str):
+        return first_kills_second(re.search(r"You are (Agent \d+)", prompt).group(1))
+
+    simulation = Simulation(n_agents=3, food=10, seed=0, model_factory=lambda: FakeModel(latency=0.0, policy=policy))
+    simulation.start_turn()
+    responses = simulation.run_sequential_turn()
+    simulation.close()
+
+    state = simulation.state
+    assert len(responses) == 2
+    assert [model.name for model in state.models] == ["Agent 1", "Agent 3"]
+    assert state.get_agent_state("Agent 2").total == 0
+    assert state.get_agent_state("Agent 3").total == 1
@@ -0,0 +1,90 @@
+"""
+A game recorded into a replay log is rebuilt to the same final state without any model call, a log that
+no longer matches the rules fails verification, and truncated logs replay up to where they were cut.
+"""
+import gzip
+import json
+
+import pytest
+
+from game.fake_model import POLICIES, FakeModel, weighted_policies
+from game.replay import read_log, replay, truncate_log
+from game.simulation import Simulation
+
+
+def play(path, turns: int = 6) -> Simulation:
+    policy, _ = weighted_policies(POLICIES["random"], seed=1)
+    simulation = Simulation(n_agents=6, food=20, seed=11, replay_path=path,
+                            model_factory=lambda: FakeModel(latency=0.0, policy=policy))
+    simulation.record()
+    while simulation.turn < turns and not simulation.over:
+        simulation.start_turn()
+        simulation.run_sequential_turn()
+        simulation.record()
+        simulation.end_turn()
+    simulation.close()
+    return simulation
+
+
+def final_state(simulation: Simulation) -> dict:
+    state = simulation.state
+    return {
+        "turn": simulation.turn,
+        "history": simulation.history,
+        "agents": [model.name for model in state.models],
+        # Agents that never acted may or may not have an empty state, depending on who looked them up
+        "counts": {name: dict(agent_state.action_counts) for name, agent_state in state.agent_states.items()
+                   if agent_state.total},
+        "titles": state.title_counts(),
+        "immune": sorted(state.starvation_immune),
+        "rng": simulation.rng.getstate(),
+    }
+
+
+def test_replay_rebuilds_the_recorded_game(tmp_path):
+    path = tmp_path / "game.jsonl.gz"
+    recorded = play(path)
+    replayed = replay(path)
+    replayed.close()
+    assert final_state(replayed) == final_state(recorded)
+
+
+def test_replay_fails_on_a_changed_log(tmp_path):
+    path = tmp_path / "game.jsonl"
+    play(path)
+    events = list(read_log(path))
+    act = next(event for event in events if event["event"] == "act" and event["tool"] == "add_food")
+    act["delta"][1] += 1  # One more food gathered than the rules give
+    path.write_text("".join(json.dumps(event) + "\n" for event in events))
+
+    with pytest.raises(ValueError, match="delta"):
+        replay(path)
+    replay(path, verify=False).close()
+
+
+def test_truncated_log_replays_up_to_its_turn(tmp_path):
+    path = tmp_path / "game.jsonl"
+    play(path)
+    expected = replay(path, until_turn=3)
+    expected.close()
+    truncate_log(path, 3)
+    assert max(event.get("turn", 0) for event in read_log(path)) == 3
+
+    truncated = replay(path)
+    truncated.close()
+    assert truncated.turn == 3
+    assert final_state(truncated) == final_state(expected)
+
+
+def test_truncate_log_drops_an_unreadable_tail(tmp_path):
+    path = tmp_path / "game.jsonl.gz"
+    play(path, turns=4)
+    whole = replay(path, until_turn=2)
+    whole.close()
+    with open(path, "ab") as file:
+        file.write(gzip.compress(b'{"event": "act", "turn": 5')[:-12])  # Crashed mid-write
+
+    truncate_log(path, 2)
+    truncated = replay(path)
+    truncated.close()
+    assert final_state(truncated) == final_state(whole)
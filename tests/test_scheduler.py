@@ -0,0 +1,102 @@
+"""
+The scheduler against the stub server's provider-like throttling: 429s are retried after their Retry-After,
+concurrency backs off on throttling and recovers once requests go through, failed attempts give their
+budget back, and the backoff grows exponentially with full jitter.
+"""
+import asyncio
+import time
+
+import openai
+import pytest
+
+from game import stub_server
+from game.scheduler import Scheduler
+
+MESSAGES = [{"role": "user", "content": 'Choose your action. Available targets: "Agent 2"'}]
+
+
+@pytest.fixture
+def server():
+    def start(**settings):
+        started.append(stub_server.start(latency=0.0, jitter=0.0, seed=0, **settings))
+        return started[-1]
+
+    started = []
+    yield start
+    for running in started:
+        running.close()
+
+
+async def complete(server, scheduler: Scheduler, requests: int, limits: list = None):
+    """Send `requests` chat completions at once through the scheduler"""
+    client = openai.AsyncOpenAI(base_url=server.base_url, api_key="stub", max_retries=0)
+
+    async def call():
+        if limits is not None:
+            limits.append(scheduler.limit)
+        return await client.chat.completions.create(model="stub", messages=MESSAGES)
+
+    try:
+        return await asyncio.gather(*(scheduler.run(call, priority=index, tokens=10) for index in range(requests)))
+    finally:
+        await client.close()
+
+
+def test_throttled_requests_wait_and_concurrency_recovers(server):
+    stub = server(requests_per_minute=600)  # 10 requests per second, 10 at once
+    scheduler = Scheduler(max_concurrency=8, base_delay=0.01, max_retries=20, seed=0)
+    limits = []
+
+    started = time.monotonic()
+    results = asyncio.run(complete(stub, scheduler, 20, limits))
+    elapsed = time.monotonic() - started
+    assert len(results) == 20 and stub.counts["served"] == 20
+    assert scheduler.metrics["throttled"] == stub.counts["throttled"] > 0
+    assert scheduler.metrics["retries"] == scheduler.metrics["throttled"] and scheduler.metrics["errors"] == 0
+    # The 10 requests beyond the burst are only served as the provider's bucket refills
+    assert elapsed >= 0.9
+    assert min(limits) < 8
+
+    # The provider lifts its limit: requests go through and the concurrency grows back
+    stub.requests = None
+    for _ in range(50):
+        if scheduler.limit >= 8:
+            break
+        asyncio.run(complete(stub, scheduler, 1))
+    assert scheduler.limit == 8
+    assert stub.counts["throttled"] == scheduler.metrics["throttled"]
+
+
+def test_failed_attempts_give_their_budget_back(server):
+    stub = server(errors={503: 1.0})
+    scheduler = Scheduler(max_concurrency=2, requests_per_minute=60, tokens_per_minute=60_000, max_retries=0)
+    requests, tokens = scheduler.requests.capacity, scheduler.tokens.capacity
+
+    with pytest.raises(openai.InternalServerError):
+        asyncio.run(complete(stub, scheduler, 1))
+    assert scheduler.metrics["errors"] == 1
+    assert scheduler.requests.level == pytest.approx(requests)
+    assert scheduler.tokens.level == pytest.approx(tokens)
+
+
+class Unavailable(Exception):
+    status_code = 503
+
+
+class Throttled(Exception):
+    status_code = 429
+
+    def __init__(self, seconds: float):
+        super().__init__("Rate limit reached")
+        self.response = type("Response", (), {"headers": {"retry-after": str(seconds)}})()
+
+
+def test_backoff_is_exponential_with_full_jitter():
+    scheduler = Scheduler(base_delay=0.5, max_delay=4.0, max_retries=10, seed=0)
+    for attempt in range(10):
+        assert 0 <= scheduler._failed(Unavailable(), attempt, retry=True) <= min(4.0, 0.5 * 2 ** attempt)
+    assert scheduler._failed(Unavailable(), 10, retry=True) is None
+
+    # Retry-After is a lower bound, and holds back every request meanwhile
+    assert scheduler._failed(Throttled(3), 0, retry=True) >= 3
+    assert scheduler._paused_until >= time.monotonic() + 2.9
@@ -0,0 +1,84 @@
+"""
+The run store records exactly the actions the agents' counters count, straight from the game rather than
+through the lossy event bus, and its report handles an empty store.
+"""
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from game import rules
+from game.events import EventBus
+from game.fake_model import FakeModel, random_policy
+from game.headless import POLICIES, HeadlessAgent, play_actions, run_game
+from game.simulation import Simulation
+from game.status import ACTIONS, GameState
+from game.store import RunRecorder, RunStore, agent_id
+
+
+def counted_actions(state: GameState) -> Counter:
+    counts = Counter()
+    for name, agent_state in state.agent_states.items():
+        for action, count in agent_state.action_counts.items():
+            counts[agent_id(name), ACTIONS.index(action)] += count
+    return counts
+
+
+def recorded_actions(recorder: RunRecorder) -> Counter:
+    return Counter((agent, action) for _, agent, action, _ in recorder.actions)
+
+
+def test_recording_survives_a_saturated_event_bus():
+    bus = EventBus(max_queue=1)
+    bus.subscribe(lambda event: time.sleep(0.01))
+    simulation = Simulation(n_agents=6, food=20, seed=3, events=bus,
+                            model_factory=lambda: FakeModel(latency=0.0, policy=random_policy))
+    recorder = RunRecorder.for_simulation(simulation, turns=3)
+    for _ in range(3):
+        simulation.start_turn()
+        for model in simulation.state.models.snapshot():
+            simulation.decide(model)
+        simulation.record()
+        simulation.end_turn()
+    bus.close()
+    simulation.close()
+
+    assert sum(bus.dropped.values()) > 0
+    assert [row[0] for row in recorder.turns] == [0, 1, 2, 3]
+    assert recorded_actions(recorder) == counted_actions(simulation.state)
+
+
+def test_headless_recording_matches_the_counters():
+    recorder = RunRecorder(7, 10, 0, 30, "headless")
+    state = GameState(food=0, rng=random.Random(7), recorder=recorder)
+    state.models.extend(HeadlessAgent(agent_id) for agent_id in state.allocate_agent_ids(10))
+    for turn in range(1, 4):
+        play_actions(state, POLICIES["thief_heavy"], state.rng)
+        state.end_turn()
+        recorder.end_turn(turn, state.population, state.food, state.knowledge)
+    assert recorded_actions(recorder) == counted_actions(state)
+
+
+def test_headless_games_record_every_turn():
+    recorder = RunRecorder(7, 10, 10, 30, "headless")
+    run_game(POLICIES["thief_heavy"], turns=30, seed=7, recorder=recorder)
+    assert [row[0] for row in recorder.turns] == list(range(recorder.outcome[0] + 1))
+    assert {turn for turn, *_ in recorder.actions} == set(range(1, recorder.outcome[0] + 1))
+
+
+def test_wasted_actions_follow_the_counters():
+    recorder = RunRecorder(0, 2, 0, 1)
+    state = GameState(food=0, recorder=recorder)
+    assert rules.steal_food(state, "Agent 1", rng=None) == -1
+    assert not rules.kill_agent(state, "Agent 1", agent_name="Agent 9")
+    assert recorded_actions(recorder) == counted_actions(state)
+    assert recorder.actions == [(1, 1, ACTIONS.index("kill_agent"), None)]
+
+
+def test_report_of_an_empty_store(tmp_path):
+    path = tmp_path / "runs.sqlite"
+    RunStore(path).close()
+    report = subprocess.run([sys.executable, "-m", "game.store", str(path)], capture_output=True, text=True)
+    assert report.returncode == 0, report.stderr
+    assert "No runs" in report.stdout
@@ -0,0 +1,60 @@
+"""
+Seeded stub servers and fake-model policies answer the same way every time, and a game's stub server is
+shut down with the game.
+"""
+import threading
+
+from game.agents import ModelBackend
+from game.fake_model import weighted_policies
+from game.simulation import Simulation
+from game.stub_server import StubServer
+
+PROMPT = 'Choose your action. Available targets: "Agent 2", "Agent 3", "Agent 4"\n'
+BATCH_PROMPT = 'Decide for these players:\n  - "Agent 1": Newcomer\n  - "Agent 2": Newcomer\nAvailable targets: "Agent 1", "Agent 2"\n'
+
+
+def answers(policy, batch_policy) -> list:
+    return [policy(PROMPT) for _ in range(50)] + [batch_policy(BATCH_PROMPT) for _ in range(10)]
+
+
+def test_seeded_policies_repeat():
+    weights = {"add_food": 1, "kill_agent": 2, "steal_food": 1}
+    assert answers(*weighted_policies(weights, seed=4)) == answers(*weighted_policies(weights, seed=4))
+    assert answers(*weighted_policies(weights, seed=4)) != answers(*weighted_policies(weights, seed=5))
+
+
+def test_seeded_stub_servers_answer_conversations_the_same_way():
+    conversations = [[{"role": "system", "content": "Rules"}, {"role": "user", "content": PROMPT.replace("your", name)}]
+                     for name in ("Agent 1's", "Agent 2's", "Agent 3's")] * 10
+    conversations.append([{"role": "user", "content": BATCH_PROMPT}])
+
+    def server_answers(seed, order):
+        server = StubServer(("127.0.0.1", 0), policy="violent", seed=seed, latency_distribution="lognormal")
+        try:
+            return [server.reply(conversations[index]) for index in order], [server.delay() for _ in range(10)]
+        finally:
+            server.close()
+
+    order = list(range(len(conversations)))
+    replies, delays = server_answers(1, order)
+    assert server_answers(1, order) == (replies, delays)
+    # Concurrent requests arrive in any order
+    shuffled, _ = server_answers(1, order[::-1])
+    assert shuffled[::-1] == replies
+    assert server_answers(2, order)[0] != replies
+
+
+def stub_threads() -> int:
+    return sum(thread.name.startswith("stub-server") for thread in threading.enumerate())
+
+
+def test_games_shut_their_stub_server_down():
+    before = stub_threads()
+    for seed in range(3):
+        backend = ModelBackend(provider="stub", stub={"latency": 0.0, "seed": seed})
+        simulation = Simulation(n_agents=2, seed=seed, backend=backend)
+        simulation.pool.default_model()
+        assert stub_threads() == before + 1
+        simulation.close()
+        assert backend.stub_server is None
+        assert stub_threads() == before
@@ -0,0 +1,42 @@
+"""
+Sweeps name policies the same way for both engines, and reject a policy an engine can't play before
+any game starts.
+"""
+import importlib.util
+
+import pytest
+
+from game.headless import POLICIES, WEIGHTS
+from game.sweep import run_sweep, run_task, split_params
+
+
+def test_batch_policies_are_headless_policies():
+    assert set(WEIGHTS) <= set(POLICIES)
+
+
+@pytest.mark.parametrize("engine", ["headless", "batch"])
+@pytest.mark.parametrize("policy", list(WEIGHTS))
+def test_weighted_policies_play_on_both_engines(engine, policy):
+    rows = run_task(0, {"policy": policy, "turns": 5}, n_games=3, base_seed=0, engine=engine)
+    assert len(rows) == 3
+
+
+@pytest.mark.parametrize("policy", ["greedy_food", "thief", "thief_heavy"])
+def test_batch_engine_rejects_scripted_policies(policy):
+    split_params({"policy": policy})
+    with pytest.raises(ValueError, match="batch engine"):
+        split_params({"policy": policy}, engine="batch")
+
+
+def test_unknown_policy_fails_before_the_sweep(tmp_path):
+    with pytest.raises(ValueError, match="headless engine"):
+        run_sweep([{"policy": "random"}, {"policy": "pacifist"}], games_per_point=2, out_dir=str(tmp_path), jobs=1)
+    assert not list(tmp_path.glob("chunk_*"))
+
+
+def test_missing_chunk_writer_fails_before_the_sweep(tmp_path, monkeypatch):
+    find_spec = importlib.util.find_spec
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name, *args: None if name == "pyarrow" else find_spec(name, *args))
+    with pytest.raises(ImportError, match="parquet sweep chunks needs pyarrow"):
+        run_sweep([{"policy": "random"}], games_per_point=2, out_dir=str(tmp_path / "sweep"), jobs=1, fmt="parquet")
+    assert not (tmp_path / "sweep").exists()
@@ -0,0 +1,63 @@
+"""
+Kill targets in the prompt: large colonies list a fixed-size window of the other agents, the same for
+the same colony, and the cached rendering follows kills and births.
+"""
+import random
+import re
+
+from game import rules
+from game.headless import HeadlessAgent, POLICIES, play_actions
+from game.status import GameState
+from prompts.agents_instructions import MAX_LISTED_TARGETS, TARGET_SAMPLE, target_list
+
+
+def colony(n_agents: int) -> GameState:
+    state = GameState(food=1000)
+    state.models.extend(HeadlessAgent(agent_id) for agent_id in state.allocate_agent_ids(n_agents))
+    return state
+
+
+def listed(targets: str) -> list[str]:
+    return re.findall(r'"([^"]+)"', targets)
+
+
+def test_large_colonies_list_a_sample_of_the_others():
+    state = colony(100)
+    for name in ("Agent 1", "Agent 50", "Agent 95", "Agent 100"):
+        targets = target_list(state, name)
+        names = listed(targets)
+        assert len(names) == len(set(names)) == TARGET_SAMPLE
+        assert name not in names
+        assert targets.endswith(f" and {99 - TARGET_SAMPLE} other players")
+    # The window follows the agent, wrapping around the colony
+    assert listed(target_list(state, "Agent 95"))[:6] == [f"Agent {n}" for n in (96, 97, 98, 99, 100, 1)]
+
+
+def test_samples_are_deterministic_under_a_seed():
+    def prompts(seed: int) -> list[str]:
+        state = colony(60)
+        rng = random.Random(seed)
+        for _ in range(3):
+            play_actions(state, POLICIES["random"], rng)
+        return [target_list(state, name) for name in state.models.names()]
+
+    assert prompts(4) == prompts(4)
+    assert all(len(listed(targets)) == TARGET_SAMPLE for targets in prompts(4))
+
+
+def test_rendering_follows_kills_and_births():
+    state = colony(MAX_LISTED_TARGETS)
+    assert "Agent 2" in listed(target_list(state, "Agent 1"))
+    rules.kill_agent(state, "Agent 1", agent_name="Agent 2")
+    assert "Agent 2" not in listed(target_list(state, "Agent 1"))
+    assert len(listed(target_list(state, "Agent 1"))) == MAX_LISTED_TARGETS - 2
+
+    newborn = HeadlessAgent(state.allocate_agent_ids(1)[0])
+    state.models.append(newborn)
+    assert newborn.name in listed(target_list(state, "Agent 1"))
+
+    # Past the listing threshold, a kill inside an agent's window brings the next agent in
+    large = colony(MAX_LISTED_TARGETS + 10)
+    window = listed(target_list(large, "Agent 1"))
+    rules.kill_agent(large, "Agent 3", agent_name="Agent 2")
+    assert listed(target_list(large, "Agent 1")) == window[1:] + [f"Agent {TARGET_SAMPLE + 2}"]
@@ -0,0 +1,69 @@
+"""
+The incremental titles of AgentState must match get_title_based_on_actions run on plain dicts (the
+original classification), for every small combination of counters, every short sequence of actions, and
+seeded random long sequences that follow agents well past every threshold that stops reclassification.
+"""
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from game.status import ACTIONS, AgentState
+
+# Includes a tool the classification doesn't know
+CHECKED_ACTIONS = ACTIONS + ("unknown_tool",)
+
+
+def reference(action_counts: dict) -> str:
+    return AgentState.get_title_based_on_actions(SimpleNamespace(action_counts=action_counts))
+
+
+def counters(total: int, slots: int):
+    """Every way to spread `total` actions over `slots` counters"""
+    if slots == 1:
+        yield (total,)
+        return
+    for count in range(total + 1):
+        for rest in counters(total - count, slots - 1):
+            yield (count, *rest)
+
+
+@pytest.mark.parametrize("total", range(9))
+def test_titles_of_counters_and_their_next_action(total):
+    for combination in counters(total, len(CHECKED_ACTIONS)):
+        action_counts = {action: count for action, count in zip(CHECKED_ACTIONS, combination) if count}
+        agent_state = AgentState.from_counts(action_counts)
+        assert agent_state.title == reference(action_counts), action_counts
+        for action in CHECKED_ACTIONS:
+            following = agent_state.copy()
+            following.record(action)
+            expected = reference({**action_counts, action: action_counts.get(action, 0) + 1})
+            assert following.title == expected, (action_counts, action)
+
+
+def test_titles_of_action_sequences(max_length: int = 4):
+    states = [AgentState()]
+    for _ in range(max_length):
+        following_states = []
+        for agent_state in states:
+            for action in CHECKED_ACTIONS:
+                following = agent_state.copy()
+                following.record(action)
+                assert following.title == reference(following.action_counts), following
+                following_states.append(following)
+        states = following_states
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_titles_of_long_random_sequences(seed, sequences: int = 400, length: int = 60):
+    rng = random.Random(seed)
+    for _ in range(sequences):
+        # Skewed mixes: most sequences lean on one or two actions, so the kill, theft and idling thresholds
+        # (and the final killer title) are crossed early and the agent keeps acting long after
+        weights = [rng.random() ** 4 for _ in CHECKED_ACTIONS]
+        agent_state = AgentState()
+        action_counts = {}
+        for action in rng.choices(CHECKED_ACTIONS, weights, k=length):
+            agent_state.record(action)
+            action_counts[action] = action_counts.get(action, 0) + 1
+            assert agent_state.title == reference(action_counts), (action_counts, action)
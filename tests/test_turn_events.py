@@ -0,0 +1,55 @@
+"""
+Concurrent and batched turns report decisions and failures as events on the game's bus, not on the console.
+"""
+import pytest
+
+from game.events import EventBus
+from game.fake_model import FakeModel, random_policy
+from game.simulation import Simulation
+
+
+def failing_policy(prompt: str):
+    raise RuntimeError("model unavailable")
+
+
+def play_turn(mode: str, **model_settings) -> list[dict]:
+    events = []
+    bus = EventBus()
+    bus.subscribe(events.append)
+    simulation = Simulation(n_agents=3, food=10, seed=0, events=bus,
+                            model_factory=lambda: FakeModel(latency=0.0, **model_settings))
+    simulation.start_turn()
+    if mode == "batched":
+        simulation.run_batched_turn(group_size=3)
+    else:
+        simulation.run_concurrent_turn()
+    simulation.close()
+    bus.close()
+    return events
+
+
+@pytest.fixture(autouse=True)
+def quiet(capsys):
+    yield
+    assert capsys.readouterr().out == ""
+
+
+def test_concurrent_decisions_are_events():
+    events = play_turn("concurrent", policy=random_policy)
+    decisions = [event for event in events if event["event"] == "decision"]
+    assert [event["agent"] for event in decisions] == ["Agent 1", "Agent 2", "Agent 3"]
+    assert all(event["mode"] == "concurrent" for event in decisions)
+
+
+def test_failed_decisions_are_events():
+    events = play_turn("concurrent", policy=failing_policy)
+    errors = [event for event in events if event["event"] == "decision_error"]
+    assert [event["agent"] for event in errors] == ["Agent 1", "Agent 2", "Agent 3"]
+    assert all("model unavailable" in event["error"] for event in errors)
+
+
+def test_batched_fallback_is_an_event():
+    events = play_turn("batched", policy=random_policy, batch_policy=lambda prompt: "not a decision")
+    fallback = [event for event in events if event["event"] == "batch_fallback"]
+    assert fallback and fallback[0]["agents"] == ["Agent 1", "Agent 2", "Agent 3"]
+    assert [event["mode"] for event in events if event["event"] == "decision"] == ["fallback"] * 3
@@ -0,0 +1,61 @@
+"""
+Worlds of colonies: food trade between a rich and a starving colony, the same outcome on any number of
+workers, and a worker's failure surfacing with its own error.
+"""
+import pytest
+
+from game.world import Colony, ColonySpec, MigrationRules, World, WorkerError
+
+
+def trading_world(jobs: int) -> World:
+    colonies = [ColonySpec(n_agents=10, food=500, policy="cooperative"),
+                ColonySpec(n_agents=10, food=0, policy="random"),
+                ColonySpec(n_agents=10, food=0, policy="thief")]
+    return World(colonies, MigrationRules(), seed=3, jobs=jobs)
+
+
+def test_food_is_traded_to_hungry_colonies():
+    result = trading_world(jobs=1).run(turns=5)
+    food_in = sum(row["food_in"] for row in result.metrics)
+    food_out = sum(row["food_out"] for row in result.metrics)
+    assert food_in > 0
+    assert food_in == food_out
+    assert all(row["food_in"] == 0 for row in result.metrics if row["colony"] == 0)
+
+
+def test_trade_routing_neither_makes_nor_loses_food():
+    world = trading_world(jobs=1)
+    # (index, turn, population, food, knowledge, migrants, food offered)
+    reports = [(0, 1, 10, 40, 0, [], 97), (1, 1, 10, 2, 0, [], 0), (2, 1, 5, 0, 0, [], 0), (3, 1, 4, 30, 0, [], 11)]
+    arrivals, moves = world.route(reports)
+    assert sum(food for _, food in arrivals.values()) == 97 + 11
+    # The hungry colonies get at most what they lack, the rest of the offers goes back
+    assert 0 < moves[1]["food_in"] <= 8 and 0 < moves[2]["food_in"] <= 5
+    assert moves[0]["food_in"] == moves[3]["food_in"] == 0
+    assert sum(move["food_in"] for move in moves.values()) == sum(move["food_out"] for move in moves.values())
+    assert arrivals[0][1] == 97 - moves[0]["food_out"] and arrivals[3][1] == 11 - moves[3]["food_out"]
+
+
+def test_rounding_leftovers_stay_within_needs():
+    world = trading_world(jobs=1)
+    # Three colonies lacking 1 food each share an offer of 2: every share rounds down to 0
+    reports = [(0, 1, 10, 40, 0, [], 2), (1, 1, 1, 0, 0, [], 0), (2, 1, 1, 0, 0, [], 0), (3, 1, 1, 0, 0, [], 0)]
+    arrivals, moves = world.route(reports)
+    assert sorted(moves[index]["food_in"] for index in (1, 2, 3)) == [0, 1, 1]
+    assert moves[0]["food_out"] == 2 and arrivals[0][1] == 0
+    assert sum(food for _, food in arrivals.values()) == 2
+
+
+def test_workers_do_not_change_the_outcome():
+    assert trading_world(jobs=1).run(turns=5).metrics == trading_world(jobs=3).run(turns=5).metrics
+
+
+def test_worker_errors_surface():
+    world = World([ColonySpec(), ColonySpec(policy="no such policy")], seed=0, jobs=2)
+    with pytest.raises(WorkerError, match="KeyError"):
+        world.run(turns=2)
+
+
+def test_colonies_must_implement_their_turn():
+    with pytest.raises(TypeError):
+        Colony(0, ColonySpec(), 0)
@@ -1,126 +1,82 @@
-from agno.agent import Agent
-from agno.tools import tool
-from game.status import game_state
-import random 
+from game import rules
+from typing import TYPE_CHECKING, Any
 import json
 import os
+import time
+
+# The actions are plain functions: agno wraps them as tools only when agents are built (game.agents.processed_tools),
+# so importing them doesn't load agno
+if TYPE_CHECKING:
+    from agno.agent import Agent
+else:
+    Agent = Any
+
+
+def _announce(game_state, agent_name: str, action: str, message: str):
+    """Report an action: an event on the game's bus, or the console line when the game has none"""
+    if game_state.events is None:
+        print(message)
+        return
+    game_state.events.emit("action", agent=agent_name, action=action, title=game_state.get_agent_title(agent_name),
+                           message=message, population=game_state.population, food=game_state.food,
+                           knowledge=game_state.knowledge)
     
 
-@tool
 def add_food(agent: Agent) -> str:
     """Add food to the game state with success rates improved by knowledge."""
+    game_state = agent.session_state["game_state"]
     # Use the current agent from game state to avoid context issues
     current_agent_name = game_state.current_agent or agent.name
     
-    # Record action for title tracking
-    game_state.record_action(current_agent_name, 'add_food')
-    
-    # Knowledge bonus: every 10 knowledge improves food gathering
-    knowledge_bonus = game_state.knowledge // 10
-    rand = random.random()
-    
-    # Shift probabilities toward better outcomes based on knowledge
-    fail_chance = max(0.08, 0.1 - knowledge_bonus * 0.005)
-    poor_chance = max(0.2, 0.3 - knowledge_bonus * 0.02)
-    good_chance = min(0.7, 0.6 + knowledge_bonus * 0.02)
-    great_chance = min(0.85, 0.9 + knowledge_bonus * 0.01)
-    
-    if rand < fail_chance:
-        food_gained = 0
-    elif rand < poor_chance:
-        food_gained = 1
-    elif rand < good_chance:
-        food_gained = 2
-    elif rand < great_chance:
-        food_gained = 3
-    else:
-        food_gained = 3 + min(knowledge_bonus // 3, 1)
-        
-    game_state.food += food_gained
+    food_gained = rules.add_food(game_state, current_agent_name, game_state.rng)
     
     title = game_state.get_agent_title(current_agent_name)
-    print(f"🔸 {current_agent_name} ({title}) gathered {food_gained} food. Current food: {game_state.food}")
+    _announce(game_state, current_agent_name, "add_food", f"🔸 {current_agent_name} ({title}) gathered {food_gained} food. Current food: {game_state.food}")
     return f"Gathered {food_gained} food. Total food: {game_state.food}"
 
 
-@tool
 def add_knowledge(agent: Agent) -> str:
     """Add knowledge to the game state."""
+    game_state = agent.session_state["game_state"]
     # Use the current agent from game state to avoid context issues
     current_agent_name = game_state.current_agent or agent.name
     
-    # Record action for title tracking
-    game_state.record_action(current_agent_name, 'add_knowledge')
-    
-    knowledge_gained = 1
-    game_state.knowledge += knowledge_gained
+    knowledge_gained = rules.add_knowledge(game_state, current_agent_name)
     
     title = game_state.get_agent_title(current_agent_name)
-    print(f"🔸 {current_agent_name} ({title}) researched and gained {knowledge_gained} knowledge. Current knowledge: {game_state.knowledge}")
+    _announce(game_state, current_agent_name, "add_knowledge", f"🔸 {current_agent_name} ({title}) researched and gained {knowledge_gained} knowledge. Current knowledge: {game_state.knowledge}")
     return f"Researched and gained {knowledge_gained} knowledge. Total knowledge: {game_state.knowledge}"
     
     
-@tool
 def kill_agent(agent: Agent, agent_name: str) -> str:
     """Kill an agent from the game by removing it from the models list."""
+    game_state = agent.session_state["game_state"]
     # Use the current agent from game state to avoid context issues
     current_agent_name = game_state.current_agent or agent.name
     
-    # Record action for title tracking
-    game_state.record_action(current_agent_name, 'kill_agent')
-    
-    for i, model in enumerate(game_state.models):
-        if model.name == agent_name:
-            removed_model = game_state.models.pop(i)
-            title = game_state.get_agent_title(current_agent_name)
-            print(f"🔸 {current_agent_name} ({title}) killed agent '{agent_name}'. Current population: {game_state.population}")
-            return f"Successfully killed agent '{agent_name}'. Population is now {game_state.population}."
+    if rules.kill_agent(game_state, current_agent_name, agent_name=agent_name):
+        title = game_state.get_agent_title(current_agent_name)
+        game_state.emit("death", agents=[agent_name], cause="killed", by=current_agent_name)
+        _announce(game_state, current_agent_name, "kill_agent", f"🔸 {current_agent_name} ({title}) killed agent '{agent_name}'. Current population: {game_state.population}")
+        return f"Successfully killed agent '{agent_name}'. Population is now {game_state.population}."
     
     return f"Agent '{agent_name}' not found in the models list."
 
 
-@tool
 def steal_food(agent: Agent) -> str:
     """Steal food from the colony and gain immunity to starvation next turn. Higher knowledge = more efficient stealing."""
+    game_state = agent.session_state["game_state"]
     # Use the current agent from game state to avoid context issues
     current_agent_name = game_state.current_agent or agent.name
     
+    actual_stolen = rules.steal_food(game_state, current_agent_name, game_state.rng)
     title = game_state.get_agent_title(current_agent_name)
     
-    # Check if there's any food to steal
-    if game_state.food <= 0:
-        print(f"🔸 {current_agent_name} ({title}) attempted to steal food but found nothing! Wasted their action.")
+    # Check if there was any food to steal
+    if actual_stolen < 0:
+        _announce(game_state, current_agent_name, "steal_food", f"🔸 {current_agent_name} ({title}) attempted to steal food but found nothing! Wasted their action.")
         return "Attempted to steal food but there was nothing to take!"
     
-    # Record action for title tracking (this also grants starvation immunity)
-    game_state.record_action(current_agent_name, 'steal_food')
-    title = game_state.get_agent_title(current_agent_name)
-    
-    # Knowledge bonus: every 10 knowledge improves stealing efficiency
-    knowledge_bonus = game_state.knowledge // 10
-    rand = random.random()
-    
-    # Knowledge improves stealing success - smarter thieves steal more efficiently
-    fail_chance = max(0.05, 0.15 - knowledge_bonus * 0.01)
-    poor_chance = max(0.25, 0.4 - knowledge_bonus * 0.03)
-    good_chance = min(0.75, 0.6 + knowledge_bonus * 0.025)
-    great_chance = min(0.9, 0.85 + knowledge_bonus * 0.015)
-    
-    if rand < fail_chance:
-        stolen_food = 1  # Only got a little
-    elif rand < poor_chance:
-        stolen_food = 2  # Basic theft
-    elif rand < good_chance:
-        stolen_food = 3  # Good theft
-    elif rand < great_chance:
-        stolen_food = 4  # Great theft
-    else:
-        stolen_food = 5 + min(knowledge_bonus // 2, 2)  # Master thief with knowledge bonus
-    
-    # Can't steal more food than available
-    actual_stolen = min(stolen_food, game_state.food)
-    game_state.food = max(0, game_state.food - actual_stolen)
-    
     # Different messages based on success level
     if actual_stolen >= 5:
         success_msg = "executed a masterful heist"
@@ -133,54 +89,99 @@ def steal_food(agent: Agent) -> str:
     else:
         success_msg = "barely managed to steal"
     
-    print(f"🔸 {current_agent_name} ({title}) {success_msg} {actual_stolen} food! Gained starvation immunity!")
+    _announce(game_state, current_agent_name, "steal_food", f"🔸 {current_agent_name} ({title}) {success_msg} {actual_stolen} food! Gained starvation immunity!")
     return f"Stole {actual_stolen} food from the colony. Remaining food: {game_state.food}. You are now immune to starvation next turn!"
 
 
-@tool
 def do_nothing(agent: Agent) -> str:
     """Do nothing productive."""
+    game_state = agent.session_state["game_state"]
     # Use the current agent from game state to avoid context issues
     current_agent_name = game_state.current_agent or agent.name
     
-    # Record action for title tracking
-    game_state.record_action(current_agent_name, 'do_nothing')
+    rules.do_nothing(game_state, current_agent_name)
     
     title = game_state.get_agent_title(current_agent_name)
-    print(f"🔸 {current_agent_name} ({title}) did nothing productive! What a lazy ass!")
+    _announce(game_state, current_agent_name, "do_nothing", f"🔸 {current_agent_name} ({title}) did nothing productive! What a lazy ass!")
     return "I did nothing productive."
 
 
-@tool
 def reproduce(agent: Agent) -> str:
     """Create new agents for the colony with success rates improved by knowledge"""
-    from game.agents import generate_agents  # Lazy import to avoid circular dependency
-    
+    game_state = agent.session_state["game_state"]
     # Use the current agent from game state to avoid context issues
     current_agent_name = game_state.current_agent or agent.name
     
-    # Record action for title tracking
-    game_state.record_action(current_agent_name, 'reproduce')
+    num_new_agents = rules.reproduce(game_state, current_agent_name, game_state.rng)
     
-    # Knowledge bonus: every 10 knowledge improves reproduction
-    knowledge_bonus = game_state.knowledge // 10
-    rand = random.random()
-    
-    # Improve chances of multiple offspring with knowledge
-    one_child_chance = max(0.45, 0.6 - knowledge_bonus * 0.03)
-    two_child_chance = min(0.8, 0.9 - knowledge_bonus * 0.02)
-    
-    if rand < one_child_chance:
-        num_new_agents = 1
-    elif rand < two_child_chance:
-        num_new_agents = 2
-    else:
-        # With high knowledge, chance for more agents increases
-        num_new_agents = 3 + min(knowledge_bonus // 5, 1)  # Max 4 agents even with very high knowledge
-    
-    new_agents = generate_agents(num_new_agents)
+    new_agents = agent.session_state["agent_pool"].generate(num_new_agents)
     game_state.models.extend(new_agents)
+    if new_agents:
+        game_state.emit("birth", agents=[new_agent.name for new_agent in new_agents], parent=current_agent_name)
     
     title = game_state.get_agent_title(current_agent_name)
-    print(f"🔸 {current_agent_name} ({title}) reproduced! Created {num_new_agents} new agent(s). Population: {game_state.population}")
-    return f"Successfully reproduced {num_new_agents} new agent(s). Population is now {game_state.population}."
\ No newline at end of file
+    _announce(game_state, current_agent_name, "reproduce", f"🔸 {current_agent_name} ({title}) reproduced! Created {num_new_agents} new agent(s). Population: {game_state.population}")
+    return f"Successfully reproduced {num_new_agents} new agent(s). Population is now {game_state.population}."
+
+# Tool functions by name, used to build the agents' tools and to apply queued calls after a concurrent turn
+ACTIONS = {t.__name__: t for t in (add_food, add_knowledge, kill_agent, do_nothing, reproduce, steal_food)}
+
+
+def _run_action(game_state, agent_name: str, function_name: str, arguments: dict, call):
+    """Run a tool call, recording it in the replay log, the chronicle and the trace when the game keeps them"""
+    target = arguments.get("agent_name") if function_name == "kill_agent" else None
+    target_alive = target in game_state.models if target else False
+    
+    started = time.perf_counter()
+    try:
+        if game_state.replay_log is None:
+            result = call()
+        else:
+            result = game_state.replay_log.action(game_state, agent_name, function_name, arguments, call)
+    except Exception as error:
+        if game_state.tracer is not None:
+            game_state.tracer.tool(agent_name, function_name, time.perf_counter() - started, error)
+        raise
+    if game_state.tracer is not None:
+        game_state.tracer.tool(agent_name, function_name, time.perf_counter() - started)
+    
+    if target_alive and game_state.chronicle is not None and target not in game_state.models:
+        game_state.chronicle.kill(agent_name, target)
+    return result
+
+
+def defer_action(agent: Agent, function_name: str, function_call, arguments: dict) -> str:
+    """Tool hook: queue the call while a concurrent turn collects decisions, run it right away otherwise."""
+    game_state = agent.session_state["game_state"]
+    if game_state.pending_actions is None:
+        return _run_action(game_state, agent.name, function_name, arguments, lambda: function_call(**arguments))
+    
+    game_state.pending_actions.append((agent.name, function_name, arguments))
+    return f"Action {function_name} queued, it will be resolved at the end of the turn."
+
+
+def apply_pending_actions(game_state, agents: list) -> list[tuple[str, str, str]]:
+    """Apply the queued tool calls of a game in the turn order of `agents`, one per agent. Returns (agent, tool, result)."""
+    queued = {}
+    for agent_name, function_name, arguments in game_state.pending_actions or []:
+        queued.setdefault(agent_name, (function_name, arguments))  # Only the first call counts
+    game_state.pending_actions = None
+    
+    results = []
+    for agent in agents:
+        if agent.name not in queued:
+            continue
+        function_name, arguments = queued[agent.name]
+        # Agents killed earlier in the resolution order lose their action
+        if agent not in game_state.models:
+            results.append((agent.name, function_name, "Agent died before acting."))
+            game_state.emit("lost_action", agent=agent.name, action=function_name)
+            continue
+        
+        game_state.current_agent = agent.name
+        result = _run_action(game_state, agent.name, function_name, arguments,
+                             lambda: ACTIONS[function_name](agent=agent, **arguments))
+        results.append((agent.name, function_name, result))
+    
+    game_state.current_agent = None
+    return results